@@ -0,0 +1,17 @@
+# Generated by Django 4.2.10 on 2026-10-18 11:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('affiliation', '0002_alter_affiliation_employee'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['status'], name='employee_status_idx'),
+        ),
+    ]
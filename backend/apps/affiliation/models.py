@@ -30,6 +30,11 @@ class Employee(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['status'], name='employee_status_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.employee_id})"
 
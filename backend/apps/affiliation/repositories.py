@@ -1,5 +1,9 @@
 """Repository pattern for Affiliation app."""
 from .models import Employee, Affiliation, Provider
+from apps.core.cache import get_catalog
+
+AFFILIATION_TYPES_CATALOG = 'affiliation.types'
+PROVIDERS_CATALOG = 'affiliation.providers'
 
 class EmployeeRepository:
     """Repository for Employee model."""
@@ -43,3 +47,27 @@ class AffiliationRepository:
             provider__affiliation_type_id=affiliation_type_id,
             is_active=True
         ).first()
+
+class AffiliationTypeRepository:
+    """Repository for AffiliationType model."""
+    
+    @staticmethod
+    def get_cached_types():
+        """Return all affiliation types from the catalog cache."""
+        return get_catalog(AFFILIATION_TYPES_CATALOG)
+
+class ProviderRepository:
+    """Repository for Provider model."""
+    
+    @staticmethod
+    def get_cached_active_providers():
+        """Return the active providers from the catalog cache."""
+        return [provider for provider in get_catalog(PROVIDERS_CATALOG) if provider.is_active]
+    
+    @staticmethod
+    def get_cached_by_type(type_id):
+        """Return the active providers of an affiliation type from the catalog cache."""
+        return [
+            provider for provider in ProviderRepository.get_cached_active_providers()
+            if str(provider.affiliation_type_id) == str(type_id)
+        ]
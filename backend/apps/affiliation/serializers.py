@@ -1,7 +1,9 @@
 from rest_framework import serializers
+from apps.core.serializers import CatalogField, SparseFieldsetMixin
 from .models import Employee, AffiliationType, Provider, Affiliation
+from .repositories import AFFILIATION_TYPES_CATALOG, PROVIDERS_CATALOG
 
-class EmployeeSerializer(serializers.ModelSerializer):
+class EmployeeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Employee
         fields = '__all__'
@@ -29,21 +31,21 @@ class EmployeeSerializer(serializers.ModelSerializer):
         
         return super().create(validated_data)
 
-class AffiliationTypeSerializer(serializers.ModelSerializer):
+class AffiliationTypeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = AffiliationType
         fields = '__all__'
 
-class ProviderSerializer(serializers.ModelSerializer):
-    affiliation_type_name = serializers.ReadOnlyField(source='affiliation_type.name')
+class ProviderSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    affiliation_type_name = CatalogField(AFFILIATION_TYPES_CATALOG, 'name', source='affiliation_type_id')
     
     class Meta:
         model = Provider
         fields = '__all__'
 
-class AffiliationSerializer(serializers.ModelSerializer):
-    provider_name = serializers.ReadOnlyField(source='provider.name')
-    affiliation_type_name = serializers.ReadOnlyField(source='provider.affiliation_type.name')
+class AffiliationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    provider_name = CatalogField(PROVIDERS_CATALOG, 'name', source='provider_id')
+    affiliation_type_name = CatalogField(PROVIDERS_CATALOG, 'affiliation_type.name', source='provider_id')
     employee_name = serializers.SerializerMethodField()
     
     class Meta:
@@ -0,0 +1,150 @@
+"""
+Services for the affiliation app.
+
+``OnboardingService.hire_candidates`` hires many candidates at once: it
+creates their employees with one ``bulk_create`` and marks them HIRED with
+one UPDATE. ``create_employee_from_candidate`` (signals) keeps handling
+candidates hired one at a time; both build the employee with
+``employee_from_candidate``.
+"""
+
+import logging
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.selection.models import Candidate
+from .models import Employee
+
+logger = logging.getLogger('apps.affiliation')
+
+# Candidate statuses that can be hired
+HIREABLE_STATUSES = ('ACTIVE', 'HIRED')
+
+
+def employee_from_candidate(candidate, hire_date, position='', department=''):
+    """Return an unsaved Employee with the data of a candidate."""
+    return Employee(
+        candidate=candidate,
+        first_name=candidate.first_name,
+        last_name=candidate.last_name,
+        document_type=candidate.document_type,
+        document_number=candidate.document_number,
+        email=candidate.email,
+        phone=candidate.phone,
+        address=candidate.address,
+        # Generate employee ID
+        employee_id=f"EMP-{candidate.id:06d}",
+        position=position,
+        department=department,
+        hire_date=hire_date,
+    )
+
+
+class OnboardingService:
+    """Hire candidates in bulk."""
+
+    @staticmethod
+    def hire_candidates(candidate_ids, hire_date=None, position='', department=''):
+        """
+        Hire candidates and create their employees.
+
+        Candidates that already have an employee are only marked HIRED.
+        Candidates whose document number or employee code already belongs to
+        another employee are reported as conflicts and left unchanged, as are
+        rejected or withdrawn candidates. Returns a report with the hired
+        candidate ids and the rows that were not hired.
+        """
+        hire_date = hire_date or timezone.localdate()
+        candidate_ids = set(candidate_ids)
+        report = {
+            'hired': [],
+            'employees_created': 0,
+            'already_employees': 0,
+            'skipped': [],
+            'conflicts': [],
+            'not_found': [],
+        }
+
+        with transaction.atomic():
+            candidates = {
+                candidate.id: candidate
+                for candidate in Candidate.objects.select_for_update().filter(id__in=candidate_ids).order_by('id')
+            }
+            report['not_found'] = sorted(candidate_ids - set(candidates))
+
+            hireable = []
+            for candidate in candidates.values():
+                if candidate.status in HIREABLE_STATUSES:
+                    hireable.append(candidate)
+                else:
+                    report['skipped'].append({'candidate': candidate.id, 'reason': f"Estado {candidate.status}"})
+
+            existing = Employee.objects.filter(
+                Q(candidate_id__in=[c.id for c in hireable])
+                | Q(document_number__in=[c.document_number for c in hireable])
+                | Q(employee_id__in=[f"EMP-{c.id:06d}" for c in hireable])
+            ).values_list('candidate_id', 'document_number', 'employee_id')
+            employee_candidates = set()
+            taken_documents = {}
+            taken_codes = set()
+            for candidate_id, document_number, employee_id in existing:
+                if candidate_id is not None:
+                    employee_candidates.add(candidate_id)
+                taken_documents[document_number] = employee_id
+                taken_codes.add(employee_id)
+
+            hired = []
+            employees = []
+            for candidate in hireable:
+                if candidate.id in employee_candidates:
+                    report['already_employees'] += 1
+                    hired.append(candidate.id)
+                    continue
+                employee = employee_from_candidate(candidate, hire_date, position, department)
+                if candidate.document_number in taken_documents:
+                    report['conflicts'].append({
+                        'candidate': candidate.id,
+                        'reason': f"El documento {candidate.document_number} ya pertenece al empleado "
+                                  f"{taken_documents[candidate.document_number]}"
+                    })
+                    continue
+                if employee.employee_id in taken_codes:
+                    report['conflicts'].append({
+                        'candidate': candidate.id,
+                        'reason': f"El código {employee.employee_id} ya está en uso"
+                    })
+                    continue
+                # Also catches two candidates of the batch with the same document
+                taken_documents[candidate.document_number] = employee.employee_id
+                taken_codes.add(employee.employee_id)
+                employees.append(employee)
+
+            if employees:
+                # Rows inserted concurrently by another transaction are skipped, not errors
+                Employee.objects.bulk_create(employees, ignore_conflicts=True)
+                created = set(Employee.objects.filter(
+                    candidate_id__in=[employee.candidate_id for employee in employees]
+                ).values_list('candidate_id', flat=True))
+                for employee in employees:
+                    if employee.candidate_id in created:
+                        hired.append(employee.candidate_id)
+                    else:
+                        report['conflicts'].append({
+                            'candidate': employee.candidate_id,
+                            'reason': f"El documento {employee.document_number} ya está registrado"
+                        })
+                report['employees_created'] = len(created)
+
+            # post_save is not sent, so the per-candidate signal does not run
+            Candidate.objects.filter(id__in=hired).exclude(status='HIRED').update(
+                status='HIRED', updated_at=timezone.now()
+            )
+
+        report['hired'] = sorted(hired)
+        logger.info(
+            f"Hired {len(hired)} candidates, {report['employees_created']} employees created, "
+            f"{len(report['conflicts'])} conflicts, {len(report['skipped'])} skipped"
+        )
+        return report
@@ -1,9 +1,19 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from .models import Employee
+from apps.core.cache import register_catalog
+from .models import Employee, AffiliationType, Provider
+from .repositories import AFFILIATION_TYPES_CATALOG, PROVIDERS_CATALOG
+from .services import employee_from_candidate
 from apps.core.models import User
 from apps.selection.models import Candidate
 
+register_catalog(AFFILIATION_TYPES_CATALOG, lambda: list(AffiliationType.objects.order_by('id')), AffiliationType)
+register_catalog(
+    PROVIDERS_CATALOG,
+    lambda: list(Provider.objects.select_related('affiliation_type').order_by('id')),
+    Provider, AffiliationType
+)
+
 @receiver(post_save, sender=Candidate)
 def create_employee_from_candidate(sender, instance, **kwargs):
     """
@@ -11,19 +21,5 @@ def create_employee_from_candidate(sender, instance, **kwargs):
     """
     if instance.status == 'HIRED':
         # Check if employee already exists with this candidate
-        from .models import Employee
         if not Employee.objects.filter(candidate=instance).exists():
-            # Create employee from candidate
-            Employee.objects.create(
-                candidate=instance,
-                first_name=instance.first_name,
-                last_name=instance.last_name,
-                document_type=instance.document_type,
-                document_number=instance.document_number,
-                email=instance.email,
-                phone=instance.phone,
-                address=instance.address,
-                # Generate employee ID
-                employee_id=f"EMP-{instance.id:06d}",
-                hire_date=instance.updated_at.date()
-            )
+            employee_from_candidate(instance, instance.updated_at.date()).save()
@@ -6,13 +6,21 @@ from .serializers import (
     EmployeeSerializer, AffiliationTypeSerializer, 
     ProviderSerializer, AffiliationSerializer
 )
-from .repositories import EmployeeRepository, AffiliationRepository
+from .repositories import (
+    EmployeeRepository, AffiliationRepository, AffiliationTypeRepository, ProviderRepository
+)
 from apps.core.utils import record_activity
+from apps.core.pagination import CursorListPagination
+from apps.core.permissions import HasModuleAccess
+from apps.core.views import CatalogListMixin, ConditionalGetMixin
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+class EmployeeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for the Employee model."""
     serializer_class = EmployeeSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CursorListPagination
+    cursor_ordering = ('-created_at', '-id')
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'affiliation'
     
     def get_queryset(self):
         return EmployeeRepository.get_active_employees()
@@ -74,17 +82,25 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         
         return super().create(request, *args, **kwargs)
 
-class AffiliationTypeViewSet(viewsets.ModelViewSet):
+class AffiliationTypeViewSet(CatalogListMixin, viewsets.ModelViewSet):
     """ViewSet for the AffiliationType model."""
     queryset = AffiliationType.objects.all()
     serializer_class = AffiliationTypeSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'affiliation'
+    
+    def get_catalog_rows(self):
+        return AffiliationTypeRepository.get_cached_types()
 
-class ProviderViewSet(viewsets.ModelViewSet):
+class ProviderViewSet(CatalogListMixin, viewsets.ModelViewSet):
     """ViewSet for the Provider model."""
     queryset = Provider.objects.filter(is_active=True)
     serializer_class = ProviderSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'affiliation'
+    
+    def get_catalog_rows(self):
+        return ProviderRepository.get_cached_active_providers()
     
     @action(detail=False, methods=['get'])
     def by_type(self, request):
@@ -93,17 +109,17 @@ class ProviderViewSet(viewsets.ModelViewSet):
         if not type_id:
             return Response({'error': 'Affiliation type ID is required'}, status=400)
         
-        providers = Provider.objects.filter(
-            affiliation_type_id=type_id,
-            is_active=True
-        )
+        providers = ProviderRepository.get_cached_by_type(type_id)
         serializer = self.get_serializer(providers, many=True)
         return Response(serializer.data)
 
-class AffiliationViewSet(viewsets.ModelViewSet):
+class AffiliationViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for the Affiliation model."""
     serializer_class = AffiliationSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CursorListPagination
+    cursor_ordering = ('-created_at', '-id')
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'affiliation'
     
     def get_queryset(self):
         return AffiliationRepository.get_active_affiliations()
@@ -0,0 +1,153 @@
+"""
+Buffered writer for SystemActivity records.
+
+``record_activity`` used to INSERT each activity in its own transaction
+inside the request. Activities are now queued in an in-process buffer once
+the surrounding transaction commits (so rolled back work leaves no audit
+row) and written with ``bulk_create`` by a background thread, either when
+``ACTIVITY_FLUSH_SIZE`` activities are waiting or every
+``ACTIVITY_FLUSH_INTERVAL`` seconds. The buffer is flushed when the process
+exits.
+
+The buffer holds at most ``ACTIVITY_BUFFER_MAX`` activities; further ones
+are dropped and counted, as are activities lost to a failed write.
+``get_metrics()`` reports the queue depth and these counters.
+
+Set ``ACTIVITY_WRITER = 'sync'`` to write each activity immediately, e.g.
+in scripts that read the activities back right away.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger('apps.core')
+
+
+class ActivityBuffer:
+    """Thread-safe queue of unsaved activities flushed by a background thread."""
+
+    def __init__(self, flush_size=100, flush_interval=2.0, max_size=10000):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+        self.last_flush_at = None
+
+    def put(self, activity):
+        """Queue an activity, or drop it if the buffer is full."""
+        with self._condition:
+            if len(self._queue) >= self.max_size:
+                self.dropped += 1
+                if self.dropped == 1 or self.dropped % 1000 == 0:
+                    logger.warning(f"Activity buffer full, {self.dropped} activities dropped so far")
+                return False
+            self._queue.append(activity)
+            self.enqueued += 1
+            if len(self._queue) >= self.flush_size:
+                self._condition.notify()
+        self._ensure_thread()
+        return True
+
+    def flush(self):
+        """Write every queued activity; return the number written."""
+        written = 0
+        # Serializes the background thread and explicit/atexit flushes
+        with self._flush_lock:
+            while True:
+                with self._condition:
+                    batch = [self._queue.popleft() for _ in range(min(len(self._queue), self.flush_size))]
+                if not batch:
+                    break
+                written += self._write(batch)
+        return written
+
+    def _write(self, batch):
+        from .models import SystemActivity
+
+        try:
+            SystemActivity.objects.bulk_create(batch)
+        except Exception as e:
+            self.failed_flushes += 1
+            self.dropped += len(batch)
+            logger.error(f"Error writing {len(batch)} activities: {str(e)}")
+            return 0
+        self.written += len(batch)
+        self.last_flush_at = time.time()
+        return len(batch)
+
+    def _ensure_thread(self):
+        # A forked worker inherits the buffer but not the thread
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='activity-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if len(self._queue) < self.flush_size:
+                    self._condition.wait(self.flush_interval)
+            try:
+                self.flush()
+            finally:
+                # The thread keeps no connection open between flushes
+                connection.close()
+
+    def metrics(self):
+        with self._condition:
+            depth = len(self._queue)
+        return {
+            'queue_depth': depth,
+            'max_size': self.max_size,
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed_flushes': self.failed_flushes,
+            'last_flush_at': self.last_flush_at,
+            'writer_alive': bool(self._thread and self._thread.is_alive()),
+        }
+
+
+buffer = ActivityBuffer(
+    flush_size=getattr(settings, 'ACTIVITY_FLUSH_SIZE', 100),
+    flush_interval=getattr(settings, 'ACTIVITY_FLUSH_INTERVAL', 2.0),
+    max_size=getattr(settings, 'ACTIVITY_BUFFER_MAX', 10000),
+)
+atexit.register(buffer.flush)
+
+
+def enqueue_activity(activity):
+    """Queue an unsaved SystemActivity once the current transaction commits."""
+    if getattr(settings, 'ACTIVITY_WRITER', 'buffered') == 'sync':
+        transaction.on_commit(activity.save)
+        return
+    transaction.on_commit(lambda: buffer.put(activity))
+
+
+def flush_activities():
+    """Write the queued activities now; return the number written."""
+    return buffer.flush()
+
+
+def get_metrics():
+    """Return the queue depth and counters of the activity buffer."""
+    return buffer.metrics()
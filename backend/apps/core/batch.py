@@ -0,0 +1,90 @@
+"""
+Batch write context for bulk imports and edits.
+
+Several apps keep parent aggregates up to date from ``post_save`` receivers
+(payroll entry totals, evaluation scores, attendance scores). Inside a
+``batch_writes`` block those receivers only record which parents became
+dirty, and every dirty parent is recomputed exactly once when the outermost
+block exits.
+
+The outermost block runs in a transaction, so the writes and the recomputed
+aggregates are committed together: if the block (or a recomputation)
+raises, both are rolled back.
+
+Usage::
+
+    with batch_writes():
+        for row in rows:
+            PayrollEntryDetail.objects.create(**row)
+
+    @batch_writes()
+    def import_evaluations(rows):
+        ...
+"""
+
+import threading
+from contextlib import ContextDecorator
+
+from django.db import transaction
+
+_state = threading.local()
+
+# Recompute callbacks by dirty key, in registration order
+_recomputers = {}
+
+
+def register_recompute(key, recompute):
+    """
+    Register the callback that recomputes the parents recorded under a key.
+
+    Parameters:
+    - key: Identifier used by the receivers, e.g. 'payroll.entry_totals'
+    - recompute: Callable receiving the set of dirty parent ids
+    """
+    _recomputers[key] = recompute
+
+
+def is_batching():
+    """Return True while a batch_writes block is active on this thread."""
+    return getattr(_state, 'depth', 0) > 0
+
+
+def mark_dirty(key, pk):
+    """Record a parent id to be recomputed when the batch exits."""
+    _state.dirty.setdefault(key, set()).add(pk)
+
+
+class batch_writes(ContextDecorator):
+    """Context manager/decorator that defers aggregate receivers until exit.
+
+    Nested blocks join the outermost one, which opens a transaction. If the
+    block raises, the transaction is rolled back and the dirty ids are
+    discarded with the writes that produced them.
+    """
+
+    def __enter__(self):
+        if not is_batching():
+            _state.depth = 0
+            _state.dirty = {}
+            _state.atomic = transaction.atomic()
+            _state.atomic.__enter__()
+        _state.depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _state.depth -= 1
+        if _state.depth > 0:
+            return False
+
+        dirty, _state.dirty = _state.dirty, {}
+        atomic, _state.atomic = _state.atomic, None
+        if exc_type is None:
+            try:
+                for key, recompute in _recomputers.items():
+                    if dirty.get(key):
+                        recompute(dirty[key])
+            except BaseException as error:
+                atomic.__exit__(type(error), error, error.__traceback__)
+                raise
+        atomic.__exit__(exc_type, exc_value, traceback)
+        return False
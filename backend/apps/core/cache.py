@@ -0,0 +1,137 @@
+"""
+Cache of the reference catalogs.
+
+Catalogs are small, rarely-changing tables (payroll items, affiliation
+types, evaluation criteria...) read on almost every request. Each app
+registers its catalogs with ``register_catalog``; the rows are then read
+from the cache configured in ``CATALOG_CACHE_ALIAS`` instead of the
+database.
+
+Every catalog has a version number stored in the cache and its rows are
+stored under a key that includes that version. Saving or deleting a row of
+any model of the catalog bumps the version, so every process reads the new
+rows on its next access. Rows are also kept in process memory per version,
+so repeated reads within a process only fetch the version number.
+
+A loader may also return a single precomputed object instead of a list of
+rows (``get_catalog`` then returns that object); it must be picklable and
+treated as read-only.
+
+With the default local-memory backend each process has its own cache and
+only sees its own invalidations; deployments with several worker processes
+should set ``CACHE_BACKEND`` to ``file`` or ``redis``.
+
+Usage::
+
+    register_catalog('payroll.items', lambda: list(PayrollItem.objects.order_by('id')), PayrollItem)
+
+    items = get_catalog('payroll.items')
+    item = get_catalog_map('payroll.items').get(item_id)
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+# Loader callables by catalog name
+_loaders = {}
+
+# Rows and rows by id already loaded in this process, by catalog name
+_local = {}
+
+
+def _cache():
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+
+def _version_key(name):
+    return f'catalog:{name}:version'
+
+
+def register_catalog(name, loader, *models):
+    """
+    Register a catalog and invalidate it when any of its models change.
+
+    Parameters:
+    - name: Catalog name, e.g. 'payroll.items'
+    - loader: Callable returning the list of rows of the catalog
+    - models: Models whose save/delete signals invalidate the catalog
+    """
+    _loaders[name] = loader
+
+    def invalidate(sender, **kwargs):
+        if not kwargs.get('raw', False):
+            invalidate_catalog(name)
+
+    for model in models:
+        post_save.connect(invalidate, sender=model, weak=False, dispatch_uid=f'catalog:{name}:{model._meta.label}:save')
+        post_delete.connect(invalidate, sender=model, weak=False, dispatch_uid=f'catalog:{name}:{model._meta.label}:delete')
+
+
+def catalog_version(name):
+    """Return the current version of a catalog."""
+    cache = _cache()
+    key = _version_key(name)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock so an evicted version never reuses old row keys
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(name):
+    cache = _cache()
+    try:
+        cache.incr(_version_key(name))
+    except ValueError:
+        cache.set(_version_key(name), time.time_ns(), timeout=None)
+
+
+def invalidate_catalog(name):
+    """Discard the cached rows of a catalog.
+
+    The version is bumped right away, so the current transaction reads its own
+    changes, and again on commit, so rows cached meanwhile by another request
+    are not served after the commit.
+    """
+    _bump(name)
+    transaction.on_commit(lambda: _bump(name))
+
+
+def _load(name):
+    version = catalog_version(name)
+    local = _local.get(name)
+    if local is not None and local[0] == version:
+        return local
+
+    cache = _cache()
+    key = f'catalog:{name}:{version}'
+    rows = cache.get(key)
+    if rows is None:
+        rows = _loaders[name]()
+        cache.set(key, rows, timeout=getattr(settings, 'CATALOG_CACHE_TIMEOUT', 3600))
+
+    # The map by id is built on first use
+    local = [version, rows, None]
+    _local[name] = local
+    return local
+
+
+def get_catalog(name):
+    """Return the rows of a catalog, in the order of its loader.
+
+    The rows are shared by every caller of the process and must not be modified.
+    """
+    return _load(name)[1]
+
+
+def get_catalog_map(name):
+    """Return the rows of a catalog by primary key."""
+    local = _load(name)
+    if local[2] is None:
+        local[2] = {row.pk: row for row in local[1]}
+    return local[2]
@@ -0,0 +1,180 @@
+"""
+Database routing and connection reporting.
+
+When ``DATABASE_REPLICA_URL`` is set, a ``replica`` alias is configured and
+``ReplicaRouter`` sends reads to it, but only inside ``replica_reads()``:
+the GET/HEAD requests of viewsets using ``ReplicaReadMixin`` and the
+viewset actions and repository methods decorated with ``@use_replica``.
+Everything else, writes included, uses the primary. Without a replica the
+router does nothing.
+
+Reads stay on the primary, so users read their own writes, when:
+
+- the primary is inside a transaction;
+- the current request has already written (``ReplicaRoutingMiddleware``);
+- the user wrote during the last ``REPLICA_STICKY_SECONDS`` seconds. The
+  middleware pins the user after a request that writes, and the pin is
+  checked once the viewset knows the user (``ReplicaReadMixin`` and
+  ``@use_replica`` on viewset actions).
+
+``report_database_config()`` logs the effective connection settings of each
+alias; it is called once per process by the WSGI/ASGI entry points.
+"""
+
+import contextvars
+import functools
+import logging
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_ALIAS = 'replica'
+
+logger = logging.getLogger('apps.core.db')
+
+_replica_reads = contextvars.ContextVar('replica_reads', default=False)
+_request_state = contextvars.ContextVar('db_request_state', default=None)
+
+
+def has_replica():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def _pin_key(user_id):
+    return f'db-pin:{user_id}'
+
+
+class RequestRoutingState:
+    """Routing facts of the current request: whether it wrote and whether its user is pinned."""
+
+    def __init__(self):
+        self.wrote = False
+        self.user_id = None
+        self._pinned = None
+
+    def set_user(self, user):
+        if user is not None and user.is_authenticated and self.user_id is None:
+            self.user_id = user.pk
+
+    def is_pinned(self):
+        if self.user_id is None:
+            return False
+        if self._pinned is None:
+            self._pinned = bool(cache.get(_pin_key(self.user_id)))
+        return self._pinned
+
+
+def note_request_user(user):
+    """Record the authenticated user of the current request for the stickiness check."""
+    state = _request_state.get()
+    if state is not None:
+        state.set_user(user)
+
+
+def reads_use_replica():
+    """Return True if reads made now would go to the replica."""
+    if not _replica_reads.get() or not has_replica():
+        return False
+    # Reads inside a transaction must see its writes
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return False
+    state = _request_state.get()
+    return state is None or not (state.wrote or state.is_pinned())
+
+
+@contextmanager
+def replica_reads():
+    """Route the reads of the enclosed block to the replica, if one is configured."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def use_replica(func):
+    """
+    Run a viewset action or repository method with ``replica_reads()``.
+
+    On viewset actions the request user is recorded first, so a user who
+    has just written keeps reading from the primary. For static methods,
+    apply it below ``@staticmethod``. Only queries run inside the call are
+    routed: a returned lazy queryset is evaluated later, on the primary.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        request = getattr(args[0], 'request', None) if args else None
+        if request is not None:
+            note_request_user(getattr(request, 'user', None))
+        with replica_reads():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Send reads to the replica inside ``replica_reads()``; everything else to the primary."""
+
+    def db_for_read(self, model, **hints):
+        return REPLICA_ALIAS if reads_use_replica() else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        # Also for instances loaded from the replica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives the schema through replication
+        return db != REPLICA_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """Track the writes of each request and pin users who wrote to the primary for a while."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RequestRoutingState()
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+
+        if state.wrote and has_replica():
+            # DRF sets the authenticated user on the Django request
+            state.set_user(getattr(request, 'user', None))
+            if state.user_id is not None:
+                cache.set(_pin_key(state.user_id), True, getattr(settings, 'REPLICA_STICKY_SECONDS', 10))
+        return response
+
+
+def describe_databases():
+    """Return one line per alias describing its effective connection settings."""
+    lines = []
+    for alias, config in settings.DATABASES.items():
+        max_age = config.get('CONN_MAX_AGE', 0)
+        lines.append(
+            f"{alias}: {config['ENGINE'].rsplit('.', 1)[-1]} "
+            f"{config.get('HOST') or 'local'}:{config.get('PORT') or '-'}/{config.get('NAME')} "
+            f"conn_max_age={'unlimited' if max_age is None else max_age} "
+            f"health_checks={config.get('CONN_HEALTH_CHECKS', False)} "
+            f"server_side_cursors={not config.get('DISABLE_SERVER_SIDE_CURSORS', False)} "
+            f"pool={getattr(settings, 'DB_POOL_MODE', '') or 'none'}"
+        )
+    lines.append(f"replica reads: {'enabled' if has_replica() else 'disabled (no replica configured)'}")
+    return lines
+
+
+def report_database_config():
+    """Log the effective database configuration."""
+    for line in describe_databases():
+        logger.info(line)
@@ -0,0 +1,136 @@
+"""
+Management command to maintain the SystemActivity partitions and retention.
+
+Run it daily (e.g. from cron). It:
+
+1. Creates the monthly partitions of the current month and the next
+   ``--ahead`` months, moving any of their rows out of the default partition.
+2. Archives every month older than ``--retention-months`` to
+   ``<archive dir>/systemactivity-YYYY-MM.jsonl.gz`` (one JSON object per
+   activity, oldest first) and then drops its partition. Archive files are
+   never overwritten; a month archived twice gets a numbered file.
+
+On databases without partitioning step 1 is skipped and archived months are
+removed with a range DELETE.
+"""
+import gzip
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from apps.core.models import SystemActivity
+from apps.core.partitions import (
+    add_months, create_month_partition, drop_partition, is_partitioned, list_month_partitions, month_start
+)
+
+ARCHIVE_FIELDS = ('id', 'title', 'description', 'type', 'timestamp', 'created_by_id')
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming SystemActivity partitions and archive the months past retention'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=3,
+                            help='Months after the current one to create partitions for')
+        parser.add_argument('--retention-months', type=int, default=settings.ACTIVITY_RETENTION_MONTHS,
+                            help='Months kept in the database, the current one included')
+        parser.add_argument('--archive-dir', default=settings.ACTIVITY_ARCHIVE_DIR,
+                            help='Directory of the compressed JSONL archives')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be done')
+
+    def handle(self, *args, **options):
+        if options['retention_months'] < 1:
+            raise CommandError('--retention-months must be at least 1')
+
+        table = SystemActivity._meta.db_table
+        partitioned = is_partitioned(table)
+        current = month_start(timezone.now())
+
+        if partitioned:
+            self.create_partitions(table, current, options['ahead'], options['dry_run'])
+        else:
+            self.stdout.write(f'{table} is not partitioned, skipping partition creation')
+
+        cutoff = add_months(current, 1 - options['retention_months'])
+        partitions = list_month_partitions(table) if partitioned else {}
+        months = {month for month in partitions if month < cutoff}
+        oldest = SystemActivity.objects.filter(timestamp__lt=cutoff).aggregate(oldest=Min('timestamp'))['oldest']
+        if oldest:
+            month = month_start(oldest)
+            while month < cutoff:
+                months.add(month)
+                month = add_months(month, 1)
+
+        if not months:
+            self.stdout.write(f'Nothing to archive before {cutoff:%Y-%m}')
+        for month in sorted(months):
+            self.archive_month(table, month, partitions.get(month), options['archive_dir'], options['dry_run'])
+
+    def create_partitions(self, table, current, ahead, dry_run):
+        existing = list_month_partitions(table)
+        for offset in range(ahead + 1):
+            month = add_months(current, offset)
+            if month in existing:
+                continue
+            if dry_run:
+                self.stdout.write(f'Would create partition for {month:%Y-%m}')
+                continue
+            with transaction.atomic():
+                name = create_month_partition(table, month)
+            self.stdout.write(f'Created partition {name}')
+
+    def archive_month(self, table, month, partition, archive_dir, dry_run):
+        rows = SystemActivity.objects.filter(
+            timestamp__gte=month, timestamp__lt=add_months(month, 1)
+        ).order_by('timestamp', 'id')
+
+        if dry_run:
+            action = f'drop partition {partition}' if partition else 'delete rows'
+            self.stdout.write(f'Would archive {month:%Y-%m}: {rows.count()} activities, then {action}')
+            return
+
+        path = None
+        count = 0
+        if rows.exists():
+            path, count = self.write_archive(rows, month, archive_dir)
+
+        # The archive file is in place before anything is removed
+        with transaction.atomic():
+            if partition:
+                drop_partition(table, partition)
+            else:
+                rows.delete()
+
+        target = path or 'no archive, month was empty'
+        self.stdout.write(self.style.SUCCESS(f'Archived {month:%Y-%m}: {count} activities ({target})'))
+
+    def write_archive(self, rows, month, archive_dir):
+        """Write the rows to a new .jsonl.gz file; return (path, row count)."""
+        os.makedirs(archive_dir, exist_ok=True)
+        base = os.path.join(archive_dir, f'systemactivity-{month:%Y-%m}')
+        path = f'{base}.jsonl.gz'
+        suffix = 1
+        while os.path.exists(path):
+            path = f'{base}-{suffix}.jsonl.gz'
+            suffix += 1
+
+        temp_path = f'{path}.part'
+        count = 0
+        try:
+            with gzip.open(temp_path, 'wt', encoding='utf-8') as archive:
+                for row in rows.values(*ARCHIVE_FIELDS).iterator(chunk_size=2000):
+                    archive.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False))
+                    archive.write('\n')
+                    count += 1
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return path, count
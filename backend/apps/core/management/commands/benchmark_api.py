@@ -0,0 +1,278 @@
+"""
+Management command to benchmark every router endpoint of the API.
+
+Drives the GET endpoints registered in the routers of the six apps (list,
+retrieve and GET extra actions) through the DRF test client, and records
+p50/p95 latency, SQL query count and SQL time per endpoint. Results are
+written as JSON and can be compared against a stored baseline; the command
+fails when an endpoint regresses beyond the configured thresholds.
+
+Endpoints answering with an error status (e.g. a missing sample parameter)
+are listed as skipped: they are neither saved in the results nor compared,
+and an endpoint of the baseline that now fails is a regression.
+
+Usage::
+
+    python manage.py seed_scale --employees 20000
+    python manage.py benchmark_api --output bench.json --save-baseline
+    python manage.py benchmark_api --output bench.json --baseline benchmarks/baseline.json
+"""
+import json
+import math
+import platform
+import time
+from contextlib import ExitStack
+from importlib import import_module
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import override_settings
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core.middleware import QueryProfile
+from apps.core.models import User
+
+ROUTER_MODULES = [
+    'apps.core.urls', 'apps.selection.urls', 'apps.affiliation.urls',
+    'apps.payroll.urls', 'apps.performance.urls', 'apps.training.urls',
+]
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'api_baseline.json'
+
+# Query parameters sent to extra actions, with the model used to pick a sample
+# id, or a (model, field) pair to send a field of that sample instead
+SAMPLE_PARAMS = {
+    'employee': 'affiliation.Employee',
+    'period': 'payroll.PayrollPeriod',
+    'entry': 'payroll.PayrollEntry',
+    'program': 'training.TrainingProgram',
+    'session': 'training.TrainingSession',
+    'process': 'selection.SelectionProcess',
+}
+# ``?type=`` is an id in some apps and a choice value in others
+MODULE_SAMPLE_PARAMS = {
+    'apps.affiliation.urls': {
+        'document': ('affiliation.Employee', 'document_number'),
+        'employee_id': 'affiliation.Employee',
+        'type_id': 'affiliation.AffiliationType',
+    },
+    'apps.selection.urls': {
+        'type': ('selection.Candidate', 'document_type'),
+        'number': ('selection.Candidate', 'document_number'),
+    },
+    'apps.performance.urls': {'type': 'performance.EvaluationType'},
+    'apps.training.urls': {'type': 'training.TrainingType'},
+}
+MODULE_STATIC_PARAMS = {
+    'apps.payroll.urls': {'type': 'EARNING'},
+}
+
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark latency and SQL queries of every router GET endpoint and compare with a baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=10, help='Measured requests per endpoint (default: 10)')
+        parser.add_argument('--warmup', type=int, default=1, help='Unmeasured requests per endpoint (default: 1)')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Baseline JSON file')
+        parser.add_argument('--save-baseline', action='store_true', help='Store the results as the new baseline')
+        parser.add_argument(
+            '--threshold', type=float, default=0.25,
+            help='Allowed relative increase of p95 latency and SQL time over the baseline (default: 0.25)'
+        )
+        parser.add_argument(
+            '--query-threshold', type=int, default=0,
+            help='Allowed increase of the query count over the baseline (default: 0)'
+        )
+        parser.add_argument('--min-ms', type=float, default=5.0,
+                            help='Ignore latency regressions of endpoints faster than this (default: 5 ms)')
+        parser.add_argument('--filter', help='Only benchmark endpoints whose name contains this text')
+        parser.add_argument('--user', help='Email of the user making the requests (default: first superuser)')
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(email=options['user']) if options['user'] else User.objects.filter(is_superuser=True)
+        user = users.order_by('id').first()
+        if user is None:
+            raise CommandError('User not found' if options['user'] else 'No superuser found; use --user')
+
+        # Failing endpoints are recorded with their status instead of aborting the run
+        client = APIClient(raise_request_exception=False)
+        client.force_authenticate(user)
+        endpoints = [
+            endpoint for endpoint in self.endpoints()
+            if not options['filter'] or options['filter'] in endpoint[0]
+        ]
+
+        results, skipped = {}, {}
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for name, url in endpoints:
+                result = self.measure(client, url, options['warmup'], max(1, options['iterations']))
+                if result['status'] >= 400:
+                    # The timings of an error response say nothing about the endpoint
+                    skipped[name] = {'url': url, 'status': result['status']}
+                    self.stdout.write(self.style.WARNING(f"{name}: HTTP {result['status']}, skipped"))
+                    continue
+                results[name] = result
+                self.stdout.write(
+                    f"{name}: HTTP {result['status']}, p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, "
+                    f"{result['queries']} queries, {result['sql_ms']} ms SQL"
+                )
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'iterations': options['iterations'],
+            'endpoints': results,
+            'skipped': skipped,
+        }
+
+        if options['output']:
+            self.write_json(options['output'], report)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options['save_baseline']:
+            self.write_json(options['baseline'], report)
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {options['baseline']}"))
+            return
+
+        baseline_path = Path(options['baseline'])
+        if not baseline_path.exists():
+            self.stdout.write(self.style.WARNING(f'No baseline at {baseline_path}; use --save-baseline to create it'))
+            return
+
+        baseline = json.loads(baseline_path.read_text())['endpoints']
+        regressions = self.compare(results, skipped, baseline, options)
+        if regressions:
+            for line in regressions:
+                self.stdout.write(self.style.ERROR(line))
+            raise CommandError(f'{len(regressions)} regressions over the baseline')
+        self.stdout.write(self.style.SUCCESS('No regressions over the baseline'))
+
+    def endpoints(self):
+        """Yield (name, url) for every GET route of the app routers."""
+        for module_name in ROUTER_MODULES:
+            router = import_module(module_name).router
+            params = {
+                **self.sample_params({**SAMPLE_PARAMS, **MODULE_SAMPLE_PARAMS.get(module_name, {})}),
+                **MODULE_STATIC_PARAMS.get(module_name, {}),
+            }
+            query = '&'.join(f'{key}={value}' for key, value in params.items())
+            for prefix, viewset, basename in router.registry:
+                pk = self.sample_pk(viewset)
+                yield f'{basename}-list', reverse(f'{basename}-list')
+                if pk is not None:
+                    yield f'{basename}-detail', reverse(f'{basename}-detail', args=[pk])
+
+                for extra in viewset.get_extra_actions():
+                    if 'get' not in extra.mapping:
+                        continue
+                    if extra.detail and pk is None:
+                        continue
+                    try:
+                        url = reverse(f'{basename}-{extra.url_name}', args=[pk] if extra.detail else [])
+                    except NoReverseMatch:
+                        continue
+                    yield f'{basename}-{extra.url_name}', f'{url}?{query}'
+
+    def sample_params(self, labels):
+        params = {}
+        for name, label in labels.items():
+            label, field = label if isinstance(label, tuple) else (label, 'pk')
+            value = apps.get_model(label).objects.order_by('pk').values_list(field, flat=True).first()
+            if value is not None:
+                params[name] = value
+        return params
+
+    def sample_pk(self, viewset):
+        queryset = getattr(viewset, 'queryset', None)
+        if queryset is None:
+            try:
+                # The detail routes only find the rows of get_queryset(), e.g. active processes
+                queryset = viewset(action='retrieve', request=None, args=(), kwargs={}).get_queryset()
+            except (AttributeError, TypeError):
+                queryset = None
+        if queryset is None:
+            serializer_class = getattr(viewset, 'serializer_class', None)
+            model = getattr(getattr(serializer_class, 'Meta', None), 'model', None)
+            if model is None:
+                return None
+            queryset = model._default_manager.all()
+        return queryset.order_by('pk').values_list('pk', flat=True).first()
+
+    def measure(self, client, url, warmup, iterations):
+        """Request a URL repeatedly and return its latency and SQL statistics."""
+        for _ in range(warmup):
+            self.request(client, url)
+
+        latencies, sql_times = [], []
+        queries = status = 0
+        for _ in range(iterations):
+            # Counted on every alias, so replica reads are included; unlike
+            # connection.queries_log, an execute wrapper has no size cap
+            profile = QueryProfile(stack_ms=math.inf, max_stacks=0)
+            with ExitStack() as stack:
+                for alias_connection in connections.all():
+                    stack.enter_context(alias_connection.execute_wrapper(profile))
+                started = time.perf_counter()
+                status = self.request(client, url)
+                latencies.append((time.perf_counter() - started) * 1000)
+            queries = profile.count
+            sql_times.append(profile.total_ms)
+
+        return {
+            'url': url,
+            'status': status,
+            'p50_ms': round(percentile(latencies, 0.50), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'queries': queries,
+            'sql_ms': round(percentile(sql_times, 0.50), 2),
+        }
+
+    def request(self, client, url):
+        response = client.get(url)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        else:
+            response.content
+        return response.status_code
+
+    def compare(self, results, skipped, baseline, options):
+        """Return a description of every regression over the baseline."""
+        regressions = []
+        factor = 1 + options['threshold']
+        for name, failure in skipped.items():
+            previous = baseline.get(name)
+            if previous is not None and previous['status'] < 400:
+                regressions.append(f"{name}: HTTP {failure['status']} (baseline {previous['status']})")
+
+        for name, result in results.items():
+            previous = baseline.get(name)
+            if previous is None or previous['status'] >= 400:
+                continue
+
+            if result['queries'] > previous['queries'] + options['query_threshold']:
+                regressions.append(f"{name}: {result['queries']} queries (baseline {previous['queries']})")
+            if result['p95_ms'] >= options['min_ms'] and result['p95_ms'] > previous['p95_ms'] * factor:
+                regressions.append(f"{name}: p95 {result['p95_ms']} ms (baseline {previous['p95_ms']} ms)")
+            if result['sql_ms'] >= options['min_ms'] and result['sql_ms'] > previous['sql_ms'] * factor:
+                regressions.append(f"{name}: SQL {result['sql_ms']} ms (baseline {previous['sql_ms']} ms)")
+        return regressions
+
+    def write_json(self, path, data):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data, indent=2, ensure_ascii=False))
@@ -0,0 +1,97 @@
+"""
+Management command to check the read-replica routing.
+
+Counts the queries each alias receives for a few scenarios and fails if a
+read goes to the wrong database: ``@use_replica`` repository methods and
+viewset actions read from the replica, undecorated code, transactions and
+users who have just written read from the primary.
+
+It needs a ``replica`` alias. Locally, point ``DATABASE_REPLICA_URL`` at the
+primary database itself: the replica is then a second connection to the
+same data, which is enough to see where each query goes. Nothing is
+written except a no-op UPDATE of one user and a short-lived cache pin.
+"""
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.core.db import REPLICA_ALIAS, ReplicaRoutingMiddleware, _pin_key, has_replica
+from apps.core.models import User
+from apps.core.permissions import MODULE_ROLES
+from apps.payroll.views import ContractViewSet
+from apps.training.repositories import TrainingAttendanceRepository, TrainingProgramRepository
+
+
+class Command(BaseCommand):
+    help = 'Check that reads are routed to the replica or the primary as expected'
+
+    def handle(self, *args, **options):
+        if not has_replica():
+            raise CommandError('No replica configured; set DATABASE_REPLICA_URL (it may point to the primary)')
+        # The requests go to a payroll viewset, which checks module access
+        user = User.objects.filter(is_active=True, role__in=MODULE_ROLES['payroll']).order_by('pk').first()
+        if user is None:
+            raise CommandError('At least one active user with access to the payroll module is required')
+
+        factory = APIRequestFactory()
+        debug_info = ReplicaRoutingMiddleware(ContractViewSet.as_view({'get': 'debug_info'}))
+
+        def get_debug_info():
+            request = factory.get('/api/payroll/contracts/debug_info/')
+            force_authenticate(request, user=user)
+            response = debug_info(request)
+            if response.status_code != 200:
+                raise CommandError(f'debug_info returned {response.status_code}')
+
+        def write_request():
+            def view(request):
+                User.objects.filter(pk=user.pk).update(last_login=F('last_login'))
+            request = factory.post('/')
+            request.user = user
+            ReplicaRoutingMiddleware(view)(request)
+
+        def in_transaction():
+            with transaction.atomic():
+                TrainingAttendanceRepository.get_attendance_stats(0)
+
+        cache.delete(_pin_key(user.pk))
+        scenarios = [
+            ('@use_replica repository method', lambda: TrainingProgramRepository.get_program_metrics(0),
+             REPLICA_ALIAS),
+            ('undecorated repository method', lambda: list(TrainingProgramRepository.get_active_programs()),
+             DEFAULT_DB_ALIAS),
+            ('@use_replica inside a transaction', in_transaction, DEFAULT_DB_ALIAS),
+            ('@use_replica viewset action', get_debug_info, REPLICA_ALIAS),
+            ('request that writes', write_request, DEFAULT_DB_ALIAS),
+            ('@use_replica action right after a write', get_debug_info, DEFAULT_DB_ALIAS),
+        ]
+
+        failures = 0
+        try:
+            for label, run, expected in scenarios:
+                failures += not self.check_scenario(label, run, expected)
+            cache.delete(_pin_key(user.pk))
+            failures += not self.check_scenario('@use_replica action once the pin expires', get_debug_info, REPLICA_ALIAS)
+        finally:
+            cache.delete(_pin_key(user.pk))
+
+        if failures:
+            raise CommandError(f'{failures} routing checks failed')
+        self.stdout.write(self.style.SUCCESS('Replica routing OK'))
+
+    def check_scenario(self, label, run, expected):
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as primary, \
+                CaptureQueriesContext(connections[REPLICA_ALIAS]) as replica:
+            run()
+        counts = {DEFAULT_DB_ALIAS: len(primary), REPLICA_ALIAS: len(replica)}
+        other = REPLICA_ALIAS if expected == DEFAULT_DB_ALIAS else DEFAULT_DB_ALIAS
+        ok = counts[expected] > 0 and counts[other] == 0
+        status = 'OK' if ok else 'FAIL'
+        self.stdout.write(
+            f'{status:4} {label}: primary={counts[DEFAULT_DB_ALIAS]} replica={counts[REPLICA_ALIAS]} '
+            f'(expected {expected})'
+        )
+        return ok
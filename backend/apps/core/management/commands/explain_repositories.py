@@ -0,0 +1,144 @@
+"""
+Management command to EXPLAIN the queries of the repository methods.
+
+Runs ``EXPLAIN ANALYZE`` (plain ``EXPLAIN`` on SQLite) for the queryset
+returned by each repository method and reports the tables read with a
+sequential scan. Run it against a seeded database: on small tables the
+planner prefers sequential scans regardless of the available indexes, which
+is what ``--min-rows`` filters out.
+"""
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.affiliation.repositories import EmployeeRepository, AffiliationRepository
+from apps.core.models import SystemActivity
+from apps.payroll.repositories import (
+    ContractRepository, PayrollPeriodRepository, PayrollEntryRepository, PayrollItemRepository
+)
+from apps.performance.repositories import EvaluationRepository, ImprovementPlanRepository
+from apps.selection.models import Candidate
+from apps.selection.repositories import CandidateRepository, SelectionProcessRepository
+from apps.training.repositories import TrainingSessionRepository, TrainingAttendanceRepository
+
+# Model label used to pick a sample id for each placeholder
+SAMPLE_IDS = {
+    'employee': 'affiliation.Employee',
+    'period': 'payroll.PayrollPeriod',
+    'evaluation_period': 'performance.EvaluationPeriod',
+    'process': 'selection.SelectionProcess',
+    'session': 'training.TrainingSession',
+    'user': 'core.User',
+}
+
+# (label, callable receiving the sample ids and returning a queryset)
+REPOSITORY_QUERIES = [
+    ('EmployeeRepository.get_active_employees', lambda ids: EmployeeRepository.get_active_employees()),
+    ('AffiliationRepository.get_by_employee', lambda ids: AffiliationRepository.get_by_employee(ids['employee'])),
+    ('ContractRepository.get_active_contracts', lambda ids: ContractRepository.get_active_contracts()),
+    ('ContractRepository.get_by_employee', lambda ids: ContractRepository.get_by_employee(ids['employee'])),
+    ('PayrollPeriodRepository.get_open_periods', lambda ids: PayrollPeriodRepository.get_open_periods()),
+    ('PayrollEntryRepository.get_by_period', lambda ids: PayrollEntryRepository.get_by_period(ids['period'])),
+    ('PayrollEntryRepository.get_by_employee', lambda ids: PayrollEntryRepository.get_by_employee(ids['employee'])),
+    ('PayrollEntryRepository.get_pending_approval', lambda ids: PayrollEntryRepository.get_pending_approval()),
+    ('PayrollItemRepository.get_by_type', lambda ids: PayrollItemRepository.get_by_type('EARNING')),
+    ('EvaluationRepository.get_by_period', lambda ids: EvaluationRepository.get_by_period(ids['evaluation_period'])),
+    ('EvaluationRepository.get_by_period (status)', lambda ids: EvaluationRepository.get_by_period(
+        ids['evaluation_period']).filter(status='COMPLETED')),
+    ('EvaluationRepository.get_pending_feedback', lambda ids: EvaluationRepository.get_pending_feedback()),
+    ('ImprovementPlanRepository.get_by_employee', lambda ids: ImprovementPlanRepository.get_by_employee(ids['employee'])),
+    ('CandidateRepository.get_active_candidates', lambda ids: CandidateRepository.get_active_candidates()),
+    ('Candidate list by status', lambda ids: Candidate.objects.filter(status='ACTIVE').order_by('-created_at')),
+    ('SelectionProcessRepository.get_candidates_by_process', lambda ids: SelectionProcessRepository.get_candidates_by_process(
+        ids['process'])),
+    ('TrainingSessionRepository.get_upcoming_sessions', lambda ids: TrainingSessionRepository.get_upcoming_sessions()),
+    ('TrainingSessionRepository.get_upcoming_by_employee', lambda ids: TrainingSessionRepository.get_upcoming_by_employee(
+        ids['employee'])),
+    ('TrainingAttendanceRepository.get_by_session', lambda ids: TrainingAttendanceRepository.get_by_session(ids['session'])),
+    ('SystemActivity list by type', lambda ids: SystemActivity.objects.filter(type='payroll')[:50]),
+    ('SystemActivity recent', lambda ids: SystemActivity.objects.all()[:50]),
+]
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN ANALYZE for each repository method and report sequential scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=1000,
+            help='Ignore sequential scans on tables with fewer rows (default: 1000)'
+        )
+        parser.add_argument(
+            '--plans',
+            action='store_true',
+            help='Print the full plan of every query'
+        )
+        parser.add_argument(
+            '--fail-on-seq-scan',
+            action='store_true',
+            help='Exit with an error if any reported sequential scan is found'
+        )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in ('postgresql', 'sqlite'):
+            raise CommandError(f'Unsupported database backend: {vendor}')
+
+        ids = {
+            name: apps.get_model(label).objects.order_by('pk').values_list('pk', flat=True).first() or 0
+            for name, label in SAMPLE_IDS.items()
+        }
+        table_rows = self.table_rows()
+        flagged = []
+
+        for label, build in REPOSITORY_QUERIES:
+            queryset = build(ids)
+            started = time.perf_counter()
+            plan = queryset.explain(analyze=True) if vendor == 'postgresql' else queryset.explain()
+            elapsed = (time.perf_counter() - started) * 1000
+
+            scans = [
+                table for table in self.sequential_scans(plan, vendor)
+                if table_rows.get(table, 0) >= options['min_rows']
+            ]
+            if scans:
+                flagged.append(label)
+                details = ', '.join(f"{table} ({table_rows[table]} rows)" for table in scans)
+                self.stdout.write(self.style.WARNING(f"{label}: {elapsed:.1f} ms, sequential scan on {details}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{label}: {elapsed:.1f} ms, no sequential scans"))
+
+            if options['plans']:
+                for line in plan.splitlines():
+                    self.stdout.write(f"    {line}")
+
+        self.stdout.write(f"{len(flagged)} of {len(REPOSITORY_QUERIES)} queries with sequential scans")
+        if flagged and options['fail_on_seq_scan']:
+            raise CommandError(f"Sequential scans found in: {', '.join(flagged)}")
+
+    def table_rows(self):
+        """Return the row count of every model table."""
+        return {
+            model._meta.db_table: model._default_manager.count()
+            for model in apps.get_models()
+            if model._meta.managed and not model._meta.proxy
+        }
+
+    def sequential_scans(self, plan, vendor):
+        """Return the tables read with a sequential scan in a plan."""
+        tables = []
+        for line in plan.splitlines():
+            if vendor == 'postgresql':
+                marker = 'Seq Scan on '
+                if marker in line:
+                    tables.append(line.split(marker, 1)[1].split()[0])
+            else:
+                # SQLite reports "SCAN <table>" for full scans and "SCAN <table> USING ..." for index scans
+                words = line.split()
+                if 'SCAN' in words and 'USING' not in words:
+                    tables.append(words[words.index('SCAN') + 1])
+        return tables
@@ -0,0 +1,423 @@
+"""
+Management command to generate production-size synthetic data for load testing.
+
+Creates users, candidates with selection processes, employees with contracts,
+affiliations, years of monthly payroll (through PayrollRunEngine), performance
+evaluations and training sessions with attendance. Every table is written with
+``bulk_create`` in chunks and all random choices come from a seeded generator.
+Dates are relative to ``--today`` (default: the current date), so the same
+options, ``--today`` included, always produce the same data. System
+activities are spread over the ``--periods`` months, in their monthly
+partitions when the table is partitioned.
+
+Signals are bypassed by ``bulk_create``; derived values (evaluation scores,
+attendance scores, payroll totals and summaries) are computed while seeding.
+Run it on an empty database, e.g. after ``manage.py flush``.
+"""
+import random
+import time
+from datetime import date, datetime, time as dtime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from apps.affiliation.models import Employee, AffiliationType, Provider, Affiliation
+from apps.core.cache import invalidate_catalog
+from apps.core.models import User, SystemActivity, ACTIVITY_TYPES
+from apps.core.partitions import (
+    add_months, create_month_partition, is_partitioned, list_month_partitions, month_start
+)
+from apps.payroll.management.commands.create_payroll_data import Command as PayrollDataCommand
+from apps.payroll.models import Contract, PayrollPeriod
+from apps.payroll.services import PayrollRunEngine
+from apps.payroll.simulation import CONTRACT_BASE
+from apps.payroll.snapshots import PeriodSnapshotService
+from apps.performance.models import (
+    EvaluationType, EvaluationCriteria, EvaluationPeriod, Evaluation, EvaluationDetail
+)
+from apps.selection.models import SelectionStage, Candidate, SelectionProcess, ProcessCandidate
+from apps.training.models import (
+    TrainingType, TrainingProgram, TrainingSession, TrainingAttendance, TrainingEvaluation
+)
+
+# Prefix of the generated identifiers, used to detect a previous run
+PREFIX = 'SC'
+
+FIRST_NAMES = [
+    'Juan', 'María', 'Carlos', 'Ana', 'Luis', 'Carmen', 'Diego', 'Laura', 'Andrés', 'Paula',
+    'Jorge', 'Camila', 'Felipe', 'Valentina', 'Santiago', 'Daniela', 'Mateo', 'Sofía', 'Julián', 'Natalia',
+]
+LAST_NAMES = [
+    'Pérez', 'García', 'Rodríguez', 'Martínez', 'López', 'Sánchez', 'Hernández', 'González', 'Ramírez', 'Torres',
+    'Díaz', 'Moreno', 'Vargas', 'Rojas', 'Castro', 'Ortiz', 'Gómez', 'Jiménez', 'Muñoz', 'Suárez',
+]
+DEPARTMENTS = {
+    'Desarrollo': ['Desarrollador', 'Arquitecto de Software', 'QA'],
+    'Marketing': ['Analista de Mercadeo', 'Diseñador', 'Community Manager'],
+    'Ventas': ['Asesor Comercial', 'Ejecutivo de Cuenta'],
+    'RRHH': ['Analista de Nómina', 'Reclutador'],
+    'Administración': ['Asistente Administrativo', 'Contador'],
+    'Operaciones': ['Operario', 'Coordinador de Logística', 'Supervisor de Planta'],
+}
+CITIES = ['Bogotá', 'Medellín', 'Cali', 'Barranquilla', 'Bucaramanga', 'Pereira']
+SELECTION_STAGES = ['Postulación', 'Entrevista inicial', 'Prueba técnica', 'Entrevista final', 'Oferta']
+AFFILIATION_TYPES = {
+    'EPS': ['Sura EPS', 'Sanitas', 'Compensar EPS'],
+    'AFP': ['Porvenir', 'Protección', 'Colfondos'],
+    'ARL': ['ARL Sura', 'Positiva'],
+    'CCF': ['Compensar', 'Cafam', 'Colsubsidio'],
+}
+EVALUATION_CRITERIA = [
+    ('Calidad del trabajo', 30), ('Productividad', 25), ('Trabajo en equipo', 20),
+    ('Comunicación', 15), ('Iniciativa', 10),
+]
+TRAINING_TYPES = ['Técnica', 'Habilidades blandas', 'Seguridad y salud', 'Inducción']
+
+
+class Command(BaseCommand):
+    help = 'Generate large-scale deterministic synthetic data across all apps for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=100000, help='Employees with contracts (default: 100000)')
+        parser.add_argument('--candidates', type=int, help='Candidates in selection (default: employees / 2)')
+        parser.add_argument('--periods', type=int, default=36, help='Monthly payroll periods (default: 36)')
+        parser.add_argument('--users', type=int, default=200, help='Staff users: evaluators, instructors (default: 200)')
+        parser.add_argument('--activities', type=int, help='System activity rows (default: employees * 2)')
+        parser.add_argument('--sessions', type=int, help='Training sessions (default: employees / 20)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+        parser.add_argument('--today', type=date.fromisoformat,
+                            help='Reference date YYYY-MM-DD of the generated dates (default: the current date)')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per bulk INSERT (default: 5000)')
+
+    def handle(self, *args, **options):
+        if Employee.objects.filter(employee_id__startswith=PREFIX).exists():
+            raise CommandError('Scale data already present; run it on an empty database (manage.py flush)')
+        if not connection.features.can_return_rows_from_bulk_insert:
+            raise CommandError(f'{connection.vendor} does not return ids from bulk inserts')
+
+        self.rng = random.Random(options['seed'])
+        self.chunk_size = options['chunk_size']
+        employees = options['employees']
+        self.today = options['today'] or timezone.localdate()
+        # Noon of the reference date stands for "now" in generated timestamps
+        self.now = timezone.make_aware(datetime.combine(self.today, dtime(12)))
+
+        started = time.perf_counter()
+        self.step('users', self.seed_users, options['users'])
+        self.step('selection', self.seed_selection, options['candidates'] or employees // 2)
+        self.step('employees and contracts', self.seed_employees, employees)
+        self.step('affiliations', self.seed_affiliations)
+        self.step('payroll', self.seed_payroll, options['periods'])
+        self.step('performance', self.seed_performance, max(1, (options['periods'] + 11) // 12))
+        self.step('training', self.seed_training, options['sessions'] or max(1, employees // 20), options['periods'])
+        self.step('activities', self.seed_activities, options['activities'] or employees * 2, options['periods'])
+
+        self.stdout.write(self.style.SUCCESS(f'Scale data generated in {time.perf_counter() - started:.1f}s'))
+
+    def step(self, name, seed, *args):
+        started = time.perf_counter()
+        counts = seed(*args)
+        summary = ', '.join(f'{count} {label}' for label, count in counts.items())
+        self.stdout.write(f'{name}: {summary} ({time.perf_counter() - started:.1f}s)')
+
+    def bulk(self, model, objects):
+        """Insert objects from an iterable in chunks and return the saved instances."""
+        saved, batch = [], []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.chunk_size:
+                saved.extend(model.objects.bulk_create(batch))
+                batch = []
+        if batch:
+            saved.extend(model.objects.bulk_create(batch))
+        return saved
+
+    def bulk_count(self, model, objects):
+        """Insert objects from an iterable in chunks and return how many were inserted."""
+        count, batch = 0, []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.chunk_size:
+                model.objects.bulk_create(batch)
+                count, batch = count + len(batch), []
+        if batch:
+            model.objects.bulk_create(batch)
+            count += len(batch)
+        return count
+
+    def person(self):
+        return self.rng.choice(FIRST_NAMES), f"{self.rng.choice(LAST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def seed_users(self, count):
+        password = make_password('scale123')
+        roles = ['HR_MANAGER', 'SUPERVISOR', 'SUPERVISOR', 'EMPLOYEE']
+
+        def build():
+            for n in range(count):
+                first_name, last_name = self.person()
+                yield User(
+                    email=f'scale.user{n}@rhplus.test', username=f'scale.user{n}', password=password,
+                    first_name=first_name, last_name=last_name, role=self.rng.choice(roles),
+                    department=self.rng.choice(list(DEPARTMENTS)), is_staff=True,
+                )
+
+        self.users = self.bulk(User, build())
+        self.admin = User.objects.filter(is_superuser=True).order_by('id').first() or self.users[0]
+        return {'users': len(self.users)}
+
+    def seed_selection(self, count):
+        stages = [
+            SelectionStage.objects.get_or_create(name=name, defaults={'order': order})[0]
+            for order, name in enumerate(SELECTION_STAGES, start=1)
+        ]
+        statuses = ['ACTIVE'] * 6 + ['REJECTED'] * 3 + ['WITHDRAWN', 'HIRED']
+
+        def build_candidates():
+            for n in range(count):
+                first_name, last_name = self.person()
+                yield Candidate(
+                    first_name=first_name, last_name=last_name, document_type='CC',
+                    document_number=f'{PREFIX}{n:09d}', email=f'candidato{n}@mail.test',
+                    phone=f'31{self.rng.randint(0, 99999999):08d}', gender=self.rng.choice('MFO'),
+                    birth_date=date(1970, 1, 1) + timedelta(days=self.rng.randint(0, 365 * 35)),
+                    address=f'Calle {self.rng.randint(1, 200)} # {self.rng.randint(1, 99)}, {self.rng.choice(CITIES)}',
+                    status=self.rng.choice(statuses), current_stage=self.rng.choice(stages),
+                )
+
+        candidates = self.bulk(Candidate, build_candidates())
+        processes = self.bulk(SelectionProcess, (
+            SelectionProcess(
+                name=f'Convocatoria {self.rng.choice(list(DEPARTMENTS))} {n + 1}',
+                start_date=self.today - timedelta(days=self.rng.randint(0, 720)),
+                is_active=self.rng.random() < 0.3, created_by=self.rng.choice(self.users),
+            )
+            for n in range(max(1, count // 100))
+        ))
+        links = self.bulk_count(ProcessCandidate, (
+            ProcessCandidate(process=self.rng.choice(processes), candidate=candidate, current_stage=candidate.current_stage)
+            for candidate in candidates
+        ))
+        return {'candidates': len(candidates), 'processes': len(processes), 'process candidates': links}
+
+    def seed_employees(self, count):
+        statuses = ['ACTIVE'] * 17 + ['ON_LEAVE', 'INACTIVE', 'TERMINATED']
+        contract_types = ['INDEFINITE'] * 6 + ['FIXED_TERM'] * 2 + ['TEMPORARY', 'INTERNSHIP']
+
+        def build_employees():
+            for n in range(count):
+                first_name, last_name = self.person()
+                department = self.rng.choice(list(DEPARTMENTS))
+                yield Employee(
+                    employee_id=f'{PREFIX}{n:07d}', first_name=first_name, last_name=last_name,
+                    document_type='CC', document_number=f'{PREFIX}E{n:08d}',
+                    email=f'empleado{n}@rhplus.test', phone=f'30{self.rng.randint(0, 99999999):08d}',
+                    address=f'Carrera {self.rng.randint(1, 150)} # {self.rng.randint(1, 99)}, {self.rng.choice(CITIES)}',
+                    status=self.rng.choice(statuses), position=self.rng.choice(DEPARTMENTS[department]),
+                    department=department, hire_date=self.today - timedelta(days=self.rng.randint(30, 365 * 15)),
+                )
+
+        self.employees = self.bulk(Employee, build_employees())
+        contracts = self.bulk_count(Contract, (
+            Contract(
+                employee=employee, contract_type=self.rng.choice(contract_types), start_date=employee.hire_date,
+                salary=Decimal(self.rng.randrange(1300000, 12000000, 1000)), position=employee.position,
+                department=employee.department, is_active=employee.status != 'TERMINATED', created_by=self.admin,
+            )
+            for employee in self.employees
+        ))
+        # bulk_create sends no signals
+        invalidate_catalog(CONTRACT_BASE)
+        return {'employees': len(self.employees), 'contracts': contracts}
+
+    def seed_affiliations(self):
+        providers = []
+        for type_name, provider_names in AFFILIATION_TYPES.items():
+            affiliation_type, _ = AffiliationType.objects.get_or_create(name=type_name)
+            for name in provider_names:
+                providers.append(Provider.objects.get_or_create(name=name, affiliation_type=affiliation_type)[0])
+
+        by_type = {}
+        for provider in providers:
+            by_type.setdefault(provider.affiliation_type_id, []).append(provider)
+
+        # Affiliations reference core users, so they are generated for the staff users
+        count = self.bulk_count(Affiliation, (
+            Affiliation(
+                employee=user, provider=self.rng.choice(options), affiliation_number=f'{PREFIX}{user.pk}-{type_id}',
+                start_date=self.today - timedelta(days=self.rng.randint(30, 3650)), created_by=self.admin,
+            )
+            for user in self.users
+            for type_id, options in by_type.items()
+        ))
+        return {'providers': len(providers), 'affiliations': count}
+
+    def seed_payroll(self, months):
+        PayrollDataCommand(stdout=self.stdout).create_payroll_items()
+
+        first_month = self.today.replace(day=1)
+        periods = []
+        for offset in range(months - 1, -1, -1):
+            year, month = divmod(first_month.year * 12 + first_month.month - 1 - offset, 12)
+            start = date(year, month + 1, 1)
+            end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+            periods.append(PayrollPeriod(name=f'Nómina {start:%m/%Y}', start_date=start, end_date=end))
+        periods = self.bulk(PayrollPeriod, periods)
+
+        entries = details = 0
+        for period in periods:
+            report = PayrollRunEngine(period, user=self.admin, chunk_size=self.chunk_size).run()
+            entries += report['entries_created']
+            details += report['details_created']
+
+        # Every period but the current one is closed, with its snapshot
+        for period in periods[:-1]:
+            PeriodSnapshotService.close_period(period, self.admin)
+        return {'periods': len(periods), 'entries': entries, 'details': details}
+
+    def seed_performance(self, years):
+        evaluation_type, _ = EvaluationType.objects.get_or_create(
+            name='Evaluación anual de desempeño', defaults={'frequency': 'Annual'}
+        )
+        criteria = [
+            EvaluationCriteria.objects.get_or_create(
+                name=name, evaluation_type=evaluation_type,
+                defaults={'description': name, 'weight': Decimal(weight)}
+            )[0]
+            for name, weight in EVALUATION_CRITERIA
+        ]
+        total_weight = sum(criterion.weight for criterion in criteria)
+        periods = self.bulk(EvaluationPeriod, (
+            EvaluationPeriod(
+                name=f'Evaluación {self.today.year - offset}', evaluation_type=evaluation_type,
+                start_date=date(self.today.year - offset, 1, 1), end_date=date(self.today.year - offset, 12, 31),
+                is_active=offset == 0, created_by=self.admin,
+            )
+            for offset in range(years - 1, -1, -1)
+        ))
+        evaluators = [user for user in self.users if user.role in ('SUPERVISOR', 'HR_MANAGER')] or self.users
+
+        evaluation_count = detail_count = 0
+        for period in periods:
+            current = period.is_active
+            for start in range(0, len(self.employees), self.chunk_size):
+                evaluations, scores = [], []
+                for employee in self.employees[start:start + self.chunk_size]:
+                    values = [Decimal(self.rng.randint(20, 50)) / 10 for _ in criteria]
+                    status = self.rng.choice(['DRAFT', 'IN_PROGRESS', 'WAITING_FEEDBACK', 'COMPLETED']) if current else 'COMPLETED'
+                    overall = sum(value * criterion.weight for value, criterion in zip(values, criteria)) / total_weight
+                    evaluations.append(Evaluation(
+                        employee=employee, evaluator=self.rng.choice(evaluators), evaluation_period=period,
+                        status=status, overall_score=overall.quantize(Decimal('0.01')),
+                        completed_at=self.now if status == 'COMPLETED' else None,
+                    ))
+                    scores.append(values)
+
+                evaluations = Evaluation.objects.bulk_create(evaluations)
+                details = [
+                    EvaluationDetail(evaluation=evaluation, criteria=criterion, score=value)
+                    for evaluation, values in zip(evaluations, scores)
+                    for criterion, value in zip(criteria, values)
+                ]
+                EvaluationDetail.objects.bulk_create(details, batch_size=self.chunk_size)
+                evaluation_count += len(evaluations)
+                detail_count += len(details)
+
+        return {'evaluation periods': len(periods), 'evaluations': evaluation_count, 'details': detail_count}
+
+    def seed_training(self, session_count, months):
+        types = [TrainingType.objects.get_or_create(name=name)[0] for name in TRAINING_TYPES]
+        programs = self.bulk(TrainingProgram, (
+            TrainingProgram(
+                name=f'Programa {n + 1}: {self.rng.choice(TRAINING_TYPES)}', description='Programa de formación',
+                training_type=self.rng.choice(types), duration_hours=Decimal(self.rng.choice([4, 8, 16, 24, 40])),
+                objectives='Fortalecer competencias', created_by=self.admin,
+            )
+            for n in range(max(1, session_count // 50))
+        ))
+
+        span = months * 30
+        instructors = self.users
+
+        def build_sessions():
+            for _ in range(session_count):
+                session_date = self.today + timedelta(days=self.rng.randint(-span, 60))
+                start_hour = self.rng.randint(7, 16)
+                if session_date >= self.today:
+                    status = 'SCHEDULED'
+                else:
+                    status = self.rng.choice(['COMPLETED'] * 9 + ['CANCELLED'])
+                yield TrainingSession(
+                    program=self.rng.choice(programs), session_date=session_date, start_time=dtime(start_hour),
+                    end_time=dtime(start_hour + 2), location=f'Sala {self.rng.randint(1, 12)}',
+                    instructor=self.rng.choice(instructors), max_participants=self.rng.choice([15, 20, 25, 30]),
+                    status=status, created_by=self.admin,
+                )
+
+        sessions = self.bulk(TrainingSession, build_sessions())
+
+        attendance_count = evaluation_count = 0
+        for start in range(0, len(sessions), max(1, self.chunk_size // 20)):
+            attendances, ratings = [], []
+            for session in sessions[start:start + max(1, self.chunk_size // 20)]:
+                size = min(len(self.employees), self.rng.randint(session.max_participants // 2, session.max_participants))
+                for employee in self.rng.sample(self.employees, size):
+                    rating = None
+                    if session.status == 'SCHEDULED':
+                        status = 'REGISTERED'
+                    elif session.status == 'CANCELLED':
+                        status = 'EXCUSED'
+                    else:
+                        status = 'ATTENDED' if self.rng.random() < 0.85 else 'MISSED'
+                    if status == 'ATTENDED' and self.rng.random() < 0.7:
+                        rating = [self.rng.randint(2, 5) for _ in range(5)]
+                    attendances.append(TrainingAttendance(
+                        session=session, employee=employee, status=status, registered_by=self.admin,
+                        evaluation_score=Decimal(sum(rating)) / 5 if rating else None,
+                    ))
+                    ratings.append(rating)
+
+            attendances = TrainingAttendance.objects.bulk_create(attendances)
+            evaluations = [
+                TrainingEvaluation(
+                    attendance=attendance, content_rating=rating[0], instructor_rating=rating[1],
+                    materials_rating=rating[2], usefulness_rating=rating[3], overall_rating=rating[4],
+                )
+                for attendance, rating in zip(attendances, ratings) if rating
+            ]
+            TrainingEvaluation.objects.bulk_create(evaluations, batch_size=self.chunk_size)
+            attendance_count += len(attendances)
+            evaluation_count += len(evaluations)
+
+        return {
+            'programs': len(programs), 'sessions': len(sessions),
+            'attendances': attendance_count, 'evaluations': evaluation_count,
+        }
+
+    def seed_activities(self, count, months):
+        first_month = add_months(month_start(self.now), 1 - months)
+        table = SystemActivity._meta.db_table
+        created_partitions = 0
+        if is_partitioned(table):
+            existing = list_month_partitions(table)
+            for offset in range(months):
+                month = add_months(first_month, offset)
+                if month not in existing:
+                    create_month_partition(table, month)
+                    created_partitions += 1
+
+        # Sorted, so ids grow with time as in a live table
+        span = int((self.now - first_month).total_seconds())
+        offsets = sorted(self.rng.randrange(span) for _ in range(count))
+        types = [value for value, _ in ACTIVITY_TYPES]
+        inserted = self.bulk_count(SystemActivity, (
+            SystemActivity(
+                title='Actividad generada', description=f'Registro sintético {n}',
+                type=self.rng.choice(types), created_by=self.rng.choice(self.users),
+                timestamp=first_month + timedelta(seconds=offset),
+            )
+            for n, offset in enumerate(offsets)
+        ))
+        return {'activities': inserted, 'partitions created': created_partitions}
@@ -0,0 +1,157 @@
+"""
+Request-scoped SQL profiling.
+
+``SQLProfilingMiddleware`` is enabled with ``SQL_PROFILING = True``. It wraps
+every database connection with ``execute_wrapper`` for the duration of the
+request and collects the query count, total database time, duplicated query
+fingerprints and the slowest statements. The numbers are returned in a
+``Server-Timing`` header, logged as one ``key=value`` line on the
+``apps.core.sql`` logger. Requests slower than ``SQL_PROFILING_SLOW_REQUEST_MS``
+or running more than ``SQL_PROFILING_MAX_QUERIES`` queries are written to the
+``apps.core.slow_requests`` logger with the view name, the stack of their
+slowest query and the stack that issued each duplicated statement, captured
+when it ran a second time, so N+1 patterns point to the code looping.
+"""
+
+import logging
+import os
+import re
+import time
+import traceback
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('apps.core.sql')
+slow_logger = logging.getLogger('apps.core.slow_requests')
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_NUMBER = re.compile(r'\b\d+\b')
+
+
+def fingerprint(sql):
+    """Return the statement with literal values and IN list sizes folded."""
+    return _NUMBER.sub('N', _IN_LIST.sub('IN (...)', sql))
+
+
+def query_stack(limit=15):
+    """Return the innermost frames that issued the current query.
+
+    Frames of the ORM internals and of this module are left out, so the
+    stack ends at the view, serializer or repository code that ran it.
+    """
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if frame.filename != __file__ and f'django{os.sep}db{os.sep}' not in frame.filename
+    ]
+    return ''.join(traceback.format_list(frames[-limit:]))
+
+
+class QueryProfile:
+    """Execute wrapper collecting the statistics of the queries of one request."""
+
+    def __init__(self, top=5, stack_ms=100, max_stacks=20):
+        self.top = top
+        self.stack_ms = stack_ms
+        self.max_stacks = max_stacks
+        self.count = 0
+        self.total_ms = 0.0
+        self.fingerprints = {}
+        self.duplicate_stacks = {}
+        self.slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            self.record(sql, duration, context['connection'].alias)
+
+    def record(self, sql, duration, alias):
+        self.count += 1
+        self.total_ms += duration
+        key = fingerprint(sql)
+        count = self.fingerprints[key] = self.fingerprints.get(key, 0) + 1
+        # The first repetition tells where a statement is run in a loop
+        if count == 2 and len(self.duplicate_stacks) < self.max_stacks:
+            self.duplicate_stacks[key] = query_stack()
+
+        if len(self.slowest) < self.top or duration > self.slowest[-1]['ms']:
+            self.slowest.append({
+                'ms': round(duration, 2),
+                'alias': alias,
+                'sql': sql,
+                # Stacks are only captured for queries worth investigating
+                'stack': query_stack() if duration >= self.stack_ms else '',
+            })
+            self.slowest.sort(key=lambda query: query['ms'], reverse=True)
+            del self.slowest[self.top:]
+
+    @property
+    def duplicates(self):
+        """Return {fingerprint: count} of the statements executed more than once."""
+        return {key: count for key, count in self.fingerprints.items() if count > 1}
+
+
+class SQLProfilingMiddleware:
+    """Collect per-request SQL statistics; see the module docstring."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SQL_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_request_ms = getattr(settings, 'SQL_PROFILING_SLOW_REQUEST_MS', 500)
+        self.slow_query_ms = getattr(settings, 'SQL_PROFILING_SLOW_QUERY_MS', 100)
+        self.max_queries = getattr(settings, 'SQL_PROFILING_MAX_QUERIES', 50)
+        self.top = getattr(settings, 'SQL_PROFILING_TOP_QUERIES', 5)
+
+    def __call__(self, request):
+        profile = QueryProfile(top=self.top, stack_ms=self.slow_query_ms)
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - started) * 1000
+
+        duplicates = profile.duplicates
+        duplicated_queries = sum(duplicates.values()) - len(duplicates)
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={profile.total_ms:.1f};desc="{profile.count} queries"',
+            f'dup;desc="{duplicated_queries} duplicated"',
+            f'app;dur={total_ms - profile.total_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = (match.view_name or match._func_path) if match else '-'
+        logger.info(
+            f"method={request.method} path={request.path} view={view_name} "
+            f"status={response.status_code} queries={profile.count} db_ms={profile.total_ms:.1f} "
+            f"duplicated={duplicated_queries} total_ms={total_ms:.1f}"
+        )
+
+        if total_ms >= self.slow_request_ms or profile.count > self.max_queries:
+            self.log_slow_request(request, response, view_name, profile, total_ms, duplicates)
+        return response
+
+    def log_slow_request(self, request, response, view_name, profile, total_ms, duplicates):
+        kind = 'Slow request' if total_ms >= self.slow_request_ms else 'Too many queries in request'
+        lines = [
+            f"{kind} {request.method} {request.get_full_path()} view={view_name} "
+            f"status={response.status_code} total_ms={total_ms:.1f} "
+            f"queries={profile.count} db_ms={profile.total_ms:.1f}"
+        ]
+        for key, count in sorted(duplicates.items(), key=lambda item: item[1], reverse=True)[:self.top]:
+            lines.append(f"  duplicated x{count}: {key}")
+            if profile.duplicate_stacks.get(key):
+                lines.append(profile.duplicate_stacks[key].rstrip())
+        for query in profile.slowest:
+            lines.append(f"  {query['ms']} ms [{query['alias']}]: {query['sql']}")
+        if profile.slowest and profile.slowest[0]['stack']:
+            lines.append('  stack of the slowest query:')
+            lines.append(profile.slowest[0]['stack'].rstrip())
+        slow_logger.warning('\n'.join(lines))
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.10 on 2026-10-18 11:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_user_department_user_manager_user_role'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='systemactivity',
+            index=models.Index(fields=['type', '-timestamp'], name='activity_type_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='systemactivity',
+            index=models.Index(fields=['-timestamp', '-id'], name='activity_timestamp_idx'),
+        ),
+    ]
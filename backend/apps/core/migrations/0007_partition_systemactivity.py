@@ -0,0 +1,117 @@
+"""
+Partition core_systemactivity by month on PostgreSQL.
+
+The table is rebuilt as a range-partitioned table on ``timestamp`` with one
+partition per month holding data (plus the current and next three months)
+and a default partition. The primary key becomes ``(id, timestamp)``, as
+PostgreSQL requires the partition key in unique constraints; ``id`` stays
+unique through its identity sequence. Indexes and foreign keys are recreated
+with their names, so the ORM sees the same table.
+
+Other databases are left unchanged.
+"""
+
+import datetime
+
+from django.db import migrations
+
+TABLE = 'core_systemactivity'
+MONTHS_AHEAD = 3
+
+
+def _month_start(value):
+    value = value.astimezone(datetime.timezone.utc)
+    return datetime.datetime(value.year, value.month, 1, tzinfo=datetime.timezone.utc)
+
+
+def _add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def _table_definitions(cursor, table):
+    """Return the CREATE INDEX statements and foreign key definitions of a table, primary key excluded."""
+    cursor.execute(
+        'SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s',
+        [table]
+    )
+    indexes = [(name, definition) for name, definition in cursor.fetchall() if name != f'{table}_pkey']
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+        [table]
+    )
+    return indexes, cursor.fetchall()
+
+
+def _rebuild(schema_editor, partitioned):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    qn = schema_editor.connection.ops.quote_name
+    old = f'{TABLE}_old'
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))', [TABLE]
+        )
+        if cursor.fetchone()[0] == partitioned:
+            return
+
+        indexes, foreign_keys = _table_definitions(cursor, TABLE)
+        cursor.execute(f'ALTER TABLE {qn(TABLE)} RENAME TO {qn(old)}')
+
+        if partitioned:
+            cursor.execute(
+                f'CREATE TABLE {qn(TABLE)} (LIKE {qn(old)} INCLUDING DEFAULTS INCLUDING IDENTITY) '
+                f'PARTITION BY RANGE ("timestamp")'
+            )
+            cursor.execute(f'SELECT MIN("timestamp") FROM {qn(old)}')
+            oldest = cursor.fetchone()[0]
+            current = _month_start(datetime.datetime.now(datetime.timezone.utc))
+            month = _month_start(oldest) if oldest else current
+            while month <= _add_months(current, MONTHS_AHEAD):
+                following = _add_months(month, 1)
+                cursor.execute(
+                    f'CREATE TABLE {qn(f"{TABLE}_y{month.year:04d}m{month.month:02d}")} '
+                    f'PARTITION OF {qn(TABLE)} FOR VALUES FROM (%s) TO (%s)',
+                    [month.isoformat(), following.isoformat()]
+                )
+                month = following
+            cursor.execute(f'CREATE TABLE {qn(f"{TABLE}_default")} PARTITION OF {qn(TABLE)} DEFAULT')
+            primary_key = '(id, "timestamp")'
+        else:
+            cursor.execute(f'CREATE TABLE {qn(TABLE)} (LIKE {qn(old)} INCLUDING DEFAULTS INCLUDING IDENTITY)')
+            primary_key = '(id)'
+
+        cursor.execute(f'INSERT INTO {qn(TABLE)} SELECT * FROM {qn(old)}')
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {qn(TABLE)}",
+            [TABLE]
+        )
+        # Dropping the old table frees the index and constraint names
+        cursor.execute(f'DROP TABLE {qn(old)} CASCADE')
+
+        cursor.execute(f'ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(f"{TABLE}_pkey")} PRIMARY KEY {primary_key}')
+        for _, definition in indexes:
+            cursor.execute(definition.replace(' ONLY ', ' '))
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(name)} {definition}')
+
+
+def partition(apps, schema_editor):
+    _rebuild(schema_editor, partitioned=True)
+
+
+def unpartition(apps, schema_editor):
+    _rebuild(schema_editor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, unpartition),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.10 on 2026-10-18 12:03
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_partition_systemactivity'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='systemactivity',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha y hora'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.utils import timezone
 
 # User roles hierarchy
 USER_ROLES = (
@@ -121,62 +122,29 @@ class User(AbstractUser):
 
     def can_manage_user(self, target_user):
         """Check if this user can manage another user based on role hierarchy."""
-        print(f"Checking if {self.email} (role: {self.role}) can manage user with role: {target_user.role}")
-        
-        if self.role == 'SUPERUSER':
-            return True
-        
-        current_level = ROLE_HIERARCHY.get(self.role, 999)
-        target_level = ROLE_HIERARCHY.get(target_user.role, 999)
-        
-        # Users can only manage users with lower hierarchy levels
-        if current_level < target_level:
-            # Additional checks based on role
-            if self.role == 'ADMIN':
-                # Admins cannot create other admins or superusers
-                return target_user.role not in ['ADMIN', 'SUPERUSER']
-            elif self.role == 'HR_MANAGER':
-                # HR can only manage supervisors and employees
-                return target_user.role in ['SUPERVISOR', 'EMPLOYEE', 'USER']
-            elif self.role == 'SUPERVISOR':
-                # Supervisors can only manage employees in their department
-                return (target_user.role in ['EMPLOYEE', 'USER'] and 
-                       target_user.department == self.department)
-        
-        return False
+        # Import here to avoid circular imports
+        from .permissions import can_manage
+        return can_manage(self.role, self.department, target_user.role, target_user.department)
     
     def can_access_module(self, module_name):
         """Check if user can access a specific module."""
-        module_permissions = {
-            'selection': ['SUPERUSER', 'ADMIN', 'HR_MANAGER', 'SUPERVISOR'],
-            'affiliation': ['SUPERUSER', 'ADMIN', 'HR_MANAGER', 'SUPERVISOR', 'EMPLOYEE'],
-            'payroll': ['SUPERUSER', 'ADMIN', 'HR_MANAGER'],
-            'performance': ['SUPERUSER', 'ADMIN', 'HR_MANAGER', 'SUPERVISOR', 'EMPLOYEE'],
-            'training': ['SUPERUSER', 'ADMIN', 'HR_MANAGER', 'SUPERVISOR', 'EMPLOYEE'],
-            'core': ['SUPERUSER', 'ADMIN', 'HR_MANAGER', 'SUPERVISOR'],
-        }
-        
-        result = self.role in module_permissions.get(module_name, [])
-        print(f"User {self.email} (role: {self.role}) can access {module_name}: {result}")
-        return result
+        from .permissions import can_access_module
+        return can_access_module(self.role, module_name)
     
     def get_managed_users(self):
         """Get users that this user can manage."""
-        print(f"Getting managed users for {self.email} (role: {self.role})")
+        from .permissions import DEPARTMENT_SCOPED_ROLES, MANAGEABLE_ROLES
         
         if self.role == 'SUPERUSER':
             return User.objects.all()
-        elif self.role == 'ADMIN':
-            return User.objects.exclude(role__in=['ADMIN', 'SUPERUSER'])
-        elif self.role == 'HR_MANAGER':
-            return User.objects.filter(role__in=['SUPERVISOR', 'EMPLOYEE', 'USER'])
-        elif self.role == 'SUPERVISOR':
-            return User.objects.filter(
-                role__in=['EMPLOYEE', 'USER'],
-                department=self.department
-            )
-        else:
+        
+        roles = MANAGEABLE_ROLES.get(self.role, ())
+        if not roles:
             return User.objects.none()
+        users = User.objects.filter(role__in=roles)
+        if self.role in DEPARTMENT_SCOPED_ROLES:
+            users = users.filter(department=self.department)
+        return users
 
 class Role(models.Model):
     """User roles within the system."""
@@ -211,7 +179,8 @@ class SystemActivity(models.Model):
     title = models.CharField(max_length=200, verbose_name="Título")
     description = models.TextField(verbose_name="Descripción")
     type = models.CharField(max_length=20, choices=ACTIVITY_TYPES, verbose_name="Tipo")
-    timestamp = models.DateTimeField(auto_now_add=True, verbose_name="Fecha y hora")
+    # Set when the activity happens, not when the buffered write is flushed
+    timestamp = models.DateTimeField(default=timezone.now, verbose_name="Fecha y hora")
     created_by = models.ForeignKey(
         User, 
         on_delete=models.SET_NULL, 
@@ -223,6 +192,10 @@ class SystemActivity(models.Model):
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['type', '-timestamp'], name='activity_type_timestamp_idx'),
+            models.Index(fields=['-timestamp', '-id'], name='activity_timestamp_idx'),
+        ]
         verbose_name = "Actividad del sistema"
         verbose_name_plural = "Actividades del sistema"
     
@@ -0,0 +1,60 @@
+"""
+Project-wide pagination for list endpoints.
+
+Pagination is opt-in per request so existing clients that expect a plain JSON
+list keep working: a list is only paginated when the request carries one of
+the pagination query parameters.
+
+- ``PageNumberListPagination`` (default): ``?page=2&page_size=50``, for small
+  catalogs where page counts are useful.
+- ``CursorListPagination``: ``?cursor=...&page_size=50``, for large tables.
+  Pages are read with an indexed range condition instead of OFFSET, so deep
+  pages cost the same as the first one. The ordering is taken from the
+  view's ``cursor_ordering`` and must start with a stable, indexed field.
+
+Use ``?page_size=N`` alone to request the first page of either style.
+"""
+
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class OptInPaginationMixin:
+    """Only paginate requests that ask for it through the query parameters."""
+
+    trigger_params = ()
+
+    def is_requested(self, request):
+        return any(param in request.query_params for param in self.trigger_params)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class PageNumberListPagination(OptInPaginationMixin, PageNumberPagination):
+    """Page-number pagination for catalogs and small tables."""
+
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    trigger_params = ('page', 'page_size')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Pages of an unordered queryset may overlap
+        if not getattr(queryset, 'ordered', True):
+            queryset = queryset.order_by('pk')
+        return super().paginate_queryset(queryset, request, view)
+
+
+class CursorListPagination(OptInPaginationMixin, CursorPagination):
+    """Cursor pagination on ``view.cursor_ordering`` for large tables."""
+
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-id',)
+    trigger_params = ('cursor', 'page_size')
+
+    def get_ordering(self, request, queryset, view):
+        return getattr(view, 'cursor_ordering', self.ordering)
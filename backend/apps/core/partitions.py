@@ -0,0 +1,99 @@
+"""
+Monthly range partitions for append-only tables (PostgreSQL).
+
+``core_systemactivity`` is partitioned by month on ``timestamp`` by the
+``0007_partition_systemactivity`` migration. Partitions are named
+``<table>_yYYYYmMM`` and cover ``[month start, next month start)`` in UTC;
+a ``<table>_default`` partition catches rows outside the created months so
+inserts never fail. The ``activity_partitions`` command creates the
+partitions ahead of time and archives the old ones.
+
+On other databases the helpers report the table as not partitioned and
+callers fall back to plain range queries.
+"""
+
+import datetime
+import re
+
+from django.db import connection
+
+PARTITION_SUFFIX = re.compile(r'_y(\d{4})m(\d{2})$')
+
+
+def month_start(value):
+    """Return the first instant (UTC) of the month containing a datetime."""
+    value = value.astimezone(datetime.timezone.utc)
+    return datetime.datetime(value.year, value.month, 1, tzinfo=datetime.timezone.utc)
+
+
+def add_months(month, months):
+    """Return the first instant of the month ``months`` after (or before) ``month``."""
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table, month):
+    return f'{table}_y{month.year:04d}m{month.month:02d}'
+
+
+def is_partitioned(table):
+    """Return True if the table is a partitioned PostgreSQL table."""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))', [table]
+        )
+        return cursor.fetchone()[0]
+
+
+def list_month_partitions(table):
+    """Return {month start: partition name} for the monthly partitions of a table."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname FROM pg_inherits '
+            'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE pg_inherits.inhparent = to_regclass(%s)',
+            [table]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = {}
+    for name in names:
+        match = PARTITION_SUFFIX.search(name)
+        if match:
+            month = datetime.datetime(int(match[1]), int(match[2]), 1, tzinfo=datetime.timezone.utc)
+            partitions[month] = name
+    return partitions
+
+
+def create_month_partition(table, month, column='timestamp'):
+    """
+    Create the partition of a month.
+
+    Rows of that month already stored in the default partition are moved to
+    the new partition before it is attached, which PostgreSQL requires.
+    """
+    name = partition_name(table, month)
+    qn = connection.ops.quote_name
+    bounds = [month.isoformat(), add_months(month, 1).isoformat()]
+    with connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE {qn(name)} (LIKE {qn(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {qn(table + "_default")} '
+            f'WHERE {qn(column)} >= %s AND {qn(column)} < %s RETURNING *) '
+            f'INSERT INTO {qn(name)} SELECT * FROM moved',
+            bounds
+        )
+        cursor.execute(
+            f'ALTER TABLE {qn(table)} ATTACH PARTITION {qn(name)} FOR VALUES FROM (%s) TO (%s)', bounds
+        )
+    return name
+
+
+def drop_partition(table, name):
+    """Detach and drop a partition."""
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}')
+        cursor.execute(f'DROP TABLE {qn(name)}')
@@ -0,0 +1,111 @@
+"""
+Role-based permission resolution.
+
+The role→module and role→manageable-role matrices are computed once, when
+the module is imported, from the role hierarchy and the rules below. The
+per-role permission payload returned by ``user_permissions`` is memoized by
+role and department, so resolving permissions on a request is a couple of
+dictionary lookups.
+"""
+
+from functools import lru_cache
+
+from rest_framework.permissions import BasePermission
+
+from .models import ROLE_HIERARCHY, USER_ROLES
+
+MODULES = ('selection', 'affiliation', 'payroll', 'performance', 'training', 'core')
+
+# Roles allowed in each module
+MODULE_ROLES = {
+    'selection': ('SUPERUSER', 'ADMIN', 'HR_MANAGER', 'SUPERVISOR'),
+    'affiliation': ('SUPERUSER', 'ADMIN', 'HR_MANAGER', 'SUPERVISOR', 'EMPLOYEE'),
+    'payroll': ('SUPERUSER', 'ADMIN', 'HR_MANAGER'),
+    'performance': ('SUPERUSER', 'ADMIN', 'HR_MANAGER', 'SUPERVISOR', 'EMPLOYEE'),
+    'training': ('SUPERUSER', 'ADMIN', 'HR_MANAGER', 'SUPERVISOR', 'EMPLOYEE'),
+    'core': ('SUPERUSER', 'ADMIN', 'HR_MANAGER', 'SUPERVISOR'),
+}
+
+# Roles that can only manage users of their own department
+DEPARTMENT_SCOPED_ROLES = frozenset({'SUPERVISOR'})
+
+USER_MANAGER_ROLES = frozenset({'SUPERUSER', 'ADMIN', 'HR_MANAGER', 'SUPERVISOR'})
+
+
+def _can_manage_role(role, target_role):
+    """Role-level rule: whether ``role`` can manage users with ``target_role``."""
+    if role == 'SUPERUSER':
+        return True
+    # Users can only manage users with lower hierarchy levels
+    if ROLE_HIERARCHY.get(role, 999) >= ROLE_HIERARCHY.get(target_role, 999):
+        return False
+    if role == 'ADMIN':
+        # Admins cannot manage other admins or superusers
+        return target_role not in ('ADMIN', 'SUPERUSER')
+    if role == 'HR_MANAGER':
+        # HR can only manage supervisors and employees
+        return target_role in ('SUPERVISOR', 'EMPLOYEE', 'USER')
+    if role == 'SUPERVISOR':
+        return target_role in ('EMPLOYEE', 'USER')
+    return False
+
+
+ROLE_MODULES = {
+    role: tuple(module for module in MODULES if role in MODULE_ROLES[module])
+    for role, _ in USER_ROLES
+}
+
+MANAGEABLE_ROLES = {
+    role: tuple(target for target, _ in USER_ROLES if _can_manage_role(role, target))
+    for role, _ in USER_ROLES
+}
+
+
+def can_access_module(role, module_name):
+    """Return True if the role can access a module."""
+    return module_name in ROLE_MODULES.get(role, ())
+
+
+def can_manage(role, department, target_role, target_department):
+    """Return True if a user with role/department can manage a user with target role/department."""
+    if target_role not in MANAGEABLE_ROLES.get(role, ()):
+        return False
+    if role in DEPARTMENT_SCOPED_ROLES:
+        return target_department == department
+    return True
+
+
+@lru_cache(maxsize=256)
+def _permission_payload(role, department):
+    role_names = dict(USER_ROLES)
+    return {
+        'role': role,
+        'role_display': role_names.get(role, role),
+        'accessible_modules': ROLE_MODULES.get(role, ()),
+        'can_manage_users': role in USER_MANAGER_ROLES,
+        'manageable_roles': MANAGEABLE_ROLES.get(role, ()),
+        # Department whose users the role is limited to, if any
+        'managed_department': department if role in DEPARTMENT_SCOPED_ROLES else None,
+    }
+
+
+def get_permission_payload(user):
+    """Return the permissions of a user as returned by the user_permissions endpoint."""
+    return dict(_permission_payload(user.role, user.department))
+
+
+class HasModuleAccess(BasePermission):
+    """
+    Allow authenticated users whose role can access ``view.permission_module``.
+
+    Views without ``permission_module`` are not restricted by this class.
+    """
+
+    message = 'No tienes permisos para acceder a este módulo'
+
+    def has_permission(self, request, view):
+        user = request.user
+        if not user or not user.is_authenticated:
+            return False
+        module = getattr(view, 'permission_module', None)
+        return module is None or can_access_module(user.role, module)
@@ -1,7 +1,15 @@
 """
 Repository pattern implementation for core app.
 """
-from .models import User, Role
+import base64
+import binascii
+import datetime
+
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from .models import User, Role, SystemActivity
+from .partitions import add_months, is_partitioned, list_month_partitions, month_start
 
 class UserRepository:
     """Repository for User model."""
@@ -33,3 +41,74 @@ class RoleRepository:
     def get_by_name(name):
         """Return role by name."""
         return Role.objects.filter(name=name).first()
+
+class SystemActivityRepository:
+    """Repository for SystemActivity model."""
+
+    @staticmethod
+    def encode_cursor(timestamp=None, activity_id=None, month=None):
+        """Encode a feed position: after a row, or from the end of a month."""
+        value = f"m:{month:%Y-%m}" if month else f"{timestamp.isoformat()}|{activity_id}"
+        return base64.urlsafe_b64encode(value.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Return (timestamp, id, month) from a feed cursor; raise ValueError if invalid."""
+        try:
+            value = base64.urlsafe_b64decode(cursor.encode()).decode()
+            if value.startswith('m:'):
+                month = datetime.datetime.strptime(value[2:], '%Y-%m').replace(tzinfo=datetime.timezone.utc)
+                return None, None, month
+            timestamp, activity_id = value.split('|')
+            timestamp = datetime.datetime.fromisoformat(timestamp)
+            if timezone.is_naive(timestamp):
+                raise ValueError('naive timestamp')
+            return timestamp, int(activity_id), None
+        except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+            raise ValueError(f'Invalid cursor: {cursor}') from e
+
+    @staticmethod
+    def get_oldest_month():
+        """Return the first month that can hold activities, or None if there are none."""
+        table = SystemActivity._meta.db_table
+        if is_partitioned(table):
+            # Read from the catalog instead of probing every partition
+            return min(list_month_partitions(table), default=None)
+        oldest = SystemActivity.objects.aggregate(oldest=Min('timestamp'))['oldest']
+        return month_start(oldest) if oldest else None
+
+    @staticmethod
+    def get_recent(limit=20, cursor=None, activity_type=None):
+        """
+        Return (activities, next_cursor) for the recent activity feed, newest first.
+
+        Each call reads a single month, so on PostgreSQL only one partition is
+        scanned. When the month runs out before ``limit`` rows, the next
+        cursor points to the end of the previous month (a page may then hold
+        fewer rows, or none); it is None once the oldest month is reached.
+        """
+        timestamp = activity_id = month = None
+        if cursor:
+            timestamp, activity_id, month = SystemActivityRepository.decode_cursor(cursor)
+        if month is None:
+            month = month_start(timestamp or timezone.now())
+        following = add_months(month, 1)
+
+        queryset = SystemActivity.objects.select_related('created_by').filter(
+            timestamp__gte=month, timestamp__lt=following
+        )
+        if timestamp is not None:
+            queryset = queryset.filter(timestamp__lte=timestamp).filter(
+                Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=activity_id)
+            )
+        if activity_type:
+            queryset = queryset.filter(type=activity_type)
+        activities = list(queryset.order_by('-timestamp', '-id')[:limit])
+
+        if len(activities) == limit:
+            last = activities[-1]
+            return activities, SystemActivityRepository.encode_cursor(last.timestamp, last.id)
+        oldest = SystemActivityRepository.get_oldest_month()
+        if oldest is None or month <= oldest:
+            return activities, None
+        return activities, SystemActivityRepository.encode_cursor(month=add_months(month, -1))
@@ -1,8 +1,62 @@
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
+from .cache import get_catalog_map
 from .models import User, Role, UserRole, SystemActivity, USER_ROLES
+from .permissions import MANAGEABLE_ROLES
 
-class UserSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    """
+    Limit the serialized fields to ``?fields=id,name,...`` on GET requests.
+
+    Unknown names are ignored; if none of the names match, every field is
+    returned. Only the top-level serializer (and the children of a list) is
+    filtered, nested serializers keep their fields.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+
+        requested = request.query_params.get('fields')
+        if not requested:
+            return
+
+        names = {name.strip() for name in requested.split(',')}
+        if not names & set(self.fields):
+            return
+        for name in set(self.fields) - names:
+            self.fields.pop(name)
+
+class CatalogField(serializers.ReadOnlyField):
+    """
+    Read an attribute of a cached catalog row from a foreign key id.
+
+    Replaces ``ReadOnlyField(source='criteria.weight')`` style fields, which
+    load the related row once per serialized object, with a lookup in the
+    catalog cache::
+
+        criteria_weight = CatalogField('performance.criteria', 'weight', source='criteria_id')
+
+    Dotted attributes (``'affiliation_type.name'``) follow relations loaded by
+    the catalog loader.
+    """
+
+    def __init__(self, catalog, attribute, **kwargs):
+        self.catalog = catalog
+        self.attribute = attribute
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        row = get_catalog_map(self.catalog).get(value)
+        for name in self.attribute.split('.'):
+            if row is None:
+                return None
+            row = getattr(row, name)
+        return row
+
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for the User model."""
 
     class Meta:
@@ -47,18 +101,15 @@ class UserRoleUpdateSerializer(serializers.ModelSerializer):
         """Validate that the requesting user can assign this role."""
         request = self.context.get('request')
         if request and hasattr(request, 'user'):
-            current_user = request.user
-
-            # Create a temporary user object to check permissions
-            temp_user = User(role=value)
-            if not current_user.can_manage_user(temp_user):
+            # Department scoping is checked against the target user by the view
+            if value not in MANAGEABLE_ROLES.get(request.user.role, ()):
                 raise serializers.ValidationError(
                     f"No tienes permisos para asignar el rol {value}"
                 )
 
         return value
 
-class UserListSerializer(serializers.ModelSerializer):
+class UserListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for listing users with role information."""
 
     role_display = serializers.CharField(source='get_role_display', read_only=True)
@@ -69,21 +120,21 @@ class UserListSerializer(serializers.ModelSerializer):
         fields = ('id', 'email', 'first_name', 'last_name', 'role', 'role_display',
                  'department', 'manager', 'manager_name', 'is_active', 'date_joined')
 
-class RoleSerializer(serializers.ModelSerializer):
+class RoleSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for the Role model."""
 
     class Meta:
         model = Role
         fields = '__all__'
 
-class UserRoleSerializer(serializers.ModelSerializer):
+class UserRoleSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for the UserRole model."""
 
     class Meta:
         model = UserRole
         fields = '__all__'
 
-class SystemActivitySerializer(serializers.ModelSerializer):
+class SystemActivitySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for the SystemActivity model."""
 
     created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
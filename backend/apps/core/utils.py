@@ -2,7 +2,9 @@
 Utility functions for the core app.
 """
 
-from django.db import transaction
+from django.utils import timezone
+
+from .audit import enqueue_activity
 from .models import SystemActivity
 
 
@@ -16,19 +18,18 @@ def record_activity(title, description, activity_type, user=None):
     - activity_type: One of 'employee', 'candidate', 'payroll', 'training', 'performance'
     - user: The user who performed the action (optional)
     
+    The activity is written asynchronously once the current transaction
+    commits (see apps.core.audit).
+    
     Returns:
-    - The created SystemActivity instance
+    - The unsaved SystemActivity instance
     """
-    try:
-        with transaction.atomic():
-            activity = SystemActivity.objects.create(
-                title=title,
-                description=description,
-                type=activity_type,
-                created_by=user
-            )
-            return activity
-    except Exception as e:
-        # Log error but don't interrupt the flow
-        print(f"Error recording activity: {e}")
-        return None
+    activity = SystemActivity(
+        title=title,
+        description=description,
+        type=activity_type,
+        timestamp=timezone.now(),
+        created_by=user
+    )
+    enqueue_activity(activity)
+    return activity
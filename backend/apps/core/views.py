@@ -1,21 +1,161 @@
+import hashlib
+import logging
+
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import User, Role, UserRole, SystemActivity
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from .models import User, Role, UserRole, SystemActivity, USER_ROLES
 from .serializers import (
     UserSerializer, UserRegistrationSerializer, RoleSerializer, 
     UserRoleSerializer, SystemActivitySerializer, UserRoleUpdateSerializer,
     UserListSerializer
 )
+from .pagination import CursorListPagination
+from .permissions import MANAGEABLE_ROLES, get_permission_payload
+from .audit import get_metrics
+from .db import note_request_user, replica_reads
+from .repositories import SystemActivityRepository
+from .utils import record_activity
+
+logger = logging.getLogger('apps.core')
+
+class ReplicaReadMixin:
+    """
+    Serve the GET/HEAD requests of a viewset from the read replica, if one is configured.
+
+    Users who wrote recently keep reading from the primary (see apps.core.db).
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        with replica_reads():
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        note_request_user(request.user)
+
+class CatalogListMixin:
+    """
+    Serve the list action of a catalog viewset from the catalog cache.
+
+    ``get_catalog_rows`` returns the rows to list, usually a cached accessor
+    of the app repository. Other actions keep using the queryset.
+    """
+
+    def get_catalog_rows(self):
+        raise NotImplementedError('CatalogListMixin requires get_catalog_rows()')
+
+    def list(self, request, *args, **kwargs):
+        rows = self.get_catalog_rows()
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(rows, many=True)
+        return Response(serializer.data)
+
+class ConditionalGetMixin:
+    """
+    Conditional GET (ETag / Last-Modified) for list and retrieve.
+
+    The validator is computed with a single aggregate query before anything
+    is serialized: ``Max(conditional_field)`` and the row count for lists,
+    the row's ``conditional_field`` for details. When the client's
+    ``If-None-Match`` / ``If-Modified-Since`` match, a 304 is returned
+    without loading the rows.
+
+    The ETag also covers the user and the full request path, so filters,
+    ``?fields=`` and pagination parameters get their own validator. Lists
+    only honour ``If-None-Match``: a deleted row lowers the count but not the
+    latest modification date. Related rows nested by the serializer can be
+    covered by listing their modification fields in
+    ``conditional_related_fields``; other related changes are not detected,
+    hence the weak ETag.
+
+    Extra actions can use ``conditional_response(queryset, respond)``.
+    """
+
+    conditional_field = 'updated_at'
+    conditional_related_fields = ()
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional_response(
+            queryset, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        return self.conditional_response(
+            queryset, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs), single=True
+        )
+
+    def get_validators(self, queryset, single=False):
+        """Return (etag, last_modified) for a queryset, or (None, None) if there is nothing to validate."""
+        queryset = queryset.order_by()
+        related = {f'related_{index}': Max(field) for index, field in enumerate(self.conditional_related_fields)}
+        if single and not related:
+            last_modified = queryset.values_list(self.conditional_field, flat=True).first()
+            if last_modified is None:
+                return None, None
+            version = last_modified.isoformat()
+        else:
+            # Joined related rows repeat the parent rows, hence the distinct count
+            aggregate = queryset.aggregate(
+                last_modified=Max(self.conditional_field), count=Count('pk', distinct=bool(related)), **related
+            )
+            last_modified = aggregate.pop('last_modified')
+            if single and last_modified is None:
+                return None, None
+            dates = [last_modified, *(aggregate[name] for name in related)]
+            version = ':'.join([*(date.isoformat() if date else '-' for date in dates), str(aggregate['count'])])
+            last_modified = max((date for date in dates if date), default=None)
+
+        user_id = getattr(self.request.user, 'pk', None)
+        digest = hashlib.md5(f"{user_id}:{self.request.get_full_path()}:{version}".encode()).hexdigest()
+        return f'W/"{digest}"', last_modified
+
+    def conditional_response(self, queryset, respond, single=False):
+        """Return 304 if the client's copy of ``queryset`` is current, else ``respond()`` with validators."""
+        etag, last_modified = self.get_validators(queryset, single=single)
+        if etag is None:
+            return respond()
+
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        not_modified = get_conditional_response(
+            self.request, etag=etag, last_modified=timestamp if single else None
+        )
+        if not_modified is not None:
+            return not_modified
+
+        response = respond()
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
+
 
 class UserViewSet(viewsets.ModelViewSet):
     """ViewSet for managing users."""
     
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    pagination_class = CursorListPagination
+    cursor_ordering = ('-date_joined', '-id')
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['role', 'is_active', 'department']
@@ -46,10 +186,10 @@ class UserViewSet(viewsets.ModelViewSet):
             user = serializer.save()
             
             # Create a system activity for the registration
-            SystemActivity.objects.create(
+            record_activity(
                 title="Nuevo usuario registrado",
                 description=f"Se ha registrado el usuario {user.email}",
-                type="employee"
+                activity_type="employee"
             )
             
             # Return success response
@@ -84,11 +224,11 @@ class UserViewSet(viewsets.ModelViewSet):
             updated_user = serializer.save()
             
             # Create system activity
-            SystemActivity.objects.create(
+            record_activity(
                 title="Rol de usuario actualizado",
                 description=f"El rol del usuario {updated_user.email} cambió de {old_role} a {updated_user.role}",
-                type="employee",
-                created_by=request.user
+                activity_type="employee",
+                user=request.user
             )
             
             return Response(UserListSerializer(updated_user).data)
@@ -99,23 +239,15 @@ class UserViewSet(viewsets.ModelViewSet):
     def role_options(self, request):
         """Get available roles that the current user can assign."""
         try:
-            current_user = request.user
-            available_roles = []
-            
-            # Import here to avoid circular imports
-            from .models import USER_ROLES
-            
-            for role_code, role_name in USER_ROLES:
-                temp_user = User(role=role_code)
-                if current_user.can_manage_user(temp_user):
-                    available_roles.append({
-                        'code': role_code,
-                        'name': role_name
-                    })
-            
+            manageable_roles = MANAGEABLE_ROLES.get(request.user.role, ())
+            available_roles = [
+                {'code': role_code, 'name': role_name}
+                for role_code, role_name in USER_ROLES
+                if role_code in manageable_roles
+            ]
             return Response(available_roles)
         except Exception as e:
-            print(f"Error in role_options: {e}")
+            logger.error(f"Error in role_options: {str(e)}")
             return Response(
                 {"error": "Error obteniendo opciones de roles"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -126,25 +258,9 @@ class UserViewSet(viewsets.ModelViewSet):
         """Get current user's permissions and accessible modules."""
         try:
             user = request.user
-            print(f"Getting permissions for user: {user.email}, role: {user.role}")
-            
-            modules = ['selection', 'affiliation', 'payroll', 'performance', 'training', 'core']
-            accessible_modules = []
-            
-            for module in modules:
-                if user.can_access_module(module):
-                    accessible_modules.append(module)
-            
-            # Get available roles for this user
-            available_roles = []
-            from .models import USER_ROLES
-            
-            for role_code, role_name in USER_ROLES:
-                temp_user = User(role=role_code)
-                if user.can_manage_user(temp_user):
-                    available_roles.append(role_code)
-              # Include user data in the response
-            user_data = {
+            permissions = get_permission_payload(user)
+            # Include user data in the response
+            permissions['user'] = {
                 'id': user.id,
                 'email': user.email,
                 'first_name': user.first_name,
@@ -153,23 +269,10 @@ class UserViewSet(viewsets.ModelViewSet):
                 'department': user.department,
                 'is_active': user.is_active
             }
-            
-            permissions = {
-                'role': user.role,
-                'role_display': user.get_role_display(),
-                'accessible_modules': accessible_modules,
-                'can_manage_users': user.role in ['SUPERUSER', 'ADMIN', 'HR_MANAGER', 'SUPERVISOR'],
-                'manageable_roles': available_roles,
-                'user': user_data  # Add user data to the response
-            }
-            
-            print(f"Returning permissions: {permissions}")
             return Response(permissions)
             
         except Exception as e:
-            print(f"Error in user_permissions: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"Error in user_permissions: {str(e)}")
             return Response(
                 {"error": f"Error obteniendo permisos: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -192,15 +295,57 @@ class UserRoleViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
 
-class ActivityViewSet(viewsets.ReadOnlyModelViewSet):
+class ActivityViewSet(ReplicaReadMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for viewing system activities."""
     
+    conditional_field = 'timestamp'
     queryset = SystemActivity.objects.all()
     serializer_class = SystemActivitySerializer
+    pagination_class = CursorListPagination
+    cursor_ordering = ('-timestamp', '-id')
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['type', 'created_by']
 
+    @swagger_auto_schema(
+        operation_description="Recent activity feed, newest first, reading one month per page",
+        manual_parameters=[
+            openapi.Parameter('limit', openapi.IN_QUERY, description="Activities per page (max 100)",
+                              type=openapi.TYPE_INTEGER),
+            openapi.Parameter('cursor', openapi.IN_QUERY, description="'next' value of the previous page",
+                              type=openapi.TYPE_STRING),
+            openapi.Parameter('type', openapi.IN_QUERY, description="Activity type", type=openapi.TYPE_STRING),
+        ],
+        responses={
+            200: openapi.Response(description="{'results': [...], 'next': cursor or null}"),
+            400: openapi.Response(description="Invalid cursor or limit")
+        }
+    )
+    @action(detail=False, methods=['get'])
+    def recent(self, request):
+        """Return a page of the recent activity feed and the cursor of the next one."""
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), 100)
+            if limit < 1:
+                raise ValueError('limit must be positive')
+            activities, next_cursor = SystemActivityRepository.get_recent(
+                limit=limit,
+                cursor=request.query_params.get('cursor'),
+                activity_type=request.query_params.get('type')
+            )
+        except ValueError as e:
+            return Response(
+                {"error": "Parámetros de consulta inválidos", "details": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = self.get_serializer(activities, many=True)
+        return Response({'results': serializer.data, 'next': next_cursor})
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def writer_metrics(self, request):
+        """Return the queue depth and counters of the buffered activity writer."""
+        return Response(get_metrics())
+
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """Custom token serializer to include user data in login response."""
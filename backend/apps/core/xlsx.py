@@ -0,0 +1,244 @@
+"""
+Minimal streaming XLSX writer and reader.
+
+Writes a single-sheet workbook row by row into a zip archive that is yielded
+in chunks as it is produced, so exports can be sent through
+``StreamingHttpResponse`` without building the workbook in memory. Strings
+are written inline, which avoids keeping a shared strings table.
+
+Usage::
+
+    response = StreamingHttpResponse(
+        stream_xlsx(header, rows, sheet_name='Nómina'),
+        content_type=XLSX_CONTENT_TYPE
+    )
+
+``iter_xlsx_rows`` reads the first worksheet of a workbook row by row with
+``iterparse``; only the shared strings table is kept in memory.
+"""
+
+import posixpath
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.etree.ElementTree import ParseError, iterparse
+from xml.sax.saxutils import escape
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+
+_SHEET_END = '</sheetData></worksheet>'
+
+# Characters not allowed in sheet names
+_INVALID_SHEET_CHARS = str.maketrans({c: ' ' for c in '[]:*?/\\'})
+
+# Characters outside the XML 1.0 Char production, which no parser accepts
+_INVALID_XML_CHARS = re.compile('[^\t\n\r\x20-\ud7ff\ue000-\ufffd\U00010000-\U0010ffff]')
+
+
+def _xml_text(value):
+    return escape(_INVALID_XML_CHARS.sub('', value), {'"': '&quot;'})
+
+
+class _ChunkBuffer:
+    """Write-only file object whose content is drained by the generator.
+
+    It has no ``tell``/``seek``, so ``zipfile`` writes the archive in
+    streaming mode with data descriptors.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data, self.chunks = b''.join(self.chunks), []
+        return data
+
+
+def _cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c><v>{value}</v></c>'
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{_xml_text(str(value))}</t></is></c>'
+
+
+def _row(values):
+    return '<row>' + ''.join(_cell(value) for value in values) + '</row>'
+
+
+def stream_xlsx(header, rows, sheet_name='Sheet1', flush_rows=500):
+    """
+    Yield the bytes of a single-sheet XLSX workbook.
+
+    Parameters:
+    - header: Column titles written as the first row
+    - rows: Iterable of row value sequences
+    - sheet_name: Name of the worksheet (max 31 characters)
+    - flush_rows: Rows written between yielded chunks
+    """
+    buffer = _ChunkBuffer()
+    sheet_name = _xml_text(sheet_name.translate(_INVALID_SHEET_CHARS)[:31])
+
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        archive.writestr('_rels/.rels', _ROOT_RELS)
+        archive.writestr('xl/workbook.xml', _WORKBOOK.format(name=sheet_name))
+        archive.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((_SHEET_START + _row(header)).encode('utf-8'))
+            for index, values in enumerate(rows, start=1):
+                sheet.write(_row(values).encode('utf-8'))
+                if index % flush_rows == 0:
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            sheet.write(_SHEET_END.encode('utf-8'))
+
+    yield buffer.drain()
+
+
+_MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PACKAGE_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+_CELL_COLUMN = re.compile(r'[A-Z]+')
+
+
+def _column_index(reference):
+    index = 0
+    for letter in _CELL_COLUMN.match(reference).group():
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+
+def _text(element):
+    """Concatenated text of the <t> elements below an element (rich text runs included)."""
+    return ''.join(node.text or '' for node in element.iter(f'{_MAIN_NS}t'))
+
+
+def _first_sheet_path(archive):
+    with archive.open('xl/workbook.xml') as workbook:
+        for _, element in iterparse(workbook):
+            if element.tag == f'{_MAIN_NS}sheet':
+                relation_id = element.get(f'{_REL_NS}id')
+                break
+        else:
+            raise ValueError('The workbook has no worksheets')
+    with archive.open('xl/_rels/workbook.xml.rels') as rels:
+        for _, element in iterparse(rels):
+            if element.tag == f'{_PACKAGE_REL_NS}Relationship' and element.get('Id') == relation_id:
+                target = element.get('Target')
+                return target.lstrip('/') if target.startswith('/') else posixpath.normpath(f'xl/{target}')
+    raise ValueError('The first worksheet could not be found')
+
+
+def _shared_strings(archive):
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+    strings = []
+    with archive.open('xl/sharedStrings.xml') as table:
+        for _, element in iterparse(table):
+            if element.tag == f'{_MAIN_NS}si':
+                strings.append(_text(element))
+                element.clear()
+    return strings
+
+
+def iter_xlsx_rows(fileobj):
+    """
+    Yield the rows of the first worksheet as lists of strings ('' for empty cells).
+
+    Numbers are returned as written in the file, e.g. dates as their serial
+    number; booleans as '1'/'0'. Raises ValueError if the file is not a
+    valid workbook.
+    """
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile as e:
+        raise ValueError('The file is not a valid XLSX workbook') from e
+
+    with archive:
+        try:
+            sheet_path = _first_sheet_path(archive)
+            strings = _shared_strings(archive)
+            sheet = archive.open(sheet_path)
+        except (KeyError, ParseError) as e:
+            raise ValueError('The file is not a valid XLSX workbook') from e
+
+        with sheet:
+            try:
+                for _, element in iterparse(sheet):
+                    if element.tag != f'{_MAIN_NS}row':
+                        continue
+                    values = []
+                    for cell in element.iter(f'{_MAIN_NS}c'):
+                        reference = cell.get('r')
+                        if reference:
+                            values.extend([''] * (_column_index(reference) - len(values)))
+                        cell_type = cell.get('t')
+                        if cell_type == 'inlineStr':
+                            value = _text(cell)
+                        else:
+                            value = cell.findtext(f'{_MAIN_NS}v') or ''
+                            if cell_type == 's' and value:
+                                value = strings[int(value)]
+                        values.append(value)
+                    element.clear()
+                    yield values
+            except ParseError as e:
+                raise ValueError('The file is not a valid XLSX workbook') from e
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Contract, PayrollPeriod, PayrollItem, PayrollEntry, PayrollEntryDetail
+from .models import (
+    Contract, PayrollPeriod, PayrollItem, PayrollEntry, PayrollEntryDetail,
+    PayrollPeriodSummary, PayrollPeriodDepartmentSummary, PayrollPeriodSnapshot
+)
 
 @admin.register(Contract)
 class ContractAdmin(admin.ModelAdmin):
@@ -39,3 +42,26 @@ class PayrollEntryDetailAdmin(admin.ModelAdmin):
     list_display = ('payroll_entry', 'payroll_item', 'amount', 'quantity')
     search_fields = ('payroll_entry__contract__employee__first_name', 'payroll_entry__contract__employee__last_name')
     list_filter = ('payroll_item',)
+
+@admin.register(PayrollPeriodSummary)
+class PayrollPeriodSummaryAdmin(admin.ModelAdmin):
+    list_display = ('period', 'entries_count', 'approved_count', 'pending_count', 'total_net_pay', 'updated_at')
+    search_fields = ('period__name',)
+
+@admin.register(PayrollPeriodDepartmentSummary)
+class PayrollPeriodDepartmentSummaryAdmin(admin.ModelAdmin):
+    list_display = ('period', 'department', 'entries_count', 'approved_count', 'pending_count', 'total_net_pay')
+    search_fields = ('period__name', 'department')
+    list_filter = ('period',)
+
+@admin.register(PayrollPeriodSnapshot)
+class PayrollPeriodSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('period', 'entries_count', 'total_net_pay', 'payload_size', 'checksum', 'created_at')
+    search_fields = ('period__name', 'checksum')
+    exclude = ('payload',)
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,255 @@
+"""
+Streaming exports of the payroll entries of a period.
+
+Entries are read with ``.iterator(chunk_size=...)`` and their details are
+prefetched per chunk, so memory use stays constant regardless of the period
+size. Closed periods with a snapshot are exported from the snapshot instead,
+so the export matches what was frozen when the period was closed; its
+entries are decompressed as they are streamed. Every
+format is produced by a generator meant to be wrapped in a
+``StreamingHttpResponse``.
+"""
+
+import csv
+import unicodedata
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db.models import Count, Prefetch, Sum
+
+from apps.core.xlsx import XLSX_CONTENT_TYPE, stream_xlsx
+from .models import PayrollEntry, PayrollEntryDetail, PayrollItem, PayrollPeriodSnapshot
+from .rules import from_cents
+from .services import CENTS
+from .snapshots import PeriodSnapshotService
+
+
+class Echo:
+    """File-like object that returns what is written, for use with csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+class PayrollExporter:
+    """Export the payroll entries of a period as CSV, XLSX or bank transfer file."""
+
+    FORMATS = {
+        'csv': ('text/csv; charset=utf-8', 'csv'),
+        'xlsx': (XLSX_CONTENT_TYPE, 'xlsx'),
+        'bank': ('text/plain; charset=ascii', 'txt'),
+    }
+    DEFAULT_CHUNK_SIZE = 2000
+    # Width of the document number field of a bank record
+    BANK_DOCUMENT_WIDTH = 20
+
+    BASE_COLUMNS = [
+        'Código empleado', 'Tipo documento', 'Número documento', 'Nombre', 'Departamento', 'Cargo',
+        'Salario base', 'Total devengado', 'Total deducciones', 'Neto a pagar', 'Aprobado',
+    ]
+
+    def __init__(self, period, file_format='csv', chunk_size=None):
+        if file_format not in self.FORMATS:
+            raise ValueError(f"Unsupported export format '{file_format}'. Use one of: {', '.join(self.FORMATS)}")
+        self.period = period
+        self.file_format = file_format
+        self.chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
+        self.snapshot = PayrollPeriodSnapshot.objects.filter(period=period).first() if period.is_closed else None
+
+    @property
+    def content_type(self):
+        return self.FORMATS[self.file_format][0]
+
+    @property
+    def filename(self):
+        slug = ''.join(c if c.isalnum() else '_' for c in _ascii(self.period.name)).strip('_').lower()
+        return f"nomina_{slug or self.period.pk}.{self.FORMATS[self.file_format][1]}"
+
+    def stream(self):
+        """Return the generator producing the export content."""
+        if self.file_format == 'bank':
+            return self.stream_bank()
+        header, rows = self.header(), self.rows()
+        if self.file_format == 'xlsx':
+            return stream_xlsx(header, rows, sheet_name=self.period.name)
+        return self.stream_csv(header, rows)
+
+    def entries(self):
+        """Iterate the entries of the period with contract, employee and details loaded."""
+        details = PayrollEntryDetail.objects.only('id', 'payroll_entry_id', 'payroll_item_id', 'amount', 'quantity')
+        return (
+            PayrollEntry.objects.filter(period=self.period)
+            .select_related('contract__employee')
+            .prefetch_related(Prefetch('details', queryset=details))
+            .order_by('contract__employee__last_name', 'contract__employee__first_name', 'id')
+            .iterator(chunk_size=self.chunk_size)
+        )
+
+    def items(self):
+        """Return the payroll items used in the period, one column each."""
+        if not hasattr(self, '_items') and self.snapshot is not None:
+            # The entries of the same read are streamed by snapshot_rows
+            items, self._snapshot_entries = PeriodSnapshotService.read(self.snapshot)
+            self._items = sorted(items, key=lambda item: (item.item_type != 'EARNING', item.code))
+        elif not hasattr(self, '_items'):
+            self._items = list(
+                PayrollItem.objects.filter(payrollentrydetail__payroll_entry__period=self.period)
+                .distinct().order_by('-item_type', 'code')
+            )
+        return self._items
+
+    def header(self):
+        return self.BASE_COLUMNS + [f"{item.name} ({item.code})" for item in self.items()]
+
+    def rows(self):
+        """Yield one row per entry with the amount of every payroll item."""
+        item_ids = [item.id for item in self.items()]
+        if self.snapshot is not None:
+            yield from self.snapshot_rows(item_ids)
+            return
+        for entry in self.entries():
+            employee = entry.contract.employee
+            amounts = {}
+            for detail in entry.details.all():
+                amounts[detail.payroll_item_id] = amounts.get(detail.payroll_item_id, 0) + detail.amount * detail.quantity
+            yield [
+                employee.employee_id, employee.document_type, employee.document_number,
+                f"{employee.first_name} {employee.last_name}", entry.contract.department, entry.contract.position,
+                entry.base_salary, entry.total_earnings, entry.total_deductions, entry.net_pay,
+                'Sí' if entry.is_approved else 'No',
+            ] + [_money(amounts[item_id]) if item_id in amounts else None for item_id in item_ids]
+
+    def snapshot_rows(self, item_ids):
+        for entry in self._snapshot_entries:
+            amounts = dict(entry.amounts)
+            yield [
+                entry.employee_id, entry.document_type, entry.document_number,
+                f"{entry.first_name} {entry.last_name}", entry.department, entry.position,
+                from_cents(entry.base_salary), from_cents(entry.total_earnings),
+                from_cents(entry.total_deductions), from_cents(entry.net_pay),
+                'Sí' if entry.is_approved else 'No',
+            ] + [from_cents(amounts[item_id]) if item_id in amounts else None for item_id in item_ids]
+
+    def stream_csv(self, header, rows):
+        writer = csv.writer(Echo())
+        # BOM so spreadsheet tools detect UTF-8
+        yield '\ufeff' + writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    def stream_bank(self):
+        """
+        Yield a fixed-width bank transfer file with the approved entries.
+
+        Layout: one header record (type 1) with the period and control totals,
+        then one record (type 2) per employee. Amounts are in cents. Callers
+        check ``negative_net_pay`` and ``invalid_documents`` first: those
+        entries cannot be written.
+        """
+        if self.snapshot is not None:
+            # The header needs the control totals: stream the entries twice rather than keep them
+            count = total = 0
+            for entry in self.approved_snapshot_entries():
+                count += 1
+                total += entry.net_pay
+            yield self.bank_header(count, total)
+            for entry in self.approved_snapshot_entries():
+                yield self.bank_record(
+                    entry.document_type, entry.document_number, entry.first_name, entry.last_name, entry.net_pay
+                )
+            return
+
+        approved = PayrollEntry.objects.filter(period=self.period, is_approved=True)
+        totals = approved.aggregate(count=Count('id'), total=Sum('net_pay'))
+        yield self.bank_header(totals['count'], _cents(totals['total']))
+
+        entries = (
+            approved.select_related('contract__employee')
+            .order_by('contract__employee__last_name', 'contract__employee__first_name', 'id')
+            .iterator(chunk_size=self.chunk_size)
+        )
+        for entry in entries:
+            employee = entry.contract.employee
+            yield self.bank_record(
+                employee.document_type, employee.document_number, employee.first_name, employee.last_name,
+                _cents(entry.net_pay),
+            )
+
+    def negative_net_pay(self):
+        """Return the approved entries with a negative net pay, which cannot go in the bank file."""
+        if self.snapshot is not None:
+            rows = (
+                (entry.id, entry.employee_id, from_cents(entry.net_pay))
+                for entry in self.approved_snapshot_entries() if entry.net_pay < 0
+            )
+        else:
+            rows = (
+                PayrollEntry.objects.filter(period=self.period, is_approved=True, net_pay__lt=0)
+                .order_by('id').values_list('id', 'contract__employee__employee_id', 'net_pay')
+            )
+        return [
+            {'entry': entry_id, 'employee_id': employee_id, 'net_pay': str(net_pay)}
+            for entry_id, employee_id, net_pay in rows
+        ]
+
+    def invalid_documents(self):
+        """Return the approved entries whose document number does not fit the bank record."""
+        if self.snapshot is not None:
+            rows = (
+                (entry.id, entry.employee_id, entry.document_number)
+                for entry in self.approved_snapshot_entries()
+            )
+        else:
+            rows = (
+                PayrollEntry.objects.filter(period=self.period, is_approved=True)
+                .order_by('id')
+                .values_list('id', 'contract__employee__employee_id', 'contract__employee__document_number')
+                .iterator(chunk_size=self.chunk_size)
+            )
+        return [
+            {'entry': entry_id, 'employee_id': employee_id, 'document_number': document_number}
+            for entry_id, employee_id, document_number in rows
+            if len(_ascii(document_number)) > self.BANK_DOCUMENT_WIDTH
+        ]
+
+    def approved_snapshot_entries(self):
+        _, entries = PeriodSnapshotService.read(self.snapshot)
+        return (entry for entry in entries if entry.is_approved)
+
+    def bank_header(self, count, total_cents):
+        return (
+            '1'
+            + f"{self.period.start_date:%Y%m%d}{self.period.end_date:%Y%m%d}"
+            + f"{count:08d}"
+            + f"{total_cents:018d}"
+            + '\r\n'
+        )
+
+    def bank_record(self, document_type, document_number, first_name, last_name, net_pay_cents):
+        if net_pay_cents < 0:
+            raise ValueError(f"Negative net pay for document {document_number}: the bank file only holds payments")
+        document_number = _ascii(document_number)
+        if len(document_number) > self.BANK_DOCUMENT_WIDTH:
+            # Truncating it would pay someone else
+            raise ValueError(f"Document number {document_number} is longer than {self.BANK_DOCUMENT_WIDTH} characters")
+        return (
+            '2'
+            + _fixed(document_type, 5)
+            + document_number.rjust(self.BANK_DOCUMENT_WIDTH, '0')
+            + _fixed(f"{last_name} {first_name}", 40)
+            + f"{net_pay_cents:015d}"
+            + '\r\n'
+        )
+
+
+def _ascii(value):
+    """Strip accents and any non-ASCII character."""
+    return unicodedata.normalize('NFKD', str(value)).encode('ascii', 'ignore').decode('ascii')
+
+def _fixed(value, width):
+    return _ascii(value).upper()[:width].ljust(width)
+
+def _money(amount):
+    return amount.quantize(CENTS, rounding=ROUND_HALF_UP)
+
+def _cents(amount):
+    return int((amount or Decimal('0')) * 100)
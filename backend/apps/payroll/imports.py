@@ -0,0 +1,365 @@
+"""
+Bulk import of contracts from CSV or XLSX files.
+
+The file is read row by row and processed in chunks. For each chunk the
+employees and their contracts are loaded with one query each, the rows
+are validated against them, the contracts they supersede are
+deactivated with a single UPDATE and the new contracts are inserted with
+``bulk_create`` (``Contract.save`` is bypassed, the deactivation it performs
+per row is done per chunk instead).
+
+Invalid rows are reported with their line number and do not stop the import;
+a chunk that fails to save is reported as a whole. A row identical to a
+contract of the employee (same start date, position and salary) is
+rejected, so importing the same file twice creates nothing the second time.
+"""
+
+import csv
+import io
+import itertools
+import logging
+import unicodedata
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.affiliation.models import Employee
+from apps.core.cache import invalidate_catalog
+from apps.core.xlsx import iter_xlsx_rows
+from .models import Contract
+from .simulation import CONTRACT_BASE
+
+logger = logging.getLogger('apps.payroll')
+
+# Accepted header names of each column, compared without accents or case
+COLUMNS = {
+    'employee_id': ('employee_id', 'codigo empleado', 'codigo'),
+    'document_number': ('document_number', 'numero documento', 'documento'),
+    'contract_type': ('contract_type', 'tipo contrato', 'tipo de contrato'),
+    'start_date': ('start_date', 'fecha inicio', 'fecha de inicio'),
+    'end_date': ('end_date', 'fecha fin', 'fecha de fin'),
+    'salary': ('salary', 'salario'),
+    'currency': ('currency', 'moneda'),
+    'position': ('position', 'cargo'),
+    'department': ('department', 'departamento'),
+    'work_schedule': ('work_schedule', 'jornada'),
+}
+REQUIRED_COLUMNS = ('contract_type', 'start_date', 'salary', 'position', 'department')
+
+MAX_SALARY = Decimal('99999999.99')
+# Day 0 of spreadsheet date serial numbers
+EXCEL_EPOCH = date(1899, 12, 30)
+
+
+def _normalize(value):
+    value = unicodedata.normalize('NFKD', str(value)).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(value.replace('_', ' ').lower().split())
+
+
+def _choice_map(choices):
+    """Map codes and labels of a choices tuple, normalized, to the code."""
+    mapping = {}
+    for code, label in choices:
+        mapping[_normalize(code)] = code
+        mapping[_normalize(label)] = code
+    return mapping
+
+
+CONTRACT_TYPES = _choice_map(Contract.CONTRACT_TYPES)
+WORK_SCHEDULES = _choice_map(Contract.WORK_SCHEDULES)
+CURRENCIES = _choice_map(Contract.CURRENCY_CHOICES)
+HEADER_ALIASES = {_normalize(alias): column for column, aliases in COLUMNS.items() for alias in aliases}
+
+
+def parse_date(value, serial=False):
+    """
+    Parse YYYY-MM-DD or DD/MM/YYYY.
+
+    Spreadsheet serial numbers are only accepted with ``serial=True``, i.e.
+    for cells read from an XLSX file; in a CSV a bare number is a typo.
+    """
+    value = value.strip()
+    parsers = [
+        lambda v: date.fromisoformat(v[:10]),
+        lambda v: datetime.strptime(v, '%d/%m/%Y').date(),
+    ]
+    if serial:
+        parsers.append(lambda v: EXCEL_EPOCH + timedelta(days=int(float(v))))
+    for parse in parsers:
+        try:
+            return parse(value)
+        except (ValueError, OverflowError):
+            continue
+    raise ValueError(f"Fecha inválida '{value}', use AAAA-MM-DD o DD/MM/AAAA")
+
+
+def parse_amount(value):
+    """
+    Parse an amount written with '.' or ',' as decimal separator and optional thousands separators.
+
+    A single separator followed by exactly three digits is a thousands
+    separator ('1.500' and '1,500' are both 1500).
+    """
+    value = value.replace('$', '').replace(' ', '')
+    if ',' in value and '.' in value:
+        # The last separator is the decimal one
+        thousands = ',' if value.rfind('.') > value.rfind(',') else '.'
+        value = value.replace(thousands, '').replace(',', '.')
+    elif ',' in value:
+        integer, _, decimals = value.rpartition(',')
+        value = f'{integer}.{decimals}' if value.count(',') == 1 and len(decimals) <= 2 else value.replace(',', '')
+    elif '.' in value:
+        decimals = value.rpartition('.')[2]
+        if value.count('.') > 1 or len(decimals) == 3 and decimals.isdigit():
+            value = value.replace('.', '')
+    try:
+        amount = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"Salario inválido '{value}'")
+    # NaN and Infinity are valid Decimals but not amounts
+    if not amount.is_finite():
+        raise ValueError(f"Salario inválido '{value}'")
+    return amount
+
+
+class ContractImporter:
+    """Import contracts from a CSV or XLSX file, chunk by chunk."""
+
+    FORMATS = ('csv', 'xlsx')
+    DEFAULT_CHUNK_SIZE = 500
+    MAX_REPORTED_ERRORS = 1000
+
+    def __init__(self, fileobj, file_format='csv', user=None, chunk_size=None, dry_run=False, encoding='utf-8'):
+        if file_format not in self.FORMATS:
+            raise ValueError(f"Formato no soportado '{file_format}'. Use uno de: {', '.join(self.FORMATS)}")
+        self.fileobj = fileobj
+        self.file_format = file_format
+        self.user = user if user is not None and user.is_authenticated else None
+        self.chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
+        self.dry_run = dry_run
+        self.encoding = encoding
+        self.report = {
+            'file_format': file_format,
+            'dry_run': dry_run,
+            'total_rows': 0,
+            'valid_rows': 0,
+            'created': 0,
+            'superseded': 0,
+            'failed_rows': 0,
+            'errors': [],
+            'errors_truncated': False,
+        }
+
+    def raw_rows(self):
+        """Yield the rows of the file as lists of strings, header first."""
+        if self.file_format == 'xlsx':
+            yield from iter_xlsx_rows(self.fileobj)
+            return
+        encoding = 'utf-8-sig' if self.encoding.replace('_', '-').lower() in ('utf-8', 'utf8') else self.encoding
+        text = io.TextIOWrapper(self.fileobj, encoding=encoding, newline='')
+        try:
+            header = text.readline()
+            delimiter = ';' if header.count(';') > header.count(',') else ','
+            yield from csv.reader(itertools.chain([header], text), delimiter=delimiter)
+        except UnicodeDecodeError as e:
+            raise ValueError(f"El archivo no está codificado en {self.encoding}") from e
+        except csv.Error as e:
+            raise ValueError(f"El archivo CSV no es válido: {str(e)}") from e
+        finally:
+            # Leave the upload open for its owner
+            text.detach()
+
+    def rows(self):
+        """Yield (line number, {column: value}) for every non-empty data row."""
+        raw_rows = self.raw_rows()
+        header = next(raw_rows, None)
+        if header is None:
+            raise ValueError('El archivo está vacío')
+
+        columns = [HEADER_ALIASES.get(_normalize(name)) for name in header]
+        missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+        if 'employee_id' not in columns and 'document_number' not in columns:
+            missing.insert(0, 'employee_id o document_number')
+        if missing:
+            raise ValueError(f"Faltan columnas requeridas: {', '.join(missing)}")
+
+        for line, values in enumerate(raw_rows, start=2):
+            row = {
+                column: str(value).strip()
+                for column, value in zip(columns, values) if column is not None
+            }
+            if any(row.values()):
+                yield line, row
+
+    def run(self):
+        """Import the file and return the report."""
+        rows = self.rows()
+        while True:
+            chunk = list(itertools.islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            self.process_chunk(chunk)
+
+        logger.info(
+            f"Contract import finished - rows: {self.report['total_rows']}, created: {self.report['created']}, "
+            f"failed: {self.report['failed_rows']}, dry run: {self.dry_run}"
+        )
+        return self.report
+
+    def process_chunk(self, chunk):
+        self.report['total_rows'] += len(chunk)
+
+        codes = {row['employee_id'] for _, row in chunk if row.get('employee_id')}
+        documents = {row['document_number'] for _, row in chunk if row.get('document_number')}
+        by_code, by_document = {}, {}
+        if codes or documents:
+            for pk, code, document in Employee.objects.filter(
+                Q(employee_id__in=codes) | Q(document_number__in=documents)
+            ).values_list('id', 'employee_id', 'document_number'):
+                by_code[code] = pk
+                by_document[document] = pk
+
+        existing = {}
+        for employee_id, start_date, position, salary in Contract.objects.filter(
+            employee_id__in=set(by_code.values())
+        ).values_list('employee_id', 'start_date', 'position', 'salary'):
+            existing.setdefault(employee_id, set()).add((start_date, position, salary))
+
+        contracts = []
+        latest = {}
+        lines = []
+        for line, row in chunk:
+            contract, errors = self.build_contract(row, by_code, by_document, existing)
+            if errors:
+                self.add_error(line, row, errors)
+                continue
+            if contract.employee_id in latest:
+                # A later row of the file supersedes the earlier one
+                latest[contract.employee_id].is_active = False
+            latest[contract.employee_id] = contract
+            contracts.append(contract)
+            existing.setdefault(contract.employee_id, set()).add(
+                (contract.start_date, contract.position, contract.salary)
+            )
+            lines.append((line, row))
+
+        self.report['valid_rows'] += len(lines)
+        if not lines:
+            return
+        if self.dry_run:
+            self.report['superseded'] += Contract.objects.filter(
+                employee_id__in=latest, is_active=True
+            ).count()
+            return
+
+        try:
+            with transaction.atomic():
+                superseded = Contract.objects.filter(employee_id__in=latest, is_active=True).update(
+                    is_active=False, updated_at=timezone.now()
+                )
+                Contract.objects.bulk_create(contracts)
+        except DatabaseError as e:
+            logger.error(f"Error saving contract import chunk: {str(e)}")
+            self.report['valid_rows'] -= len(lines)
+            for line, row in lines:
+                self.add_error(line, row, [f"Error al guardar el lote: {str(e)}"])
+            return
+        # bulk_create and update() send no signals
+        invalidate_catalog(CONTRACT_BASE)
+        self.report['superseded'] += superseded
+        self.report['created'] += len(contracts)
+
+    def build_contract(self, row, by_code, by_document, existing):
+        """Return (unsaved Contract, []) for a valid row, or (None, errors)."""
+        errors = []
+
+        employee_id = None
+        if row.get('employee_id'):
+            employee_id = by_code.get(row['employee_id'])
+            if employee_id is None:
+                errors.append(f"No existe el empleado con código '{row['employee_id']}'")
+        elif row.get('document_number'):
+            employee_id = by_document.get(row['document_number'])
+            if employee_id is None:
+                errors.append(f"No existe el empleado con documento '{row['document_number']}'")
+        else:
+            errors.append('Se requiere employee_id o document_number')
+
+        def choice(column, mapping, default=None):
+            value = row.get(column, '')
+            if not value:
+                if default is None:
+                    errors.append(f"El campo {column} es requerido")
+                return default
+            code = mapping.get(_normalize(value))
+            if code is None:
+                errors.append(f"Valor inválido '{value}' para {column}")
+            return code
+
+        contract_type = choice('contract_type', CONTRACT_TYPES)
+        work_schedule = choice('work_schedule', WORK_SCHEDULES, default='FULL_TIME')
+        currency = choice('currency', CURRENCIES, default='COP')
+
+        def parsed(column, parse, required=True):
+            value = row.get(column, '')
+            if not value:
+                if required:
+                    errors.append(f"El campo {column} es requerido")
+                return None
+            try:
+                return parse(value)
+            except ValueError as e:
+                errors.append(str(e))
+                return None
+
+        serial = self.file_format == 'xlsx'
+        start_date = parsed('start_date', lambda value: parse_date(value, serial=serial))
+        end_date = parsed('end_date', lambda value: parse_date(value, serial=serial), required=False)
+        salary = parsed('salary', parse_amount)
+        if start_date and end_date and end_date < start_date:
+            errors.append('La fecha de fin no puede ser anterior a la fecha de inicio')
+        if salary is not None:
+            if salary <= 0:
+                errors.append('El salario debe ser mayor a cero')
+            elif salary > MAX_SALARY or salary != salary.quantize(Decimal('0.01')):
+                errors.append(f"Salario fuera de rango '{row['salary']}'")
+
+        for column in ('position', 'department'):
+            value = row.get(column, '')
+            if not value:
+                errors.append(f"El campo {column} es requerido")
+            elif len(value) > 100:
+                errors.append(f"El campo {column} supera 100 caracteres")
+
+        if errors:
+            return None, errors
+        if (start_date, row['position'], salary) in existing.get(employee_id, ()):
+            return None, ['El empleado ya tiene un contrato con la misma fecha de inicio, cargo y salario']
+
+        return Contract(
+            employee_id=employee_id,
+            contract_type=contract_type,
+            start_date=start_date,
+            end_date=end_date,
+            salary=salary,
+            currency=currency,
+            position=row['position'],
+            department=row['department'],
+            work_schedule=work_schedule,
+            is_active=True,
+            created_by=self.user,
+        ), []
+
+    def add_error(self, line, row, errors):
+        self.report['failed_rows'] += 1
+        if len(self.report['errors']) >= self.MAX_REPORTED_ERRORS:
+            self.report['errors_truncated'] = True
+            return
+        self.report['errors'].append({
+            'row': line,
+            'employee': row.get('employee_id') or row.get('document_number') or None,
+            'errors': errors,
+        })
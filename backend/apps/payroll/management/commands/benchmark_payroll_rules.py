@@ -0,0 +1,122 @@
+"""
+Management command to benchmark the payroll rule engine.
+
+Evaluates a rule set over synthetic salaries for several contract counts
+and reports the cost per employee of ``PayrollRuleSet.evaluate_cents``, the
+column-wise evaluation in integer cents the salary simulation uses, against
+the per-contract ``PayrollRule.amount`` loop of ``PayrollRunEngine``, which
+the payroll run keeps because it needs ``Decimal`` amounts for the ORM. Both
+must produce the same totals, the command fails otherwise.
+
+By default the statutory items of a Colombian payroll are used (basic
+salary, transport allowance, health 4%, pension 4%, solidarity fund 1%);
+``--db-items`` uses the active payroll items instead. Nothing is written.
+
+Usage::
+
+    python manage.py benchmark_payroll_rules
+    python manage.py benchmark_payroll_rules --contracts 10000 100000 --db-items
+"""
+import gc
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.payroll.models import PayrollItem
+from apps.payroll.repositories import PayrollItemRepository
+from apps.payroll.rules import PayrollRuleSet, to_cents, to_cents_array
+
+STATUTORY_ITEMS = [
+    ('BASIC_SALARY', 'EARNING', '0', False),
+    ('TRANSPORT', 'EARNING', '162000', False),
+    ('HEALTH', 'DEDUCTION', '4', True),
+    ('PENSION', 'DEDUCTION', '4', True),
+    ('SOLIDARITY_FUND', 'DEDUCTION', '1', True),
+]
+
+
+def evaluate_decimal(rules, salaries):
+    """Return (earnings, deductions) per salary using the per-contract Decimal loop of the payroll run."""
+    results = []
+    for salary in salaries:
+        earnings = deductions = Decimal('0.00')
+        for rule in rules:
+            amount = rule.amount(salary)
+            if not amount:
+                continue
+            if rule.is_earning:
+                earnings += amount
+            else:
+                deductions += amount
+        results.append((earnings, deductions))
+    return results
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the per-employee cost of the payroll rule engine'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--contracts', type=int, nargs='+', default=[10000, 100000],
+                            help='Contract counts to benchmark (default: 10000 100000)')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement, best is kept (default: 3)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed of the salaries (default: 42)')
+        parser.add_argument('--db-items', action='store_true', help='Use the active payroll items of the database')
+
+    def handle(self, *args, **options):
+        items = self.items(options['db_items'])
+        rule_set = PayrollRuleSet.compile(items)
+        self.stdout.write(f"Payroll items: {', '.join(item.code for item in items)}")
+
+        rng = random.Random(options['seed'])
+        for count in options['contracts']:
+            # Salaries between one and twenty minimum wages, with cents
+            salaries = [Decimal(rng.randrange(130000000, 2600000000)).scaleb(-2) for _ in range(count)]
+            cents = to_cents_array(salaries)
+
+            rules_seconds, rules_result = self.measure(lambda: rule_set.evaluate_cents(cents), options['repeat'])
+            decimal_seconds, decimal_result = self.measure(
+                lambda: evaluate_decimal(rule_set.rules, salaries), options['repeat']
+            )
+            decimal_totals = [(to_cents(earnings), to_cents(deductions)) for earnings, deductions in decimal_result]
+            if list(zip(rules_result.earnings, rules_result.deductions)) != decimal_totals:
+                raise CommandError(f'The rule set and the Decimal loop differ for {count} contracts')
+
+            self.stdout.write(
+                f"{count} contracts: rule evaluation in cents {self.per_employee(rules_seconds, count)}, "
+                f"Decimal loop {self.per_employee(decimal_seconds, count)}; totals identical"
+            )
+
+    def items(self, from_db):
+        if from_db:
+            items = list(PayrollItemRepository.get_cached_active_items())
+            if not items:
+                raise CommandError('No active payroll items; run create_payroll_data or omit --db-items')
+            return items
+        return [
+            PayrollItem(
+                id=index, code=code, name=code, item_type=item_type,
+                default_amount=Decimal(amount), is_percentage=is_percentage,
+            )
+            for index, (code, item_type, amount, is_percentage) in enumerate(STATUTORY_ITEMS, start=1)
+        ]
+
+    def per_employee(self, seconds, count):
+        return f"{seconds / count * 1e6:.2f} µs/employee ({seconds * 1000:.0f} ms)"
+
+    def measure(self, run, repeat):
+        """Return the best time of ``repeat`` runs and the result of the last one."""
+        best = None
+        for _ in range(max(1, repeat)):
+            # As timeit does, keep collector pauses out of the measurement
+            gc.collect()
+            gc.disable()
+            try:
+                started = time.perf_counter()
+                result = run()
+                elapsed = time.perf_counter() - started
+            finally:
+                gc.enable()
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
@@ -0,0 +1,96 @@
+"""
+Management command to check that the payroll endpoints stay within a fixed query budget.
+
+Every endpoint is requested in-process and its SQL queries are counted. The
+budgets do not depend on the number of rows, so the command fails as soon as
+a serializer starts loading relations row by row (N+1 queries). Run it
+against a database with plenty of entries to make regressions obvious.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from apps.core.models import User
+from apps.payroll.models import Contract, PayrollEntry, PayrollPeriod
+
+# (name, url template, max queries). Templates are filled with sample ids.
+# Endpoints with conditional GET (ConditionalGetMixin) count one query more:
+# the validator query (Max(updated_at) and Count for lists, the row's
+# updated_at for details) that computes the ETag before serializing.
+ENDPOINT_BUDGETS = [
+    ('contracts list', '/api/payroll/contracts/', 2),
+    ('contracts by employee', '/api/payroll/contracts/by_employee/?employee={employee}', 2),
+    ('periods list', '/api/payroll/periods/', 1),
+    ('entries list', '/api/payroll/entries/', 3),
+    ('entry detail', '/api/payroll/entries/{entry}/', 3),
+    ('entries by period', '/api/payroll/entries/by_period/?period={period}', 3),
+    ('entries by employee', '/api/payroll/entries/by_employee/?employee={employee}', 3),
+    ('entry details list', '/api/payroll/entry-details/', 1),
+    ('entry details by entry', '/api/payroll/entry-details/by_entry/?entry={entry}', 2),
+]
+
+
+class Command(BaseCommand):
+    help = 'Check that payroll list endpoints run a fixed number of queries regardless of row count'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Email of the user making the requests (default: first superuser)'
+        )
+        parser.add_argument(
+            '--verbose-sql',
+            action='store_true',
+            help='Print the queries of endpoints over budget'
+        )
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['user'])
+        entry = PayrollEntry.objects.select_related('contract').order_by('-id').first()
+        if entry is None:
+            raise CommandError('No payroll entries found; create some data first (e.g. create_payroll_data)')
+
+        ids = {'entry': entry.pk, 'period': entry.period_id, 'employee': entry.contract.employee_id}
+        client = APIClient()
+        client.force_authenticate(user)
+
+        self.stdout.write(
+            f"Rows: {Contract.objects.count()} contracts, {PayrollPeriod.objects.count()} periods, "
+            f"{PayrollEntry.objects.count()} entries"
+        )
+
+        failures = []
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for name, template, budget in ENDPOINT_BUDGETS:
+                url = template.format(**ids)
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(url)
+
+                if response.status_code != 200:
+                    failures.append(name)
+                    self.stdout.write(self.style.ERROR(f"{name}: HTTP {response.status_code} for {url}"))
+                    continue
+
+                rows = len(response.data) if isinstance(response.data, list) else 1
+                line = f"{name}: {len(queries)} queries for {rows} rows (budget {budget})"
+                if len(queries) > budget:
+                    failures.append(name)
+                    self.stdout.write(self.style.ERROR(line))
+                    if options['verbose_sql']:
+                        for query in queries.captured_queries:
+                            self.stdout.write(f"    {query['sql']}")
+                else:
+                    self.stdout.write(self.style.SUCCESS(line))
+
+        if failures:
+            raise CommandError(f"Query budget exceeded: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS('All payroll endpoints within query budget'))
+
+    def get_user(self, email):
+        users = User.objects.filter(email=email) if email else User.objects.filter(is_superuser=True)
+        user = users.order_by('id').first()
+        if user is None:
+            raise CommandError('User not found' if email else 'No superuser found; use --user')
+        return user
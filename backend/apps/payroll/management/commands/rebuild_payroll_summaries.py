@@ -0,0 +1,35 @@
+"""
+Management command to rebuild the denormalised payroll period summaries.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.payroll.models import PayrollPeriod
+from apps.payroll.services import PayrollSummaryService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the payroll period summaries from the payroll entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--period',
+            type=int,
+            action='append',
+            help='ID of the period to rebuild (repeatable, default: all periods)'
+        )
+
+    def handle(self, *args, **options):
+        periods = PayrollPeriod.objects.order_by('start_date')
+        if options['period']:
+            periods = periods.filter(pk__in=options['period'])
+            missing = set(options['period']) - set(periods.values_list('pk', flat=True))
+            if missing:
+                raise CommandError(f'Payroll periods not found: {sorted(missing)}')
+
+        for period in periods:
+            summary = PayrollSummaryService.rebuild_period(period.pk)
+            self.stdout.write(
+                f'{period.name}: {summary.entries_count} entries, net pay {summary.total_net_pay}'
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {periods.count()} payroll period summaries'))
@@ -0,0 +1,108 @@
+"""
+Management command to verify the snapshots of closed payroll periods.
+
+Each snapshot is checked in a worker thread, with its own database
+connection: the payload is decompressed and hashed against the stored
+checksum, the stored totals are recomputed from the payload and, unless
+``--no-live`` is given, the payload is rebuilt from the live entries and
+details to detect changes to their amounts or approval made after the
+period was closed.
+
+Closed periods without a snapshot (closed before snapshots existed) are
+reported; ``--freeze-missing`` creates their snapshot from the live entries.
+
+Usage::
+
+    python manage.py verify_payroll_snapshots
+    python manage.py verify_payroll_snapshots --period 11 --period 12 --workers 8
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from apps.payroll.models import PayrollPeriod, PayrollPeriodSnapshot
+from apps.payroll.snapshots import PeriodSnapshotService
+
+
+def verify_period(period_id, live):
+    """Verify the snapshot of a period in a worker thread."""
+    try:
+        snapshot = PayrollPeriodSnapshot.objects.select_related('period').get(period_id=period_id)
+        return PeriodSnapshotService.verify(snapshot, live=live)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Verify the checksums and totals of the payroll period snapshots'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--period',
+            type=int,
+            action='append',
+            help='ID of the period to verify (repeatable, default: all closed periods)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=min(8, os.cpu_count() or 1),
+            help='Snapshots verified in parallel (default: CPU count, at most 8)'
+        )
+        parser.add_argument('--no-live', action='store_true', help='Do not compare with the live entries')
+        parser.add_argument(
+            '--freeze-missing',
+            action='store_true',
+            help='Create the snapshot of closed periods that have none'
+        )
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+
+        periods = PayrollPeriod.objects.filter(is_closed=True).order_by('start_date')
+        if options['period']:
+            periods = PayrollPeriod.objects.filter(pk__in=options['period']).order_by('start_date')
+            missing = set(options['period']) - set(periods.values_list('pk', flat=True))
+            if missing:
+                raise CommandError(f'Payroll periods not found: {sorted(missing)}')
+
+        names = dict(periods.values_list('pk', 'name'))
+        with_snapshot = set(
+            PayrollPeriodSnapshot.objects.filter(period__in=list(names)).values_list('period_id', flat=True)
+        )
+        for period in periods.exclude(pk__in=with_snapshot):
+            if options['freeze_missing'] and period.is_closed:
+                snapshot = PeriodSnapshotService.freeze(period)
+                with_snapshot.add(period.pk)
+                self.stdout.write(f'{period.name}: snapshot created, checksum {snapshot.checksum}')
+            else:
+                self.stdout.write(self.style.WARNING(f'{period.name}: no snapshot'))
+
+        period_ids = [period_id for period_id in names if period_id in with_snapshot]
+        live = not options['no_live']
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            reports = list(executor.map(lambda period_id: verify_period(period_id, live), period_ids))
+
+        failed = 0
+        for report in reports:
+            name = names[report['period']]
+            if report['ok']:
+                self.stdout.write(f"{name}: ok ({report['checksum'][:12]})")
+                continue
+            failed += 1
+            problems = [
+                label for key, label in (
+                    ('checksum_ok', 'payload does not match its checksum'),
+                    ('totals_ok', 'stored totals do not match the payload'),
+                    ('live_ok', 'live entries changed after closing'),
+                )
+                if report[key] is False
+            ]
+            self.stdout.write(self.style.ERROR(f"{name}: {'; '.join(problems)}"))
+
+        if failed:
+            raise CommandError(f'{failed} of {len(reports)} payroll period snapshots failed verification')
+        self.stdout.write(self.style.SUCCESS(f'Verified {len(reports)} payroll period snapshots'))
@@ -0,0 +1,90 @@
+# Generated by Django 4.2.10 on 2026-10-18 11:04
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+import django.db.models.deletion
+
+
+SUMMARY_FIELDS = (
+    'entries_count', 'approved_count', 'pending_count',
+    'total_earnings', 'total_deductions', 'total_net_pay',
+)
+
+
+def build_summaries(apps, schema_editor):
+    """Build the summaries of the periods that already have entries."""
+    PayrollEntry = apps.get_model('payroll', 'PayrollEntry')
+    PayrollPeriodSummary = apps.get_model('payroll', 'PayrollPeriodSummary')
+    PayrollPeriodDepartmentSummary = apps.get_model('payroll', 'PayrollPeriodDepartmentSummary')
+
+    rows = PayrollEntry.objects.values('period_id', 'contract__department').annotate(
+        entries_count=Count('id'),
+        approved_count=Count('id', filter=Q(is_approved=True)),
+        pending_count=Count('id', filter=Q(is_approved=False)),
+        total_earnings=Sum('total_earnings'),
+        total_deductions=Sum('total_deductions'),
+        total_net_pay=Sum('net_pay'),
+    ).order_by()
+
+    periods = {}
+    departments = []
+    for row in rows:
+        values = {field: row[field] or 0 for field in SUMMARY_FIELDS}
+        departments.append(PayrollPeriodDepartmentSummary(
+            period_id=row['period_id'], department=row['contract__department'], **values
+        ))
+        summary = periods.setdefault(row['period_id'], {field: 0 for field in SUMMARY_FIELDS})
+        for field in SUMMARY_FIELDS:
+            summary[field] += values[field]
+
+    PayrollPeriodSummary.objects.bulk_create([
+        PayrollPeriodSummary(period_id=period_id, **values) for period_id, values in periods.items()
+    ])
+    PayrollPeriodDepartmentSummary.objects.bulk_create(departments)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayrollPeriodSummary',
+            fields=[
+                ('entries_count', models.IntegerField(default=0)),
+                ('approved_count', models.IntegerField(default=0)),
+                ('pending_count', models.IntegerField(default=0)),
+                ('total_earnings', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('total_deductions', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('total_net_pay', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('period', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='payroll.payrollperiod')),
+            ],
+            options={
+                'verbose_name_plural': 'Payroll period summaries',
+            },
+        ),
+        migrations.CreateModel(
+            name='PayrollPeriodDepartmentSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entries_count', models.IntegerField(default=0)),
+                ('approved_count', models.IntegerField(default=0)),
+                ('pending_count', models.IntegerField(default=0)),
+                ('total_earnings', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('total_deductions', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('total_net_pay', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('department', models.CharField(max_length=100)),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='department_summaries', to='payroll.payrollperiod')),
+            ],
+            options={
+                'verbose_name_plural': 'Payroll period department summaries',
+                'ordering': ['department'],
+                'unique_together': {('period', 'department')},
+            },
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
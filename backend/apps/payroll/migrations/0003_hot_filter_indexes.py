@@ -0,0 +1,29 @@
+# Generated by Django 4.2.10 on 2026-10-18 11:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0002_payroll_period_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['employee', '-start_date'], name='contract_active_emp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payrollentry',
+            index=models.Index(condition=models.Q(('is_approved', False)), fields=['period'], name='entry_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payrollentry',
+            index=models.Index(fields=['-created_at', '-id'], name='entry_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payrollperiod',
+            index=models.Index(condition=models.Q(('is_closed', False)), fields=['-end_date'], name='period_open_idx'),
+        ),
+    ]
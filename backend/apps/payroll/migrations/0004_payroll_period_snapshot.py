@@ -0,0 +1,35 @@
+# Generated by Django 4.2.10 on 2026-10-18 11:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('payroll', '0003_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayrollPeriodSnapshot',
+            fields=[
+                ('period', models.OneToOneField(on_delete=django.db.models.deletion.PROTECT, primary_key=True, related_name='snapshot', serialize=False, to='payroll.payrollperiod')),
+                ('format_version', models.PositiveSmallIntegerField(default=1)),
+                ('entries_count', models.IntegerField()),
+                ('approved_count', models.IntegerField()),
+                ('total_earnings', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('total_deductions', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('total_net_pay', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('item_totals', models.JSONField(default=list)),
+                ('department_totals', models.JSONField(default=list)),
+                ('payload', models.BinaryField()),
+                ('payload_size', models.PositiveIntegerField()),
+                ('checksum', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -1,5 +1,5 @@
 from django.db import models
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 from django.core.validators import MinValueValidator
@@ -43,6 +43,13 @@ class Contract(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            # Active contracts by employee, newest first (current contract lookups, payroll runs)
+            models.Index(fields=['employee', '-start_date'], name='contract_active_emp_idx',
+                         condition=models.Q(is_active=True)),
+        ]
+    
     def __str__(self):
         return f"{self.employee} - {self.position} ({self.start_date})"
     
@@ -53,7 +60,9 @@ class Contract(models.Model):
         
         # Set other contracts as inactive if this one is active
         if self.is_active and not self.pk:  # Only for new contracts
-            Contract.objects.filter(employee=self.employee, is_active=True).update(is_active=False)
+            Contract.objects.filter(employee=self.employee, is_active=True).update(
+                is_active=False, updated_at=timezone.now()
+            )
             
         super().save(*args, **kwargs)
 
@@ -77,6 +86,10 @@ class PayrollPeriod(models.Model):
     
     class Meta:
         ordering = ['-start_date']
+        indexes = [
+            # Open periods are a handful of rows; keep them out of the closed history
+            models.Index(fields=['-end_date'], name='period_open_idx', condition=models.Q(is_closed=False)),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.start_date} - {self.end_date})"
@@ -89,14 +102,14 @@ class PayrollPeriod(models.Model):
         super().save(*args, **kwargs)
     
     def close_period(self, user):
-        """Close the payroll period"""
+        """Close the payroll period, freezing its snapshot"""
+        from .snapshots import PeriodSnapshotService
+        
         if self.is_closed:
             return False
         
-        self.is_closed = True
-        self.closed_by = user
-        self.closed_at = timezone.now()
-        self.save()
+        PeriodSnapshotService.close_period(self, user)
+        self.refresh_from_db(fields=['is_closed', 'closed_by', 'closed_at'])
         return True
 
 class PayrollItem(models.Model):
@@ -135,10 +148,24 @@ class PayrollEntry(models.Model):
     class Meta:
         unique_together = ('contract', 'period')
         ordering = ['-period__start_date', 'contract__employee__first_name']
+        indexes = [
+            # Pending entries are a small, shrinking subset once a period is approved; lookups by
+            # period alone, approved or not, use the foreign key index
+            models.Index(fields=['period'], name='entry_pending_idx', condition=models.Q(is_approved=False)),
+            # Cursor pagination key
+            models.Index(fields=['-created_at', '-id'], name='entry_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.contract.employee} - {self.period}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The summary signals compute the delta of a later save from the loaded values
+        instance._loaded_values = (field_names, values)
+        return instance
+    
     def approve(self, user):
         """Approve the payroll entry"""
         if self.is_approved:
@@ -156,14 +183,8 @@ class PayrollEntry(models.Model):
     
     def calculate_totals(self):
         """Calculate totals based on details"""
-        earning_details = self.details.filter(payroll_item__item_type='EARNING')
-        deduction_details = self.details.filter(payroll_item__item_type='DEDUCTION')
-        
-        self.total_earnings = sum(detail.amount * detail.quantity for detail in earning_details)
-        self.total_deductions = sum(detail.amount * detail.quantity for detail in deduction_details)
-        self.net_pay = self.total_earnings - self.total_deductions
-        
-        self.save()
+        from .services import PayrollTotalsService
+        PayrollTotalsService.recalculate_entry(self)
 
 class PayrollEntryDetail(models.Model):
     """Detail of a payroll entry"""
@@ -177,14 +198,67 @@ class PayrollEntryDetail(models.Model):
         return f"{self.payroll_entry} - {self.payroll_item}"
 
 
-@receiver(post_save, sender=PayrollEntryDetail)
-def update_payroll_entry_totals(sender, instance, created, **kwargs):
-    """Update payroll entry totals when detail is saved"""
-    # Skip if we're in a bulk operation to prevent multiple recalculations
-    if kwargs.get('raw', False):
-        return
-        
-    instance.payroll_entry.calculate_totals()
+class PayrollSummaryTotals(models.Model):
+    """Counters and totals shared by the payroll summary tables"""
+    entries_count = models.IntegerField(default=0)
+    approved_count = models.IntegerField(default=0)
+    pending_count = models.IntegerField(default=0)
+    total_earnings = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    total_deductions = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    total_net_pay = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        abstract = True
+
+class PayrollPeriodSummary(PayrollSummaryTotals):
+    """Denormalised totals of a payroll period, maintained incrementally"""
+    period = models.OneToOneField(PayrollPeriod, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    
+    class Meta:
+        verbose_name_plural = "Payroll period summaries"
+    
+    def __str__(self):
+        return f"{self.period} - {self.entries_count} entries"
+
+class PayrollPeriodDepartmentSummary(PayrollSummaryTotals):
+    """Per-department breakdown of a payroll period summary"""
+    period = models.ForeignKey(PayrollPeriod, on_delete=models.CASCADE, related_name='department_summaries')
+    department = models.CharField(max_length=100)
+    
+    class Meta:
+        unique_together = ('period', 'department')
+        ordering = ['department']
+        verbose_name_plural = "Payroll period department summaries"
+    
+    def __str__(self):
+        return f"{self.period} - {self.department}"
+
+class PayrollPeriodSnapshot(models.Model):
+    """Frozen content of a closed payroll period, written once when the period is closed"""
+    period = models.OneToOneField(PayrollPeriod, on_delete=models.PROTECT, primary_key=True, related_name='snapshot')
+    format_version = models.PositiveSmallIntegerField(default=1)
+    entries_count = models.IntegerField()
+    approved_count = models.IntegerField()
+    total_earnings = models.DecimalField(max_digits=16, decimal_places=2)
+    total_deductions = models.DecimalField(max_digits=16, decimal_places=2)
+    total_net_pay = models.DecimalField(max_digits=16, decimal_places=2)
+    item_totals = models.JSONField(default=list)
+    department_totals = models.JSONField(default=list)
+    # zlib-compressed line-delimited canonical JSON of every entry with its item amounts, in cents
+    payload = models.BinaryField()
+    payload_size = models.PositiveIntegerField()
+    checksum = models.CharField(max_length=64)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.period} - {self.checksum[:12]}"
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Payroll period snapshots are immutable")
+        super().save(*args, **kwargs)
 
 @receiver(pre_save, sender=PayrollEntry)
 def set_base_salary(sender, instance, **kwargs):
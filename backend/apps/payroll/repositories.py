@@ -1,22 +1,31 @@
 """Repository pattern for Payroll app."""
-from .models import Contract, PayrollPeriod, PayrollEntry, PayrollItem
-from django.db.models import Q
+from .models import Contract, PayrollPeriod, PayrollEntry, PayrollEntryDetail, PayrollItem
+from django.db.models import Prefetch, Q
+from apps.core.cache import get_catalog
+
+ITEMS_CATALOG = 'payroll.items'
 
 class ContractRepository:
     """Repository for Contract model."""
     
+    @staticmethod
+    def with_related(queryset=None):
+        """Join the employee read by ContractSerializer."""
+        queryset = Contract.objects.all() if queryset is None else queryset
+        return queryset.select_related('employee')
+    
     @staticmethod
     def get_active_contracts():
         """Return all active contracts."""
-        return Contract.objects.filter(is_active=True)
+        return ContractRepository.with_related(Contract.objects.filter(is_active=True))
     
     @staticmethod
     def get_by_employee(employee_id):
         """Return active contracts for an employee."""
-        return Contract.objects.filter(
+        return ContractRepository.with_related(Contract.objects.filter(
             employee_id=employee_id,
             is_active=True
-        )
+        ))
     
     @staticmethod
     def get_current_contract(employee_id):
@@ -42,22 +51,46 @@ class PayrollPeriodRepository:
 class PayrollEntryRepository:
     """Repository for PayrollEntry model."""
     
+    @staticmethod
+    def with_related(queryset=None):
+        """Join and prefetch what PayrollEntrySerializer reads, in two queries for any number of entries."""
+        queryset = PayrollEntry.objects.all() if queryset is None else queryset
+        return queryset.select_related('contract__employee', 'period', 'approved_by').prefetch_related(
+            Prefetch('details', queryset=PayrollEntryDetailRepository.with_related().order_by('id'))
+        )
+    
     @staticmethod
     def get_by_period(period_id):
         """Return all entries for a specific period."""
-        return PayrollEntry.objects.filter(period_id=period_id)
+        return PayrollEntryRepository.with_related(PayrollEntry.objects.filter(period_id=period_id))
     
     @staticmethod
     def get_by_employee(employee_id):
         """Return all entries for a specific employee."""
-        return PayrollEntry.objects.filter(
+        return PayrollEntryRepository.with_related(PayrollEntry.objects.filter(
             contract__employee_id=employee_id
-        ).order_by('-period__end_date')
+        ).order_by('-period__end_date'))
     
     @staticmethod
     def get_pending_approval():
         """Return all entries pending approval."""
-        return PayrollEntry.objects.filter(is_approved=False)
+        return PayrollEntryRepository.with_related(PayrollEntry.objects.filter(is_approved=False))
+
+class PayrollEntryDetailRepository:
+    """Repository for PayrollEntryDetail model."""
+    
+    @staticmethod
+    def with_related(queryset=None):
+        """Join the payroll item read by PayrollEntryDetailSerializer."""
+        queryset = PayrollEntryDetail.objects.all() if queryset is None else queryset
+        return queryset.select_related('payroll_item')
+    
+    @staticmethod
+    def get_by_entry(entry_id):
+        """Return the details of a payroll entry."""
+        return PayrollEntryDetailRepository.with_related(
+            PayrollEntryDetail.objects.filter(payroll_entry_id=entry_id)
+        )
 
 class PayrollItemRepository:
     """Repository for PayrollItem model."""
@@ -74,3 +107,13 @@ class PayrollItemRepository:
             item_type=item_type,
             is_active=True
         )
+    
+    @staticmethod
+    def get_cached_active_items():
+        """Return the active payroll items from the catalog cache, ordered by id."""
+        return [item for item in get_catalog(ITEMS_CATALOG) if item.is_active]
+    
+    @staticmethod
+    def get_cached_by_type(item_type):
+        """Return the active payroll items of a type from the catalog cache."""
+        return [item for item in PayrollItemRepository.get_cached_active_items() if item.item_type == item_type]
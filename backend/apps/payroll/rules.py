@@ -0,0 +1,175 @@
+"""
+Payroll rule engine.
+
+Active ``PayrollItem`` definitions are compiled into a ``PayrollRuleSet``,
+one ``PayrollRule`` per item; this is the only place where the amount of an
+item is defined:
+
+- ``BASIC_SALARY``: the contract salary.
+- Percentage items: ``salary * default_amount / 100`` rounded half up to the
+  cent.
+- Other items: ``default_amount`` for every contract.
+
+A rule is evaluated in two ways from the same compiled rate. ``amount``
+returns the ``Decimal`` amount for one salary; the payroll run uses it, as
+the ORM stores ``Decimal`` amounts. ``evaluate`` is a single pass over a
+column of salaries in integer cents held in ``array('q')``, with the rate as
+an exact integer fraction; the salary simulation uses it through
+``evaluate_cents``. Both agree to the cent.
+
+Usage::
+
+    rules = PayrollRuleSet.compile(items).rules
+    rules[0].amount(salary)                           # Decimal amount for one salary
+
+    result = PayrollRuleSet.compile(items).evaluate_cents(to_cents_array(salaries))
+    result.earnings, result.deductions                # total columns in cents
+    result.columns                                    # amount column of each rule, in cents
+"""
+
+from array import array
+from decimal import Decimal, ROUND_HALF_UP
+from fractions import Fraction
+from itertools import repeat
+
+from .repositories import PayrollItemRepository
+
+# Code of the payroll item that carries the contract salary
+BASIC_SALARY_CODE = 'BASIC_SALARY'
+
+CENTS = Decimal('0.01')
+
+
+def to_cents(amount):
+    """Convert a Decimal amount to integer cents, rounding half up."""
+    return int((Decimal(amount) * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents):
+    """Convert integer cents to a Decimal with two decimal places."""
+    return Decimal(cents).scaleb(-2)
+
+
+def to_cents_array(amounts):
+    """Convert a sequence of Decimals to an array of cents, rounding half up."""
+    scaled = map(Decimal.scaleb, amounts, repeat(2))
+    return array('q', map(int, map(Decimal.to_integral_value, scaled, repeat(ROUND_HALF_UP))))
+
+
+def sum_columns(columns, size):
+    """Return the element-wise sum of columns of cents."""
+    if not columns:
+        return array('q', bytes(8 * size))
+    return array('q', map(sum, zip(*columns)))
+
+
+class PayrollRule:
+    """A compiled payroll item."""
+
+    SALARY = 'salary'
+    PERCENTAGE = 'percentage'
+    FIXED = 'fixed'
+
+    __slots__ = (
+        'item_id', 'code', 'item_type', 'kind', 'cents', 'fixed_amount', 'rate', 'numerator', 'denominator'
+    )
+
+    def __init__(self, item):
+        self.item_id = item.id
+        self.code = item.code
+        self.item_type = item.item_type
+        self.cents = 0
+        self.fixed_amount = self.rate = None
+        self.numerator = self.denominator = 1
+        if item.code == BASIC_SALARY_CODE:
+            self.kind = self.SALARY
+        elif item.is_percentage:
+            self.kind = self.PERCENTAGE
+            self.rate = Decimal(item.default_amount) / 100
+            self.numerator, self.denominator = Fraction(self.rate).as_integer_ratio()
+        else:
+            self.kind = self.FIXED
+            self.cents = to_cents(item.default_amount)
+            self.fixed_amount = from_cents(self.cents)
+
+    @property
+    def is_earning(self):
+        return self.item_type == 'EARNING'
+
+    def amount(self, salary):
+        """Return the Decimal amount of the rule for a Decimal salary with two decimal places."""
+        if self.kind == self.SALARY:
+            return salary
+        if self.kind == self.FIXED:
+            return self.fixed_amount
+        return (salary * self.rate).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+    def evaluate(self, salaries):
+        """Return the amounts in cents of the rule for a column of salaries in cents."""
+        if self.kind == self.SALARY:
+            return salaries
+        if self.kind == self.FIXED:
+            return array('q', [self.cents]) * len(salaries)
+        return percentage_column(salaries, self.numerator, self.denominator)
+
+
+def percentage_fraction(percentage):
+    """Return percentage / 100 as an exact (numerator, denominator) pair."""
+    rate = Fraction(percentage) / 100
+    return rate.numerator, rate.denominator
+
+
+def percentage_column(values, numerator, denominator):
+    """Return each value of a column of cents times numerator / denominator, rounded half up to the cent."""
+    twice, half = 2 * numerator, denominator
+    double_denominator = 2 * denominator
+    if numerator >= 0 and (not values or min(values) >= 0):
+        # Half up: floor((2 * s * n + d) / 2d) for non-negative products
+        return array('q', [(s * twice + half) // double_denominator for s in values])
+    return array('q', [_round_half_up(s * numerator, denominator) for s in values])
+
+
+def _round_half_up(numerator, denominator):
+    """Round numerator / denominator half away from zero, as Decimal ROUND_HALF_UP."""
+    quotient = (2 * abs(numerator) + denominator) // (2 * denominator)
+    return quotient if numerator >= 0 else -quotient
+
+
+class PayrollRuleResult:
+    """Amount columns of a rule set evaluated over a column of salaries."""
+
+    def __init__(self, rules, columns, earnings, deductions):
+        self.rules = rules
+        self.columns = columns
+        self.earnings = earnings
+        self.deductions = deductions
+
+    def __len__(self):
+        return len(self.earnings)
+
+
+class PayrollRuleSet:
+    """Compiled payroll items, evaluated column-wise."""
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+
+    @classmethod
+    def compile(cls, items):
+        return cls(PayrollRule(item) for item in items)
+
+    @classmethod
+    def for_active_items(cls):
+        """Compile the active payroll items from the catalog cache."""
+        return cls.compile(PayrollItemRepository.get_cached_active_items())
+
+    def evaluate_cents(self, salaries):
+        """Evaluate the rules for an array of salaries in cents."""
+        columns = [rule.evaluate(salaries) for rule in self.rules]
+        earnings = sum_columns(
+            [column for rule, column in zip(self.rules, columns) if rule.is_earning], len(salaries)
+        )
+        deductions = sum_columns(
+            [column for rule, column in zip(self.rules, columns) if not rule.is_earning], len(salaries)
+        )
+        return PayrollRuleResult(self.rules, columns, earnings, deductions)
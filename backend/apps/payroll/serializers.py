@@ -1,5 +1,11 @@
 from rest_framework import serializers
-from .models import Contract, PayrollPeriod, PayrollItem, PayrollEntry, PayrollEntryDetail
+from apps.core.serializers import SparseFieldsetMixin
+from .models import (
+    Contract, PayrollPeriod, PayrollItem, PayrollEntry, PayrollEntryDetail,
+    PayrollPeriodSummary, PayrollPeriodDepartmentSummary
+)
+from .services import PayrollSummaryService
+from .rules import PayrollRuleSet
 from apps.affiliation.models import Employee
 from decimal import Decimal
 from django.utils import timezone
@@ -7,7 +13,7 @@ import logging
 
 logger = logging.getLogger('apps.payroll')
 
-class ContractSerializer(serializers.ModelSerializer):
+class ContractSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     employee_name = serializers.ReadOnlyField(source='employee.__str__')
     employee_full_name = serializers.ReadOnlyField(source='employee.get_full_name')
     
@@ -41,22 +47,23 @@ class ContractSerializer(serializers.ModelSerializer):
         logger.info(f"Contract created successfully with ID: {contract.id}")
         return contract
 
-class PayrollPeriodSerializer(serializers.ModelSerializer):
+class PayrollPeriodSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     entries_count = serializers.SerializerMethodField()
     total_net_pay = serializers.SerializerMethodField()
     
     class Meta:
         model = PayrollPeriod
         fields = '__all__'
+        # Periods are closed through the close action, which freezes their snapshot
+        read_only_fields = ('is_closed', 'closed_by', 'closed_at')
     
     def get_entries_count(self, obj):
         """Get number of payroll entries in this period"""
-        return obj.payrollentry_set.count()
+        return PayrollSummaryService.for_period(obj).entries_count
     
     def get_total_net_pay(self, obj):
         """Get total net pay for this period"""
-        entries = obj.payrollentry_set.all()
-        return sum(entry.net_pay for entry in entries)
+        return PayrollSummaryService.for_period(obj).total_net_pay
     
     def validate(self, data):
         """Validate payroll period data"""
@@ -83,7 +90,7 @@ class PayrollPeriodSerializer(serializers.ModelSerializer):
         
         return data
 
-class PayrollItemSerializer(serializers.ModelSerializer):
+class PayrollItemSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = PayrollItem
         fields = '__all__'
@@ -126,7 +133,7 @@ class PayrollEntryDetailCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("La cantidad debe ser mayor a cero")
         return value
 
-class PayrollEntryDetailSerializer(serializers.ModelSerializer):
+class PayrollEntryDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     item_name = serializers.ReadOnlyField(source='payroll_item.name')
     item_type = serializers.ReadOnlyField(source='payroll_item.item_type')
     item_code = serializers.ReadOnlyField(source='payroll_item.code')
@@ -168,8 +175,12 @@ class PayrollEntryCreateSerializer(serializers.ModelSerializer):
         return data
     
     def create(self, validated_data):
-        """Create payroll entry with details"""
-        details_data = validated_data.pop('details', [])
+        """Create payroll entry with details.
+
+        Without a ``details`` key the details are computed from the active
+        payroll items for the base salary.
+        """
+        details_data = validated_data.pop('details', None)
         
         # Set created_by if available in context
         request = self.context.get('request')
@@ -185,19 +196,28 @@ class PayrollEntryCreateSerializer(serializers.ModelSerializer):
         validated_data['total_deductions'] = Decimal('0.00')
         validated_data['net_pay'] = Decimal('0.00')
         
+        if details_data is None:
+            details_data = []
+            for rule in PayrollRuleSet.for_active_items().rules:
+                amount = rule.amount(validated_data['base_salary'])
+                if amount:
+                    details_data.append({'payroll_item_id': rule.item_id, 'amount': amount, 'quantity': 1})
+        
         entry = PayrollEntry.objects.create(**validated_data)
         
-        # Create details
-        for detail_data in details_data:
-            PayrollEntryDetail.objects.create(payroll_entry=entry, **detail_data)
+        # Create details in one INSERT; bulk_create skips the per-detail signals
+        PayrollEntryDetail.objects.bulk_create([
+            PayrollEntryDetail(payroll_entry=entry, **detail_data)
+            for detail_data in details_data
+        ])
         
-        # Calculate totals
+        # Calculate totals once for all details
         entry.calculate_totals()
         
         logger.info(f"Payroll entry created with {len(details_data)} details - ID: {entry.id}")
         return entry
 
-class PayrollEntrySerializer(serializers.ModelSerializer):
+class PayrollEntrySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     details = PayrollEntryDetailSerializer(many=True, read_only=True)
     employee_name = serializers.ReadOnlyField(source='contract.employee.__str__')
     employee_full_name = serializers.ReadOnlyField(source='contract.employee.get_full_name')
@@ -217,6 +237,19 @@ class PayrollEntrySerializer(serializers.ModelSerializer):
         return None
 
 # Summary serializers for dashboard/reports
+class PayrollPeriodDepartmentSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PayrollPeriodDepartmentSummary
+        exclude = ('id', 'period')
+
+class PayrollPeriodSummarySerializer(serializers.ModelSerializer):
+    period_name = serializers.ReadOnlyField(source='period.name')
+    departments = PayrollPeriodDepartmentSummarySerializer(source='period.department_summaries', many=True, read_only=True)
+    
+    class Meta:
+        model = PayrollPeriodSummary
+        fields = '__all__'
+
 class PayrollSummarySerializer(serializers.Serializer):
     """Serializer for payroll summary data"""
     total_employees = serializers.IntegerField()
@@ -226,3 +259,58 @@ class PayrollSummarySerializer(serializers.Serializer):
     total_net_pay = serializers.DecimalField(max_digits=12, decimal_places=2)
     approved_entries = serializers.IntegerField()
     pending_entries = serializers.IntegerField()
+
+class SimulationRaiseSerializer(serializers.Serializer):
+    """Percentage raise of a department, or of every department if none is given"""
+    department = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    percentage = serializers.DecimalField(max_digits=7, decimal_places=4, min_value=Decimal('-99.9999'))
+
+class SimulationItemSerializer(serializers.Serializer):
+    """New payroll item of a simulation"""
+    name = serializers.CharField(max_length=100)
+    item_type = serializers.ChoiceField(choices=PayrollItem.ITEM_TYPES)
+    amount = serializers.DecimalField(max_digits=12, decimal_places=4)
+    is_percentage = serializers.BooleanField(default=False)
+    department = serializers.CharField(max_length=100, required=False, allow_blank=True)
+
+class SimulationHeadcountSerializer(serializers.Serializer):
+    """Employees added to (positive) or removed from (negative) a department"""
+    department = serializers.CharField(max_length=100)
+    change = serializers.IntegerField()
+    salary = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'), required=False)
+
+    def validate_change(self, value):
+        if value == 0:
+            raise serializers.ValidationError("El cambio de personal no puede ser cero")
+        return value
+
+class SalarySimulationSerializer(serializers.Serializer):
+    """Scenario of a salary simulation"""
+    raises = SimulationRaiseSerializer(many=True, required=False, default=list)
+    items = SimulationItemSerializer(many=True, required=False, default=list)
+    headcount = SimulationHeadcountSerializer(many=True, required=False, default=list)
+
+    def validate(self, data):
+        if not (data['raises'] or data['items'] or data['headcount']):
+            raise serializers.ValidationError("El escenario debe incluir al menos un aumento, concepto o cambio de personal")
+        return data
+
+class PayrollEntryBulkApproveSerializer(serializers.Serializer):
+    """Selection of the payroll entries to approve"""
+    period = serializers.PrimaryKeyRelatedField(queryset=PayrollPeriod.objects.all(), required=False)
+    department = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    entry_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False, max_length=50000
+    )
+
+    def validate(self, data):
+        if not data.get('period') and not data.get('entry_ids'):
+            raise serializers.ValidationError("Indique un período o una lista de entradas (entry_ids)")
+        return data
+
+class PayrollVarianceQuerySerializer(serializers.Serializer):
+    """Options of the period variance report"""
+    previous = serializers.PrimaryKeyRelatedField(queryset=PayrollPeriod.objects.all(), required=False)
+    z = serializers.DecimalField(max_digits=5, decimal_places=2, min_value=Decimal('0.5'), default=Decimal('3'))
+    threshold = serializers.DecimalField(max_digits=7, decimal_places=2, min_value=Decimal('0'), default=Decimal('20'))
+    outliers = serializers.BooleanField(default=False)
@@ -0,0 +1,488 @@
+"""Service layer for set-based payroll operations."""
+import logging
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import (
+    Contract, PayrollPeriod, PayrollEntry, PayrollEntryDetail, PayrollItem,
+    PayrollPeriodSummary, PayrollPeriodDepartmentSummary
+)
+from .repositories import PayrollItemRepository
+from .rules import PayrollRuleSet
+from .variance import invalidate_period_variance
+
+logger = logging.getLogger('apps.payroll')
+
+CENTS = Decimal('0.01')
+
+
+class PayrollRunEngine:
+    """Batch engine that computes and persists a whole payroll period.
+
+    Contracts and payroll items are loaded once, every entry and detail is
+    computed in memory and the result is written with ``bulk_create`` in
+    chunks inside a single transaction. Totals are computed up front, so no
+    per-detail signal or ``calculate_totals()`` call is involved.
+    """
+
+    DEFAULT_CHUNK_SIZE = 1000
+
+    def __init__(self, period, user=None, chunk_size=None):
+        self.period = period
+        self.user = user
+        self.chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
+        self.skipped_existing = 0
+        self.timings = {}
+
+    def run(self):
+        """Run payroll for the period and return a report of the run."""
+        started = time.perf_counter()
+
+        with transaction.atomic():
+            # Lock the period so two runs for it cannot interleave
+            period = PayrollPeriod.objects.select_for_update().get(pk=self.period.pk)
+            if period.is_closed:
+                raise ValueError("Cannot run payroll for a closed period")
+
+            step = time.perf_counter()
+            contracts, items = self.load()
+            self.timings['load'] = time.perf_counter() - step
+
+            step = time.perf_counter()
+            computed = self.compute(contracts, items)
+            self.timings['compute'] = time.perf_counter() - step
+
+            step = time.perf_counter()
+            entries_created, details_created = self.persist(computed)
+            PayrollSummaryService.rebuild_period(self.period.id)
+            self.timings['persist'] = time.perf_counter() - step
+
+        self.timings['total'] = time.perf_counter() - started
+
+        report = {
+            'period': self.period.id,
+            'contracts': len(contracts),
+            'skipped_existing': self.skipped_existing,
+            'payroll_items': len(items),
+            'entries_created': entries_created,
+            'details_created': details_created,
+            'chunk_size': self.chunk_size,
+            'timings_ms': {
+                name: round(seconds * 1000, 2) for name, seconds in self.timings.items()
+            },
+        }
+        logger.info(f"Payroll run finished for period {self.period.id}: {report}")
+        return report
+
+    def load(self):
+        """Load active contracts without an entry in the period and active items."""
+        existing_ids = set(
+            PayrollEntry.objects.filter(period=self.period).values_list('contract_id', flat=True)
+        )
+        contracts = list(
+            Contract.objects.filter(is_active=True)
+            .only('id', 'salary')
+            .order_by('id')
+        )
+        self.skipped_existing = sum(1 for contract in contracts if contract.id in existing_ids)
+        contracts = [contract for contract in contracts if contract.id not in existing_ids]
+
+        items = PayrollItemRepository.get_cached_active_items()
+        return contracts, items
+
+    def compute(self, contracts, items):
+        """Compute entries and their details in memory.
+
+        The items are compiled into a ``PayrollRuleSet`` once and their
+        ``Decimal`` amounts computed per contract. Returns a list of
+        ``(entry, details)`` tuples with unsaved instances.
+        """
+        rules = PayrollRuleSet.compile(items).rules
+        computed = []
+
+        for contract in contracts:
+            total_earnings = Decimal('0.00')
+            total_deductions = Decimal('0.00')
+            details = []
+
+            for rule in rules:
+                amount = rule.amount(contract.salary)
+                if not amount:
+                    continue
+
+                if rule.is_earning:
+                    total_earnings += amount
+                else:
+                    total_deductions += amount
+
+                details.append(PayrollEntryDetail(payroll_item_id=rule.item_id, amount=amount, quantity=1))
+
+            entry = PayrollEntry(
+                contract_id=contract.id,
+                period_id=self.period.id,
+                base_salary=contract.salary,
+                total_earnings=total_earnings,
+                total_deductions=total_deductions,
+                net_pay=total_earnings - total_deductions,
+                created_by=self.user,
+            )
+            computed.append((entry, details))
+
+        return computed
+
+    def persist(self, computed):
+        """Insert entries and details in chunks. Returns the inserted row counts."""
+        entries_created = 0
+        details_created = 0
+
+        for start in range(0, len(computed), self.chunk_size):
+            chunk = computed[start:start + self.chunk_size]
+
+            entries = PayrollEntry.objects.bulk_create([entry for entry, _ in chunk])
+            entries_created += len(entries)
+
+            details = []
+            for entry, entry_details in chunk:
+                for detail in entry_details:
+                    detail.payroll_entry_id = entry.id
+                    details.append(detail)
+
+            PayrollEntryDetail.objects.bulk_create(details, batch_size=self.chunk_size)
+            details_created += len(details)
+
+        return entries_created, details_created
+
+
+class PayrollTotalsService:
+    """Recalculation of ``PayrollEntry`` totals from their details.
+
+    Totals are always computed in the database: a single conditional
+    ``Sum(amount * quantity)`` for one entry, or a single
+    ``UPDATE ... FROM`` statement for a list of entries or a whole period.
+    """
+
+    # Max ids per statement on backends without array parameters
+    IN_CLAUSE_CHUNK = 500
+
+    UPDATE_FROM_SQL = """
+        UPDATE {entry} SET
+            total_earnings = agg.total_earnings,
+            total_deductions = agg.total_deductions,
+            net_pay = agg.total_earnings - agg.total_deductions,
+            updated_at = %s
+        FROM (
+            SELECT
+                e.id AS entry_id,
+                ROUND(COALESCE(SUM(CASE WHEN i.item_type = 'EARNING'
+                                        THEN d.amount * d.quantity END), 0), 2) AS total_earnings,
+                ROUND(COALESCE(SUM(CASE WHEN i.item_type = 'DEDUCTION'
+                                        THEN d.amount * d.quantity END), 0), 2) AS total_deductions
+            FROM {entry} e
+            LEFT JOIN {detail} d ON d.payroll_entry_id = e.id
+            LEFT JOIN {item} i ON i.id = d.payroll_item_id
+            WHERE {where}
+            GROUP BY e.id
+        ) agg
+        WHERE {entry}.id = agg.entry_id
+    """
+
+    @staticmethod
+    def aggregate(entry_id):
+        """Return ``(total_earnings, total_deductions)`` for an entry in one query."""
+        line_total = ExpressionWrapper(
+            F('amount') * F('quantity'),
+            output_field=DecimalField(max_digits=16, decimal_places=4)
+        )
+        zero = Value(Decimal('0.00'), output_field=DecimalField(max_digits=16, decimal_places=4))
+
+        totals = PayrollEntryDetail.objects.filter(payroll_entry_id=entry_id).aggregate(
+            total_earnings=Coalesce(Sum(line_total, filter=Q(payroll_item__item_type='EARNING')), zero),
+            total_deductions=Coalesce(Sum(line_total, filter=Q(payroll_item__item_type='DEDUCTION')), zero),
+        )
+        return (
+            Decimal(totals['total_earnings']).quantize(CENTS, rounding=ROUND_HALF_UP),
+            Decimal(totals['total_deductions']).quantize(CENTS, rounding=ROUND_HALF_UP),
+        )
+
+    @classmethod
+    def recalculate_entry(cls, entry):
+        """Recalculate and save the totals of a single entry."""
+        entry.total_earnings, entry.total_deductions = cls.aggregate(entry.pk)
+        entry.net_pay = entry.total_earnings - entry.total_deductions
+        entry.save(update_fields=['total_earnings', 'total_deductions', 'net_pay', 'updated_at'])
+        return entry
+
+    @classmethod
+    def recalculate_entries(cls, entry_ids):
+        """Recalculate the totals of many entries. Returns the number of rows updated."""
+        entry_ids = sorted(set(entry_ids))
+        if not entry_ids:
+            return 0
+
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                updated = cls._update_from('e.id = ANY(%s)', [entry_ids])
+            else:
+                updated = 0
+                for start in range(0, len(entry_ids), cls.IN_CLAUSE_CHUNK):
+                    chunk = entry_ids[start:start + cls.IN_CLAUSE_CHUNK]
+                    placeholders = ', '.join(['%s'] * len(chunk))
+                    updated += cls._update_from(f'e.id IN ({placeholders})', chunk)
+
+            period_ids = PayrollEntry.objects.filter(id__in=entry_ids).values_list('period_id', flat=True).distinct()
+            PayrollSummaryService.rebuild_periods(period_ids)
+        return updated
+
+    @classmethod
+    def recalculate_period(cls, period_id):
+        """Recalculate the totals of every entry of a period in one statement."""
+        with transaction.atomic():
+            updated = cls._update_from('e.period_id = %s', [period_id])
+            PayrollSummaryService.rebuild_period(period_id)
+        return updated
+
+    @classmethod
+    def _update_from(cls, where, params):
+        sql = cls.UPDATE_FROM_SQL.format(
+            entry=connection.ops.quote_name(PayrollEntry._meta.db_table),
+            detail=connection.ops.quote_name(PayrollEntryDetail._meta.db_table),
+            item=connection.ops.quote_name(PayrollItem._meta.db_table),
+            where=where,
+        )
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [now, *params])
+            return cursor.rowcount
+
+
+class PayrollSummaryService:
+    """Maintenance of ``PayrollPeriodSummary`` and its department breakdown.
+
+    Single-entry changes are applied as deltas with ``F()`` expressions, so a
+    save costs a couple of UPDATEs regardless of the period size. Set-based
+    operations (payroll runs, mass recalculations) rebuild the affected
+    periods with one grouped aggregate instead.
+    """
+
+    FIELDS = (
+        'entries_count', 'approved_count', 'pending_count',
+        'total_earnings', 'total_deductions', 'total_net_pay',
+    )
+
+    @staticmethod
+    def entry_values(entry, sign=1):
+        """Return the summary contribution of an entry, negated when ``sign`` is -1."""
+        return {
+            'entries_count': sign,
+            'approved_count': sign if entry.is_approved else 0,
+            'pending_count': 0 if entry.is_approved else sign,
+            'total_earnings': sign * (entry.total_earnings or 0),
+            'total_deductions': sign * (entry.total_deductions or 0),
+            'total_net_pay': sign * (entry.net_pay or 0),
+        }
+
+    @classmethod
+    def apply_delta(cls, period_id, department, deltas):
+        """Add ``deltas`` to the period summary and to its department row."""
+        cls.apply_department_deltas(period_id, {department: deltas})
+
+    @classmethod
+    def apply_department_deltas(cls, period_id, deltas_by_department):
+        """Add the deltas of several departments to their rows and their sum to the period summary."""
+        invalidate_period_variance(period_id)
+        totals = {}
+        for deltas in deltas_by_department.values():
+            for field, value in deltas.items():
+                totals[field] = totals.get(field, 0) + value
+        updates = {field: F(field) + value for field, value in totals.items() if value}
+        if not updates:
+            return
+
+        with transaction.atomic():
+            if not PayrollPeriodSummary.objects.filter(period_id=period_id).update(**updates):
+                # No summary yet: build it from the entries, which already include this change
+                cls.rebuild_period(period_id)
+                return
+
+            for department, deltas in deltas_by_department.items():
+                department_updates = {field: F(field) + value for field, value in deltas.items() if value}
+                if not department_updates:
+                    continue
+                updated = PayrollPeriodDepartmentSummary.objects.filter(
+                    period_id=period_id, department=department
+                ).update(**department_updates)
+                if not updated:
+                    PayrollPeriodDepartmentSummary.objects.create(
+                        period_id=period_id, department=department, **deltas
+                    )
+                elif deltas.get('entries_count', 0) < 0:
+                    # Drop departments left without entries, as a rebuild would
+                    PayrollPeriodDepartmentSummary.objects.filter(
+                        period_id=period_id, department=department, entries_count=0
+                    ).delete()
+
+    @classmethod
+    def rebuild_period(cls, period_id):
+        """Rebuild the summary of a period from its entries."""
+        invalidate_period_variance(period_id)
+        rows = PayrollEntry.objects.filter(period_id=period_id).values('contract__department').annotate(
+            entries_count=Count('id'),
+            approved_count=Count('id', filter=Q(is_approved=True)),
+            pending_count=Count('id', filter=Q(is_approved=False)),
+            total_earnings=Sum('total_earnings'),
+            total_deductions=Sum('total_deductions'),
+            total_net_pay=Sum('net_pay'),
+        ).order_by()
+
+        totals = {field: 0 for field in cls.FIELDS}
+        departments = []
+        for row in rows:
+            values = {field: row[field] or 0 for field in cls.FIELDS}
+            departments.append(PayrollPeriodDepartmentSummary(
+                period_id=period_id, department=row['contract__department'], **values
+            ))
+            for field in cls.FIELDS:
+                totals[field] += values[field]
+
+        with transaction.atomic():
+            summary, _ = PayrollPeriodSummary.objects.update_or_create(period_id=period_id, defaults=totals)
+            PayrollPeriodDepartmentSummary.objects.filter(period_id=period_id).delete()
+            PayrollPeriodDepartmentSummary.objects.bulk_create(departments)
+        return summary
+
+    @classmethod
+    def rebuild_periods(cls, period_ids):
+        """Rebuild the summaries of several periods."""
+        for period_id in set(period_ids):
+            cls.rebuild_period(period_id)
+
+    @classmethod
+    def for_period(cls, period):
+        """Return the summary of a period without writing.
+
+        Summaries are built by migration 0002 and kept up to date on every
+        write, so a period without one has no entries: an unsaved empty
+        summary is returned for it.
+        """
+        try:
+            return period.summary
+        except PayrollPeriodSummary.DoesNotExist:
+            return PayrollPeriodSummary(period=period)
+
+
+class PayrollApprovalService:
+    """Set-based approval of payroll entries.
+
+    The selected pending entries are approved with one ``UPDATE ... RETURNING``
+    and the period summaries are adjusted once per period, instead of loading
+    and saving every entry.
+    """
+
+    # Max ids per statement on backends without array parameters
+    IN_CLAUSE_CHUNK = 500
+
+    APPROVE_SQL = """
+        UPDATE {entry} SET is_approved = %s, approved_by_id = %s, approved_at = %s, updated_at = %s
+        WHERE is_approved = %s AND {where}
+        RETURNING id, period_id, contract_id
+    """
+
+    @classmethod
+    def approve_entries(cls, user, period_id=None, department=None, entry_ids=None):
+        """
+        Approve the pending entries of a period, optionally of one department, and/or of a list of ids.
+
+        The periods involved are locked and must be open. Returns a report
+        with the number of entries approved, per period and department.
+        """
+        if period_id is None and not entry_ids:
+            raise ValueError("Indique un período o una lista de entradas")
+        entry_ids = sorted(set(entry_ids)) if entry_ids else None
+
+        conditions, params = [], []
+        if period_id is not None:
+            conditions.append('period_id = %s')
+            params.append(period_id)
+        if department:
+            conditions.append(f'contract_id IN (SELECT id FROM {connection.ops.quote_name(Contract._meta.db_table)} '
+                              f'WHERE department = %s)')
+            params.append(department)
+
+        with transaction.atomic():
+            # Lock the periods so they cannot be closed while their entries are approved
+            if period_id is not None:
+                period_ids = [period_id]
+            else:
+                period_ids = PayrollEntry.objects.filter(id__in=entry_ids).values_list('period_id', flat=True).distinct()
+            periods = list(
+                PayrollPeriod.objects.select_for_update().filter(pk__in=list(period_ids)).order_by('id')
+                .values_list('id', 'name', 'is_closed')
+            )
+            if period_id is not None and not periods:
+                raise PayrollPeriod.DoesNotExist(f"Payroll period {period_id} does not exist")
+            closed = [name for _, name, is_closed in periods if is_closed]
+            if closed:
+                raise ValueError(f"No se pueden aprobar entradas de períodos cerrados: {', '.join(closed)}")
+
+            rows = []
+            if entry_ids is None:
+                rows = cls._approve(user, ' AND '.join(conditions), params)
+            elif connection.vendor == 'postgresql':
+                rows = cls._approve(user, ' AND '.join([*conditions, 'id = ANY(%s)']), [*params, entry_ids])
+            else:
+                for start in range(0, len(entry_ids), cls.IN_CLAUSE_CHUNK):
+                    chunk = entry_ids[start:start + cls.IN_CLAUSE_CHUNK]
+                    placeholders = ', '.join(['%s'] * len(chunk))
+                    rows += cls._approve(user, ' AND '.join([*conditions, f'id IN ({placeholders})']), [*params, *chunk])
+
+            departments = dict(
+                Contract.objects.filter(id__in={contract_id for _, _, contract_id in rows})
+                .values_list('id', 'department')
+            )
+            approved = {}
+            for _, entry_period_id, contract_id in rows:
+                by_department = approved.setdefault(entry_period_id, {})
+                department_name = departments.get(contract_id)
+                by_department[department_name] = by_department.get(department_name, 0) + 1
+            for entry_period_id, by_department in approved.items():
+                PayrollSummaryService.apply_department_deltas(entry_period_id, {
+                    department_name: {'approved_count': count, 'pending_count': -count}
+                    for department_name, count in by_department.items()
+                })
+
+        report = {
+            'approved': len(rows),
+            'periods': [
+                {'period': entry_period_id, 'approved': sum(by_department.values()), 'departments': by_department}
+                for entry_period_id, by_department in sorted(approved.items())
+            ],
+        }
+        logger.info(
+            f"Approved {report['approved']} payroll entries - period: {period_id}, department: {department}, "
+            f"ids: {len(entry_ids) if entry_ids else 0}, user: {user}"
+        )
+        return report
+
+    @classmethod
+    def _approve(cls, user, where, params):
+        """Approve the pending entries matching ``where``; return their (id, period_id, contract_id)."""
+        now = timezone.now()
+        if connection.vendor in ('postgresql', 'sqlite') and connection.features.can_return_columns_from_insert:
+            sql = cls.APPROVE_SQL.format(entry=connection.ops.quote_name(PayrollEntry._meta.db_table), where=where)
+            timestamp = connection.ops.adapt_datetimefield_value(now)
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [True, user.pk if user else None, timestamp, timestamp, False, *params])
+                return [tuple(row) for row in cursor.fetchall()]
+
+        # Without UPDATE ... RETURNING: lock the rows, then update them by id
+        pending = PayrollEntry.objects.filter(is_approved=False).extra(where=[where], params=params)
+        rows = list(pending.select_for_update().values_list('id', 'period_id', 'contract_id'))
+        PayrollEntry.objects.filter(id__in=[row[0] for row in rows]).update(
+            is_approved=True, approved_by=user, approved_at=now, updated_at=now
+        )
+        return rows
@@ -1,27 +1,125 @@
-from django.db.models.signals import post_save, pre_save
+from types import SimpleNamespace
+
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import PayrollEntry, PayrollEntryDetail
-from decimal import Decimal
+from apps.core.batch import is_batching, mark_dirty, register_recompute
+from apps.core.cache import register_catalog
+from .models import Contract, PayrollEntry, PayrollEntryDetail, PayrollItem
+from .repositories import ITEMS_CATALOG
+from .services import PayrollTotalsService, PayrollSummaryService
+from .simulation import CONTRACT_BASE, ContractBase
+from .variance import invalidate_period_variance
+
+ENTRY_TOTALS = 'payroll.entry_totals'
+PERIOD_SUMMARY = 'payroll.period_summary'
+
+# Entry fields that feed the period summary
+SUMMARY_STATE_FIELDS = {'period_id', 'contract_id', 'is_approved', 'total_earnings', 'total_deductions', 'net_pay'}
+
+register_recompute(ENTRY_TOTALS, PayrollTotalsService.recalculate_entries)
+register_recompute(PERIOD_SUMMARY, PayrollSummaryService.rebuild_periods)
+
+register_catalog(ITEMS_CATALOG, lambda: list(PayrollItem.objects.order_by('id')), PayrollItem)
+# The baseline of the contract base depends on the payroll items too
+register_catalog(CONTRACT_BASE, ContractBase.load, Contract, PayrollItem)
 
 @receiver(post_save, sender=PayrollEntryDetail)
-def update_payroll_entry_totals(sender, instance, created, **kwargs):
-    """Update the payroll entry totals when a detail is added or updated."""
-    entry = instance.payroll_entry
-    
-    # Calculate totals
-    details = PayrollEntryDetail.objects.filter(payroll_entry=entry)
-    total_earnings = Decimal('0.00')
-    total_deductions = Decimal('0.00')
-    
-    for detail in details:
-        amount = detail.amount * detail.quantity
-        if detail.payroll_item.item_type == 'EARNING':
-            total_earnings += amount
-        else:  # DEDUCTION
-            total_deductions += amount
-    
-    # Update the entry
-    entry.total_earnings = total_earnings
-    entry.total_deductions = total_deductions
-    entry.net_pay = total_earnings - total_deductions
-    entry.save(update_fields=['total_earnings', 'total_deductions', 'net_pay'])
+@receiver(post_delete, sender=PayrollEntryDetail)
+def update_payroll_entry_totals(sender, instance, **kwargs):
+    """Update the payroll entry totals when a detail is added, updated or removed."""
+    if kwargs.get('raw', False):
+        return
+
+    # Details removed because their entry is being deleted need no recalculation
+    origin = kwargs.get('origin')
+    if origin is not None and getattr(origin, 'model', type(origin)) is PayrollEntry:
+        return
+
+    if is_batching():
+        mark_dirty(ENTRY_TOTALS, instance.payroll_entry_id)
+        return
+
+    # Item amounts can change without changing the entry totals
+    invalidate_period_variance(instance.payroll_entry.period_id)
+    PayrollTotalsService.recalculate_entry(instance.payroll_entry)
+
+
+def _summary_state(entry):
+    """Return what an entry contributes to its period summary, or None if not fully loaded."""
+    if SUMMARY_STATE_FIELDS & entry.get_deferred_fields():
+        return None
+    return (entry.period_id, entry.contract_id, PayrollSummaryService.entry_values(entry))
+
+def _previous_summary_state(entry):
+    """Return what an entry contributed when it was loaded or last saved, or None if unknown.
+
+    Built on demand from the values kept by ``PayrollEntry.from_db``, so
+    entries that are only read cost nothing here.
+    """
+    if hasattr(entry, '_summary_state'):
+        return entry._summary_state
+    loaded = getattr(entry, '_loaded_values', None)
+    if loaded is None:
+        return None
+    values = dict(zip(*loaded))
+    if not SUMMARY_STATE_FIELDS.issubset(values):
+        return None
+    return (values['period_id'], values['contract_id'], PayrollSummaryService.entry_values(SimpleNamespace(**values)))
+
+def _contract_department(entry, contract_id):
+    """Return the department of a contract, reusing the entry's loaded contract."""
+    contract = entry._state.fields_cache.get('contract')
+    if contract is not None and contract.pk == contract_id:
+        return contract.department
+    return Contract.objects.filter(pk=contract_id).values_list('department', flat=True).first()
+
+def _negate(values):
+    return {field: -value for field, value in values.items()}
+
+@receiver(post_save, sender=PayrollEntry)
+def update_period_summary(sender, instance, created, **kwargs):
+    """Apply the change of an entry to its period summary."""
+    if kwargs.get('raw', False):
+        return
+
+    previous = None if created else _previous_summary_state(instance)
+    current = _summary_state(instance)
+    instance._summary_state = current
+
+    if is_batching():
+        mark_dirty(PERIOD_SUMMARY, instance.period_id)
+        if previous:
+            mark_dirty(PERIOD_SUMMARY, previous[0])
+        return
+
+    # Without the loaded values there is no delta to apply
+    if current is None or (not created and previous is None):
+        PayrollSummaryService.rebuild_period(instance.period_id)
+        return
+
+    period_id, contract_id, values = current
+    if previous and previous[:2] == (period_id, contract_id):
+        deltas = {field: value - previous[2][field] for field, value in values.items()}
+        PayrollSummaryService.apply_delta(period_id, _contract_department(instance, contract_id), deltas)
+        return
+
+    if previous:
+        PayrollSummaryService.apply_delta(
+            previous[0], _contract_department(instance, previous[1]), _negate(previous[2])
+        )
+    PayrollSummaryService.apply_delta(period_id, _contract_department(instance, contract_id), values)
+
+@receiver(post_delete, sender=PayrollEntry)
+def remove_from_period_summary(sender, instance, **kwargs):
+    """Subtract a deleted entry from its period summary."""
+    if is_batching():
+        mark_dirty(PERIOD_SUMMARY, instance.period_id)
+        return
+
+    previous = _previous_summary_state(instance)
+    if previous is None:
+        PayrollSummaryService.rebuild_period(instance.period_id)
+        return
+
+    period_id, contract_id, values = previous
+    PayrollSummaryService.apply_delta(period_id, _contract_department(instance, contract_id), _negate(values))
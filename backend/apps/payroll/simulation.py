@@ -0,0 +1,224 @@
+"""
+Salary what-if simulation.
+
+The active contracts are loaded once into a ``ContractBase``: their salaries
+in cents in one ``array('q')``, sorted by department so each department is
+a slice of it, together with the baseline totals of each department under
+the active payroll items. The base is a catalog of the catalog cache,
+invalidated when a contract or payroll item is saved or deleted (the
+contract import invalidates it explicitly, it bypasses the signals).
+
+``SalarySimulation`` applies a scenario in memory and returns the cost
+deltas per department. Only the departments a scenario touches are
+evaluated, with the ``PayrollRuleSet`` of the active items:
+
+- raises: a percentage applied to the salaries of a department, or of all
+  of them; several raises compound;
+- items: new fixed or percentage earnings or deductions, for a department
+  or for all of them;
+- headcount: employees added to (or removed from) a department, at a given
+  salary or at the average salary of the department.
+
+Usage::
+
+    report = SalarySimulation(raises=[{'department': 'Ventas', 'percentage': Decimal('7')}]).run()
+"""
+
+import itertools
+import logging
+import time
+from array import array
+from operator import add, itemgetter
+
+from apps.core.cache import get_catalog
+from .models import Contract, PayrollItem
+from .rules import (
+    PayrollRule, PayrollRuleSet, from_cents, percentage_column, percentage_fraction, to_cents, to_cents_array
+)
+
+logger = logging.getLogger('apps.payroll')
+
+CONTRACT_BASE = 'payroll.contract_base'
+
+# Totals of a department, in cents
+HEADCOUNT, EARNINGS, DEDUCTIONS = range(3)
+
+
+class ContractBase:
+    """Salaries of the active contracts grouped by department, with the baseline totals of each department."""
+
+    def __init__(self, departments, bounds, salaries, baseline):
+        self.departments = departments
+        self.bounds = bounds
+        self.salaries = salaries
+        self.baseline = baseline
+        self.index = {department: position for position, department in enumerate(departments)}
+
+    def __len__(self):
+        return len(self.salaries)
+
+    @classmethod
+    def load(cls):
+        """Load the active contracts and compute the baseline with the active payroll items."""
+        started = time.perf_counter()
+        rows = (
+            Contract.objects.filter(is_active=True)
+            .order_by('department', 'id')
+            .values_list('department', 'salary')
+            .iterator(chunk_size=5000)
+        )
+        departments, bounds, salaries = [], [], array('q')
+        for department, group in itertools.groupby(rows, key=itemgetter(0)):
+            start = len(salaries)
+            salaries.extend(to_cents_array(salary for _, salary in group))
+            departments.append(department)
+            bounds.append((start, len(salaries)))
+
+        rule_set = PayrollRuleSet.for_active_items()
+        baseline = []
+        for start, end in bounds:
+            result = rule_set.evaluate_cents(salaries[start:end])
+            baseline.append((end - start, sum(result.earnings), sum(result.deductions)))
+
+        logger.info(
+            f"Contract base loaded: {len(salaries)} contracts in {len(departments)} departments "
+            f"in {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+        return cls(departments, bounds, salaries, baseline)
+
+    @classmethod
+    def cached(cls):
+        """Return the contract base from the catalog cache."""
+        return get_catalog(CONTRACT_BASE)
+
+    def department_salaries(self, position):
+        start, end = self.bounds[position]
+        return self.salaries[start:end]
+
+
+def _applies(change, department):
+    return not change.get('department') or change['department'] == department
+
+
+class SalarySimulation:
+    """Cost of a salary scenario per department, compared with the current contracts."""
+
+    def __init__(self, raises=(), items=(), headcount=(), base=None):
+        self.raises = list(raises)
+        self.items = list(items)
+        self.headcount = list(headcount)
+        self.base = base
+
+    def run(self):
+        """Simulate the scenario and return the baseline, simulated and delta totals per department."""
+        started = time.perf_counter()
+        base = self.base if self.base is not None else ContractBase.cached()
+        rule_set = PayrollRuleSet.for_active_items()
+        new_rules = [
+            (change, PayrollRule(PayrollItem(
+                code=f"SIMULATED_{position}", name=change['name'], item_type=change['item_type'],
+                default_amount=change['amount'], is_percentage=change.get('is_percentage', False),
+            )))
+            for position, change in enumerate(self.items)
+        ]
+        headcount_changes = {}
+        for change in self.headcount:
+            headcount_changes.setdefault(change['department'], []).append(change)
+
+        for department in {change.get('department') for change in self.raises + self.items} - {None, ''}:
+            if department not in base.index and department not in headcount_changes:
+                raise ValueError(f"El departamento '{department}' no tiene contratos activos")
+
+        departments = base.departments + sorted(set(headcount_changes) - set(base.index))
+        results = []
+        for department in departments:
+            position = base.index.get(department)
+            if position is None:
+                baseline = (0, 0, 0)
+                salaries = array('q')
+            else:
+                baseline = base.baseline[position]
+                salaries = None
+            raises = [change['percentage'] for change in self.raises if _applies(change, department)]
+            rules = [rule for change, rule in new_rules if _applies(change, department)]
+            changes = headcount_changes.get(department, [])
+            if not (raises or rules or changes):
+                results.append((department, baseline, baseline))
+                continue
+
+            if salaries is None:
+                salaries = base.department_salaries(position)
+            simulated = list(baseline)
+            if raises:
+                for percentage in raises:
+                    increments = percentage_column(salaries, *percentage_fraction(percentage))
+                    salaries = array('q', map(add, salaries, increments))
+                result = rule_set.evaluate_cents(salaries)
+                simulated[EARNINGS], simulated[DEDUCTIONS] = sum(result.earnings), sum(result.deductions)
+            for rule in rules:
+                simulated[EARNINGS if rule.is_earning else DEDUCTIONS] += sum(rule.evaluate(salaries))
+
+            for change in changes:
+                simulated = self.apply_headcount(department, change, simulated, salaries, rule_set, rules)
+            results.append((department, baseline, simulated))
+
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        logger.info(f"Salary simulation over {len(base)} contracts in {elapsed_ms} ms")
+        return {
+            'contracts': len(base),
+            'departments': [
+                {'department': department, **self.totals(baseline, simulated)}
+                for department, baseline, simulated in results
+            ],
+            'totals': self.totals(
+                [sum(baseline[field] for _, baseline, _ in results) for field in range(3)],
+                [sum(simulated[field] for _, _, simulated in results) for field in range(3)],
+            ),
+            'elapsed_ms': elapsed_ms,
+        }
+
+    def apply_headcount(self, department, change, simulated, salaries, rule_set, rules):
+        """Add the totals of the employees added or removed by a headcount change."""
+        count = change['change']
+        if count < 0 and simulated[HEADCOUNT] + count < 0:
+            raise ValueError(
+                f"No se pueden retirar {-count} empleados de '{department}', tiene {simulated[HEADCOUNT]}"
+            )
+        if change.get('salary') is not None:
+            salary = to_cents(change['salary'])
+        elif salaries:
+            # Average salary of the department, after the raises
+            salary = (2 * sum(salaries) + len(salaries)) // (2 * len(salaries))
+        else:
+            raise ValueError(f"Indique el salario de los empleados de '{department}', no tiene contratos activos")
+
+        employee = array('q', [salary])
+        result = rule_set.evaluate_cents(employee)
+        earnings, deductions = result.earnings[0], result.deductions[0]
+        for rule in rules:
+            if rule.is_earning:
+                earnings += rule.evaluate(employee)[0]
+            else:
+                deductions += rule.evaluate(employee)[0]
+        return [
+            simulated[HEADCOUNT] + count,
+            simulated[EARNINGS] + count * earnings,
+            simulated[DEDUCTIONS] + count * deductions,
+        ]
+
+    @staticmethod
+    def totals(baseline, simulated):
+        """Return the baseline, simulated and delta amounts of (headcount, earnings, deductions) triples.
+
+        Amounts are 2-decimal strings, as the serializers render them.
+        """
+        totals = {'headcount': baseline[HEADCOUNT], 'simulated_headcount': simulated[HEADCOUNT]}
+        for name, baseline_cents, simulated_cents in (
+            ('earnings', baseline[EARNINGS], simulated[EARNINGS]),
+            ('deductions', baseline[DEDUCTIONS], simulated[DEDUCTIONS]),
+            ('net_pay', baseline[EARNINGS] - baseline[DEDUCTIONS], simulated[EARNINGS] - simulated[DEDUCTIONS]),
+        ):
+            totals[name] = str(from_cents(baseline_cents))
+            totals[f'simulated_{name}'] = str(from_cents(simulated_cents))
+            totals[f'{name}_delta'] = str(from_cents(simulated_cents - baseline_cents))
+        return totals
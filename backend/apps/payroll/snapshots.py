@@ -0,0 +1,292 @@
+"""
+Frozen snapshots of closed payroll periods.
+
+Closing a period (``PeriodSnapshotService.close_period``) runs a pipeline in
+one transaction: the period is locked, the totals of its entries are
+recalculated from their details, the snapshot is written and the period is
+marked closed.
+
+The snapshot holds the per-entry totals and item amounts of the period as
+line-delimited canonical JSON with amounts in integer cents: a header line
+with the format, the period and the items, then one line per entry in
+export order (last name, first name, entry id). It is compressed with zlib
+and stored with the SHA-256 of the uncompressed content. The per-item and
+per-department totals and the period totals are stored alongside in plain
+columns. Reports on a closed period (``PayrollExporter``, the ``snapshot``
+action) read the snapshot instead of joining ``PayrollEntryDetail``; its
+entries are decompressed as they are consumed, so memory use does not
+depend on the period size.
+
+``verify`` detects tampering: it checks the payload against the checksum and
+the stored totals, and rebuilds the payload from the live entries to check
+their payroll facts (amounts, approval and item amounts) have not changed
+since the period was closed. The employee and contract fields are kept for
+reports only: renaming an employee or moving a contract to another
+department after closing is not tampering.
+"""
+
+import hashlib
+import itertools
+import json
+import logging
+import zlib
+from collections import namedtuple
+from operator import itemgetter
+
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.utils import timezone
+
+from .models import PayrollEntry, PayrollEntryDetail, PayrollItem, PayrollPeriod, PayrollPeriodSnapshot
+from .rules import from_cents, to_cents
+from .services import PayrollTotalsService
+
+logger = logging.getLogger('apps.payroll')
+
+FORMAT_VERSION = 1
+
+# Fields of each entry of the payload, in order. Amounts are in cents and
+# ``amounts`` is a list of [item id, cents] pairs ordered by item id.
+SnapshotEntry = namedtuple('SnapshotEntry', [
+    'id', 'contract_id', 'employee_id', 'document_type', 'document_number', 'first_name', 'last_name',
+    'department', 'position', 'base_salary', 'total_earnings', 'total_deductions', 'net_pay', 'is_approved',
+    'amounts',
+])
+SnapshotItem = namedtuple('SnapshotItem', ['id', 'code', 'name', 'item_type'])
+
+# Last name, first name and id of a payload entry
+EXPORT_ORDER = itemgetter(6, 5, 0)
+
+# Entry id, contract id, amounts, approval and item amounts of a payload entry
+PAYROLL_FACTS = itemgetter(0, 1, 9, 10, 11, 12, 13, 14)
+
+
+def _canonical(data):
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def _money(cents):
+    return str(from_cents(cents))
+
+
+class PeriodSnapshotService:
+    """Build, store, read and verify payroll period snapshots."""
+
+    CHUNK_SIZE = 2000
+    READ_SIZE = 64 * 1024
+
+    @classmethod
+    def build_data(cls, period):
+        """Return the snapshot content of a period, read from its live entries and details."""
+        line_total = ExpressionWrapper(F('amount') * F('quantity'), output_field=DecimalField(max_digits=16, decimal_places=4))
+        details = (
+            PayrollEntryDetail.objects.filter(payroll_entry__period=period)
+            .values_list('payroll_entry_id', 'payroll_item_id')
+            .annotate(total=Sum(line_total))
+            .order_by('payroll_entry_id', 'payroll_item_id')
+            .iterator(chunk_size=cls.CHUNK_SIZE)
+        )
+        entries = (
+            PayrollEntry.objects.filter(period=period)
+            .values_list(
+                'id', 'contract_id', 'contract__employee__employee_id', 'contract__employee__document_type',
+                'contract__employee__document_number', 'contract__employee__first_name',
+                'contract__employee__last_name', 'contract__department', 'contract__position',
+                'base_salary', 'total_earnings', 'total_deductions', 'net_pay', 'is_approved',
+            )
+            .order_by('id')
+            .iterator(chunk_size=cls.CHUNK_SIZE)
+        )
+
+        # Both are ordered by entry id: merge the amounts of each entry into it
+        groups = itertools.groupby(details, key=itemgetter(0))
+        group = next(groups, None)
+        rows, item_ids = [], set()
+        for values in entries:
+            entry_id = values[0]
+            amounts = []
+            if group is not None and group[0] == entry_id:
+                amounts = [[item_id, to_cents(total)] for _, item_id, total in group[1]]
+                item_ids.update(item_id for item_id, _ in amounts)
+                group = next(groups, None)
+            rows.append([
+                *values[:9],
+                *(to_cents(amount or 0) for amount in values[9:13]),
+                values[13],
+                amounts,
+            ])
+
+        rows.sort(key=EXPORT_ORDER)
+
+        items = [
+            list(item) for item in
+            PayrollItem.objects.filter(id__in=item_ids).order_by('id').values_list('id', 'code', 'name', 'item_type')
+        ]
+        return {
+            'format': FORMAT_VERSION,
+            'period': [period.id, period.name, period.start_date.isoformat(), period.end_date.isoformat()],
+            'items': items,
+            'entries': rows,
+        }
+
+    @staticmethod
+    def encode(data):
+        """Return the uncompressed payload of a snapshot content."""
+        header = {key: value for key, value in data.items() if key != 'entries'}
+        return b'\n'.join([_canonical(header), *(_canonical(row) for row in data['entries'])]) + b'\n'
+
+    @staticmethod
+    def decode(content):
+        """Return the snapshot content of an uncompressed payload."""
+        header, *lines = content.split(b'\n')
+        data = json.loads(header)
+        data['entries'] = [json.loads(line) for line in lines if line]
+        return data
+
+    @staticmethod
+    def facts_checksum(data):
+        """Return the SHA-256 of the payroll facts of a snapshot content, by entry id."""
+        facts = sorted(map(PAYROLL_FACTS, data['entries']))
+        return hashlib.sha256(_canonical(facts)).hexdigest()
+
+    @staticmethod
+    def summarize(data):
+        """Return the snapshot model fields derived from its content."""
+        items = {item[0]: SnapshotItem(*item) for item in data['items']}
+        item_totals = {item_id: [0, 0] for item_id in items}
+        departments = {}
+        totals = [0, 0, 0]
+        approved = 0
+        for row in data['entries']:
+            entry = SnapshotEntry(*row)
+            approved += entry.is_approved
+            department = departments.setdefault(entry.department, [0, 0, 0, 0, 0])
+            department[0] += 1
+            department[1] += entry.is_approved
+            for position, cents in enumerate((entry.total_earnings, entry.total_deductions, entry.net_pay)):
+                totals[position] += cents
+                department[2 + position] += cents
+            for item_id, cents in entry.amounts:
+                item_totals[item_id][0] += 1
+                item_totals[item_id][1] += cents
+
+        return {
+            'format_version': data['format'],
+            'entries_count': len(data['entries']),
+            'approved_count': approved,
+            'total_earnings': from_cents(totals[0]),
+            'total_deductions': from_cents(totals[1]),
+            'total_net_pay': from_cents(totals[2]),
+            'item_totals': [
+                {
+                    'item': item.id, 'code': item.code, 'name': item.name, 'item_type': item.item_type,
+                    'entries': item_totals[item.id][0], 'amount': _money(item_totals[item.id][1]),
+                }
+                for item in sorted(items.values(), key=lambda item: (item.item_type != 'EARNING', item.code))
+            ],
+            'department_totals': [
+                {
+                    'department': name, 'entries': values[0], 'approved': values[1],
+                    'earnings': _money(values[2]), 'deductions': _money(values[3]), 'net_pay': _money(values[4]),
+                }
+                for name, values in sorted(departments.items())
+            ],
+        }
+
+    @classmethod
+    def freeze(cls, period, user=None):
+        """Write the snapshot of a period from its live entries."""
+        data = cls.build_data(period)
+        content = cls.encode(data)
+        snapshot = PayrollPeriodSnapshot.objects.create(
+            period=period,
+            payload=zlib.compress(content, 9),
+            payload_size=len(content),
+            checksum=hashlib.sha256(content).hexdigest(),
+            created_by=user if user is not None and user.is_authenticated else None,
+            **cls.summarize(data),
+        )
+        logger.info(
+            f"Snapshot of payroll period {period.id}: {snapshot.entries_count} entries, "
+            f"{len(content)} bytes ({len(snapshot.payload)} compressed), checksum {snapshot.checksum}"
+        )
+        return snapshot
+
+    @classmethod
+    def close_period(cls, period, user=None):
+        """Recalculate the entries of a period, freeze its snapshot and close it. Returns the snapshot."""
+        with transaction.atomic():
+            period = PayrollPeriod.objects.select_for_update().get(pk=period.pk)
+            if period.is_closed:
+                raise ValueError("El período ya está cerrado")
+
+            PayrollTotalsService.recalculate_period(period.pk)
+            snapshot = cls.freeze(period, user)
+
+            period.is_closed = True
+            period.closed_by = user if user is not None and user.is_authenticated else None
+            period.closed_at = timezone.now()
+            period.save(update_fields=['is_closed', 'closed_by', 'closed_at'])
+        return snapshot
+
+    @staticmethod
+    def load(snapshot):
+        """Return the decompressed content of a snapshot as bytes."""
+        return zlib.decompress(bytes(snapshot.payload))
+
+    @classmethod
+    def lines(cls, snapshot):
+        """Yield the lines of the payload of a snapshot, decompressing it incrementally."""
+        payload = memoryview(bytes(snapshot.payload))
+        decompressor = zlib.decompressobj()
+        pending = b''
+        for start in range(0, len(payload), cls.READ_SIZE):
+            pending += decompressor.decompress(payload[start:start + cls.READ_SIZE])
+            *complete, pending = pending.split(b'\n')
+            yield from complete
+        pending += decompressor.flush()
+        if pending:
+            yield pending
+
+    @classmethod
+    def read(cls, snapshot):
+        """
+        Return (items, entries) of a snapshot: the list of its ``SnapshotItem``
+        and an iterator of its ``SnapshotEntry`` in export order.
+
+        The entries are decompressed and parsed as the iterator is consumed.
+        """
+        lines = cls.lines(snapshot)
+        header = json.loads(next(lines))
+        items = [SnapshotItem(*item) for item in header['items']]
+        return items, (SnapshotEntry(*json.loads(line)) for line in lines)
+
+    @classmethod
+    def verify(cls, snapshot, live=True):
+        """
+        Check a snapshot and return a report.
+
+        - ``checksum_ok``: the payload matches the checksum;
+        - ``totals_ok``: the stored totals match the payload;
+        - ``live_ok``: the live entries and details still have the payroll
+          facts of the payload (None when ``live`` is False or the payload
+          does not match its checksum).
+        """
+        report = {'period': snapshot.period_id, 'checksum': snapshot.checksum}
+        try:
+            content = cls.load(snapshot)
+        except zlib.error:
+            content = None
+        report['checksum_ok'] = content is not None and hashlib.sha256(content).hexdigest() == snapshot.checksum
+
+        report['totals_ok'] = False
+        report['live_ok'] = None
+        if report['checksum_ok']:
+            data = cls.decode(content)
+            summary = cls.summarize(data)
+            report['totals_ok'] = all(getattr(snapshot, field) == value for field, value in summary.items())
+            if live:
+                report['live_ok'] = cls.facts_checksum(cls.build_data(snapshot.period)) == cls.facts_checksum(data)
+
+        report['ok'] = report['checksum_ok'] and report['totals_ok'] and report['live_ok'] is not False
+        return report
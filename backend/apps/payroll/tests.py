@@ -0,0 +1,85 @@
+import random
+from datetime import date
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from .imports import parse_amount, parse_date
+from .management.commands.benchmark_payroll_rules import STATUTORY_ITEMS
+from .models import PayrollItem
+from .rules import PayrollRuleSet, to_cents, to_cents_array
+
+
+class ParseAmountTests(SimpleTestCase):
+    def test_decimal_and_thousands_separators(self):
+        self.assertEqual(parse_amount('1,5'), Decimal('1.5'))
+        self.assertEqual(parse_amount('4.5'), Decimal('4.5'))
+        self.assertEqual(parse_amount('1.500'), Decimal('1500'))
+        self.assertEqual(parse_amount('1,500'), Decimal('1500'))
+        self.assertEqual(parse_amount('1.500.000'), Decimal('1500000'))
+        self.assertEqual(parse_amount('$ 1.500.000,50'), Decimal('1500000.50'))
+        self.assertEqual(parse_amount('1,500.25'), Decimal('1500.25'))
+
+    def test_exponent(self):
+        self.assertEqual(parse_amount('1e3'), Decimal('1000'))
+        self.assertEqual(parse_amount('1.5e3'), Decimal('1500'))
+
+    def test_rejects_non_finite_and_invalid_values(self):
+        for value in ('NaN', 'sNaN', 'Infinity', '-inf', 'abc', ''):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                parse_amount(value)
+
+
+class ParseDateTests(SimpleTestCase):
+    def test_formats(self):
+        self.assertEqual(parse_date('2025-01-05'), date(2025, 1, 5))
+        self.assertEqual(parse_date('2025-01-05T00:00:00'), date(2025, 1, 5))
+        self.assertEqual(parse_date('05/01/2025'), date(2025, 1, 5))
+
+    def test_serial_numbers_only_for_xlsx(self):
+        self.assertEqual(parse_date('45662', serial=True), date(2025, 1, 5))
+        self.assertEqual(parse_date('45662.0', serial=True), date(2025, 1, 5))
+        with self.assertRaises(ValueError):
+            parse_date('45662')
+        with self.assertRaises(ValueError):
+            parse_date('2025')
+
+    def test_rejects_invalid_dates(self):
+        for value in ('2025-02-30', '31/13/2025', 'mañana'):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                parse_date(value)
+
+
+class PayrollRuleTests(SimpleTestCase):
+    def setUp(self):
+        self.items = [
+            PayrollItem(
+                id=index, code=code, name=code, item_type=item_type,
+                default_amount=Decimal(amount), is_percentage=is_percentage,
+            )
+            for index, (code, item_type, amount, is_percentage) in enumerate(STATUTORY_ITEMS, start=1)
+        ]
+        self.rule_set = PayrollRuleSet.compile(self.items)
+
+    def test_amount_rounds_half_up(self):
+        health, solidarity = self.rule_set.rules[2], self.rule_set.rules[4]
+        self.assertEqual(health.amount(Decimal('1300000.13')), Decimal('52000.01'))
+        self.assertEqual(solidarity.amount(Decimal('1234567.50')), Decimal('12345.68'))
+        self.assertEqual(self.rule_set.rules[1].amount(Decimal('1300000.00')), Decimal('162000.00'))
+
+    def test_amount_and_cents_columns_agree(self):
+        rng = random.Random(7)
+        salaries = [Decimal(rng.randrange(100, 2600000000)).scaleb(-2) for _ in range(5000)]
+        salaries += [Decimal('0.00'), Decimal('0.50'), Decimal('1234567.50'), Decimal('99999999.99')]
+        result = self.rule_set.evaluate_cents(to_cents_array(salaries))
+
+        for rule, column in zip(self.rule_set.rules, result.columns):
+            self.assertEqual([to_cents(rule.amount(salary)) for salary in salaries], list(column), rule.code)
+        for index, salary in enumerate(salaries):
+            amounts = [(rule, rule.amount(salary)) for rule in self.rule_set.rules]
+            self.assertEqual(
+                to_cents(sum(amount for rule, amount in amounts if rule.is_earning)), result.earnings[index]
+            )
+            self.assertEqual(
+                to_cents(sum(amount for rule, amount in amounts if not rule.is_earning)), result.deductions[index]
+            )
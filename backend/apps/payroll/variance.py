@@ -0,0 +1,286 @@
+"""
+Period-over-period payroll variance.
+
+``PayrollVarianceReport`` compares a period with the previous one (by
+default the period that ends last before it starts) and returns:
+
+- the totals of both periods and their deltas;
+- the per-employee deltas of earnings, deductions and net pay, ranked by
+  the size of the net pay change, for the employees whose pay changed or
+  who are only paid in one of the periods;
+- the per-item deltas, with the number of entries of each item.
+
+Everything is computed in the database: the employees of both periods are
+matched with joins and the outliers are flagged with window functions. An
+employee is an outlier when their net pay delta is more than ``z`` standard
+deviations (and at least a cent) from the mean delta of the employees
+compared, or when their net pay changes by more than ``threshold`` percent.
+Items are flagged on the percentage, or when they are new. Deviations are
+compared squared, so no SQL square root is needed.
+
+Reports are cached per pair of periods. Each period has a data version,
+bumped by ``invalidate_period_variance`` whenever its entries or details
+change (summary maintenance and detail signals call it); the versions of
+both periods are part of the cache key, so a change to either period is
+never served from an older report.
+"""
+
+import logging
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+
+from apps.affiliation.models import Employee
+from apps.core.cache import catalog_version, invalidate_catalog
+from .models import Contract, PayrollEntry, PayrollEntryDetail, PayrollItem, PayrollPeriod
+
+logger = logging.getLogger('apps.payroll')
+
+PERIOD_DATA = 'payroll.period_data'
+
+CENTS = Decimal('0.01')
+
+DEFAULT_Z = Decimal('3')
+DEFAULT_THRESHOLD = Decimal('20')
+
+
+def period_data_version(period_id):
+    """Return the data version of a period."""
+    return catalog_version(f'{PERIOD_DATA}:{period_id}')
+
+
+def invalidate_period_variance(*period_ids):
+    """Discard the cached variance reports involving any of these periods."""
+    for period_id in set(period_ids):
+        invalidate_catalog(f'{PERIOD_DATA}:{period_id}')
+
+
+def _decimal(value):
+    # SQLite returns sums of decimal columns as floats
+    return Decimal(str(value)).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def _money(value):
+    """Format an amount or percentage of the report, as the serializers do."""
+    return None if value is None else str(_decimal(value))
+
+
+class PayrollVarianceReport:
+    """Variance of a payroll period against the previous one."""
+
+    TOTALS_SQL = """
+        SELECT e.period_id, COUNT(DISTINCT c.employee_id), COUNT(e.id),
+               SUM(e.total_earnings), SUM(e.total_deductions), SUM(e.net_pay)
+        FROM {entry} e
+        JOIN {contract} c ON c.id = e.contract_id
+        WHERE e.period_id IN (%s, %s)
+        GROUP BY e.period_id
+    """
+
+    EMPLOYEES_SQL = """
+        WITH pay AS (
+            SELECT c.employee_id, e.period_id,
+                   SUM(e.total_earnings) AS earnings,
+                   SUM(e.total_deductions) AS deductions,
+                   SUM(e.net_pay) AS net_pay
+            FROM {entry} e
+            JOIN {contract} c ON c.id = e.contract_id
+            WHERE e.period_id IN (%(current)s, %(previous)s)
+            GROUP BY c.employee_id, e.period_id
+        ),
+        compared AS (
+            SELECT k.employee_id,
+                   cur.earnings, cur.deductions, cur.net_pay,
+                   prev.earnings AS previous_earnings,
+                   prev.deductions AS previous_deductions,
+                   prev.net_pay AS previous_net_pay,
+                   ROUND(COALESCE(cur.earnings, 0) - COALESCE(prev.earnings, 0), 2) AS earnings_delta,
+                   ROUND(COALESCE(cur.deductions, 0) - COALESCE(prev.deductions, 0), 2) AS deductions_delta,
+                   ROUND(COALESCE(cur.net_pay, 0) - COALESCE(prev.net_pay, 0), 2) AS net_pay_delta
+            FROM (SELECT DISTINCT employee_id FROM pay) k
+            LEFT JOIN pay cur ON cur.employee_id = k.employee_id AND cur.period_id = %(current)s
+            LEFT JOIN pay prev ON prev.employee_id = k.employee_id AND prev.period_id = %(previous)s
+        ),
+        scored AS (
+            SELECT compared.*,
+                   AVG(net_pay_delta) OVER () AS mean_delta,
+                   AVG(net_pay_delta * net_pay_delta) OVER () AS mean_square_delta,
+                   RANK() OVER (ORDER BY ABS(net_pay_delta) DESC) AS delta_rank
+            FROM compared
+        )
+        SELECT s.employee_id, emp.employee_id, emp.first_name, emp.last_name, emp.department,
+               s.earnings, s.deductions, s.net_pay,
+               s.previous_earnings, s.previous_deductions, s.previous_net_pay,
+               s.earnings_delta, s.deductions_delta, s.net_pay_delta,
+               CASE WHEN s.previous_net_pay <> 0
+                    THEN s.net_pay_delta * 100.0 / s.previous_net_pay END AS net_pay_percent,
+               s.delta_rank,
+               CASE WHEN ABS(s.net_pay_delta - s.mean_delta) >= 0.01
+                         AND (s.net_pay_delta - s.mean_delta) * (s.net_pay_delta - s.mean_delta)
+                         > %(z_squared)s * (s.mean_square_delta - s.mean_delta * s.mean_delta)
+                    THEN 1 ELSE 0 END AS z_score_outlier,
+               CASE WHEN s.previous_net_pay <> 0
+                         AND ABS(s.net_pay_delta) * 100 > %(threshold)s * ABS(s.previous_net_pay)
+                    THEN 1 ELSE 0 END AS percent_outlier
+        FROM scored s
+        JOIN {employee} emp ON emp.id = s.employee_id
+        WHERE s.net_pay_delta <> 0 OR s.earnings_delta <> 0 OR s.deductions_delta <> 0
+              OR s.net_pay IS NULL OR s.previous_net_pay IS NULL
+        ORDER BY s.delta_rank, emp.last_name, emp.first_name, s.employee_id
+    """
+
+    ITEMS_SQL = """
+        SELECT totals.*,
+               totals.amount - totals.previous_amount AS amount_delta,
+               CASE WHEN totals.previous_amount <> 0
+                    THEN (totals.amount - totals.previous_amount) * 100.0 / totals.previous_amount END,
+               CASE WHEN totals.previous_amount = 0 AND totals.amount <> 0 THEN 1
+                    WHEN ABS(totals.amount - totals.previous_amount) * 100 > %(threshold)s * ABS(totals.previous_amount)
+                    THEN 1 ELSE 0 END
+        FROM (
+            SELECT i.id, i.code, i.name, i.item_type,
+                   COUNT(DISTINCT CASE WHEN e.period_id = %(current)s THEN e.id END) AS entries,
+                   COUNT(DISTINCT CASE WHEN e.period_id = %(previous)s THEN e.id END) AS previous_entries,
+                   COALESCE(SUM(CASE WHEN e.period_id = %(current)s THEN d.amount * d.quantity END), 0) AS amount,
+                   COALESCE(SUM(CASE WHEN e.period_id = %(previous)s THEN d.amount * d.quantity END), 0) AS previous_amount
+            FROM {detail} d
+            JOIN {entry} e ON e.id = d.payroll_entry_id
+            JOIN {item} i ON i.id = d.payroll_item_id
+            WHERE e.period_id IN (%(current)s, %(previous)s)
+            GROUP BY i.id, i.code, i.name, i.item_type
+        ) totals
+        ORDER BY totals.item_type DESC, totals.code
+    """
+
+    def __init__(self, period, previous=None, z=DEFAULT_Z, threshold=DEFAULT_THRESHOLD):
+        self.period = period
+        self.previous = previous if previous is not None else self.previous_period(period)
+        if self.previous is None:
+            raise ValueError(f"El período '{period.name}' no tiene un período anterior para comparar")
+        if self.previous.pk == period.pk:
+            raise ValueError("El período anterior debe ser distinto del período comparado")
+        self.z = Decimal(z)
+        self.threshold = Decimal(threshold)
+
+    @staticmethod
+    def previous_period(period):
+        """Return the period that ends last before ``period`` starts."""
+        return (
+            PayrollPeriod.objects.filter(end_date__lt=period.start_date)
+            .order_by('-end_date', '-id')
+            .first()
+        )
+
+    def cache_key(self):
+        return (
+            f'payroll.variance:{self.period.pk}:{period_data_version(self.period.pk)}:'
+            f'{self.previous.pk}:{period_data_version(self.previous.pk)}:{self.z}:{self.threshold}'
+        )
+
+    def get(self):
+        """Return the report from the cache, computing it on a miss."""
+        cache = caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+        key = self.cache_key()
+        report = cache.get(key)
+        if report is None:
+            report = self.compute()
+            cache.set(key, report, timeout=getattr(settings, 'CATALOG_CACHE_TIMEOUT', 3600))
+        return report
+
+    def compute(self):
+        """Run the variance queries and return the report."""
+        started = time.perf_counter()
+        tables = {
+            'entry': PayrollEntry, 'contract': Contract, 'detail': PayrollEntryDetail,
+            'item': PayrollItem, 'employee': Employee,
+        }
+        tables = {name: connection.ops.quote_name(model._meta.db_table) for name, model in tables.items()}
+        params = {
+            'current': self.period.pk, 'previous': self.previous.pk,
+            'z_squared': self.z * self.z, 'threshold': self.threshold,
+        }
+
+        with connection.cursor() as cursor:
+            cursor.execute(self.TOTALS_SQL.format(**tables), [self.period.pk, self.previous.pk])
+            totals = {row[0]: row[1:] for row in cursor.fetchall()}
+            cursor.execute(self.EMPLOYEES_SQL.format(**tables), params)
+            employee_rows = cursor.fetchall()
+            cursor.execute(self.ITEMS_SQL.format(**tables), params)
+            item_rows = cursor.fetchall()
+
+        employees = [self.employee(row) for row in employee_rows]
+        report = {
+            'period': {'id': self.period.pk, 'name': self.period.name},
+            'previous_period': {'id': self.previous.pk, 'name': self.previous.name},
+            'thresholds': {'z': str(self.z), 'percent': str(self.threshold)},
+            'totals': self.totals(totals.get(self.period.pk), totals.get(self.previous.pk)),
+            'employees_changed': len(employees),
+            'employees_new': sum(employee['status'] == 'NEW' for employee in employees),
+            'employees_removed': sum(employee['status'] == 'REMOVED' for employee in employees),
+            'outliers': sum(employee['outlier'] for employee in employees),
+            'employees': employees,
+            'items': [self.item(row) for row in item_rows],
+        }
+        logger.info(
+            f"Payroll variance of period {self.period.pk} against {self.previous.pk}: "
+            f"{len(employees)} employees changed, {report['outliers']} outliers "
+            f"in {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+        return report
+
+    @staticmethod
+    def totals(current, previous):
+        current = current or (0, 0, 0, 0, 0)
+        previous = previous or (0, 0, 0, 0, 0)
+        totals = {
+            'employees': current[0], 'previous_employees': previous[0],
+            'entries': current[1], 'previous_entries': previous[1],
+        }
+        for position, name in ((2, 'earnings'), (3, 'deductions'), (4, 'net_pay')):
+            amount, previous_amount = _decimal(current[position] or 0), _decimal(previous[position] or 0)
+            totals[name] = str(amount)
+            totals[f'previous_{name}'] = str(previous_amount)
+            totals[f'{name}_delta'] = str(amount - previous_amount)
+        return totals
+
+    @staticmethod
+    def employee(row):
+        (
+            employee_id, code, first_name, last_name, department,
+            earnings, deductions, net_pay, previous_earnings, previous_deductions, previous_net_pay,
+            earnings_delta, deductions_delta, net_pay_delta, net_pay_percent, rank, z_outlier, percent_outlier,
+        ) = row
+        if previous_net_pay is None:
+            status = 'NEW'
+        elif net_pay is None:
+            status = 'REMOVED'
+        else:
+            status = 'CHANGED'
+        return {
+            'employee': employee_id, 'employee_id': code, 'employee_name': f"{first_name} {last_name}",
+            'department': department, 'status': status, 'rank': rank,
+            'earnings': _money(earnings), 'previous_earnings': _money(previous_earnings),
+            'earnings_delta': _money(earnings_delta),
+            'deductions': _money(deductions), 'previous_deductions': _money(previous_deductions),
+            'deductions_delta': _money(deductions_delta),
+            'net_pay': _money(net_pay), 'previous_net_pay': _money(previous_net_pay),
+            'net_pay_delta': _money(net_pay_delta), 'net_pay_percent': _money(net_pay_percent),
+            'z_score_outlier': bool(z_outlier), 'percent_outlier': bool(percent_outlier),
+            'outlier': bool(z_outlier or percent_outlier),
+        }
+
+    @staticmethod
+    def item(row):
+        (
+            item_id, code, name, item_type, entries, previous_entries, amount, previous_amount,
+            amount_delta, percent, outlier,
+        ) = row
+        return {
+            'item': item_id, 'code': code, 'name': name, 'item_type': item_type,
+            'entries': entries, 'previous_entries': previous_entries,
+            'amount': _money(amount), 'previous_amount': _money(previous_amount),
+            'amount_delta': _money(amount_delta), 'percent': _money(percent), 'outlier': bool(outlier),
+        }
@@ -1,30 +1,51 @@
 import logging
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from django.db import transaction
 from django.db.models import Sum, Count, Q, Min, Max, Avg
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from .models import Contract, PayrollPeriod, PayrollItem, PayrollEntry, PayrollEntryDetail
+from .models import (
+    Contract, PayrollPeriod, PayrollItem, PayrollEntry, PayrollEntryDetail, PayrollPeriodSummary,
+    PayrollPeriodSnapshot
+)
 from .serializers import (
     ContractSerializer, PayrollPeriodSerializer, PayrollItemSerializer,
-    PayrollEntrySerializer, PayrollEntryDetailSerializer, PayrollEntryCreateSerializer
+    PayrollEntrySerializer, PayrollEntryDetailSerializer, PayrollEntryCreateSerializer,
+    PayrollPeriodSummarySerializer, SalarySimulationSerializer, PayrollEntryBulkApproveSerializer,
+    PayrollVarianceQuerySerializer
 )
 from .repositories import (
     ContractRepository, PayrollPeriodRepository, 
-    PayrollEntryRepository, PayrollItemRepository
+    PayrollEntryRepository, PayrollEntryDetailRepository, PayrollItemRepository
 )
+from .services import PayrollApprovalService, PayrollRunEngine, PayrollSummaryService
+from .exports import PayrollExporter
+from .imports import ContractImporter
+from .simulation import SalarySimulation
+from .snapshots import PeriodSnapshotService
+from .variance import PayrollVarianceReport
+from .rules import from_cents
 from apps.core.utils import record_activity
+from apps.core.db import use_replica
+from apps.core.pagination import CursorListPagination
+from apps.core.permissions import HasModuleAccess
+from apps.core.views import CatalogListMixin, ConditionalGetMixin
 
 # Configure logger for payroll module
 logger = logging.getLogger('apps.payroll')
 
-class ContractViewSet(viewsets.ModelViewSet):
+class ContractViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for Contract model."""
     serializer_class = ContractSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CursorListPagination
+    cursor_ordering = ('-created_at', '-id')
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'payroll'
     
     def get_queryset(self):
         logger.info(f"Getting active contracts - User: {self.request.user}")
@@ -109,7 +130,109 @@ class ContractViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @swagger_auto_schema(
+        operation_description="Import contracts from a CSV or XLSX file. Invalid rows are reported, not imported",
+        manual_parameters=[
+            openapi.Parameter('file', openapi.IN_FORM, type=openapi.TYPE_FILE, required=True,
+                              description="CSV or XLSX file with a header row"),
+            openapi.Parameter('file_format', openapi.IN_FORM, type=openapi.TYPE_STRING,
+                              description="csv or xlsx (default: from the file extension)"),
+            openapi.Parameter('dry_run', openapi.IN_FORM, type=openapi.TYPE_BOOLEAN,
+                              description="Only validate the file"),
+            openapi.Parameter('encoding', openapi.IN_FORM, type=openapi.TYPE_STRING,
+                              description="Encoding of CSV files (default utf-8)"),
+        ],
+        responses={
+            200: openapi.Response(description="Import report with the errors of each rejected row"),
+            400: openapi.Response(description="Missing file, unreadable file, unsupported format or missing columns")
+        },
+        tags=['Contracts']
+    )
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_contracts(self, request):
+        """Import contracts in bulk from a CSV or XLSX file."""
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({"error": "Se requiere un archivo (campo 'file')"}, status=status.HTTP_400_BAD_REQUEST)
+
+        file_format = request.data.get('file_format') or upload.name.rsplit('.', 1)[-1].lower()
+        dry_run = str(request.data.get('dry_run', 'false')).lower() in ('true', '1')
+        logger.info(f"Importing contracts from {upload.name} ({upload.size} bytes) - User: {request.user}")
+        try:
+            report = ContractImporter(
+                upload.file, file_format=file_format, user=request.user, dry_run=dry_run,
+                encoding=request.data.get('encoding') or 'utf-8'
+            ).run()
+        except (ValueError, LookupError) as e:
+            logger.warning(f"Rejected contract import {upload.name}: {str(e)}")
+            return Response(
+                {"error": "Archivo de contratos inválido", "details": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if report['created']:
+            record_activity(
+                title="Importación de contratos",
+                description=f"Se importaron {report['created']} contratos desde {upload.name}",
+                activity_type="payroll",
+                user=request.user
+            )
+        return Response(report)
+
+    @swagger_auto_schema(
+        operation_description="Simulate the cost per period of a salary scenario (raises, new payroll items, "
+                              "headcount changes) against the active contracts. Nothing is saved",
+        request_body=SalarySimulationSerializer,
+        responses={
+            200: openapi.Response(
+                description="Baseline, simulated and delta totals per department and overall",
+                examples={
+                    "application/json": {
+                        "contracts": 1250,
+                        "departments": [
+                            {
+                                "department": "Ventas",
+                                "headcount": 120,
+                                "simulated_headcount": 125,
+                                "earnings": "251400000.00",
+                                "simulated_earnings": "277838400.00",
+                                "earnings_delta": "26438400.00",
+                                "deductions": "19200000.00",
+                                "simulated_deductions": "21400000.00",
+                                "deductions_delta": "2200000.00",
+                                "net_pay": "232200000.00",
+                                "simulated_net_pay": "256438400.00",
+                                "net_pay_delta": "24238400.00"
+                            }
+                        ],
+                        "totals": {"headcount": 1250, "simulated_headcount": 1255, "earnings_delta": "26438400.00"},
+                        "elapsed_ms": 3.4
+                    }
+                }
+            ),
+            400: openapi.Response(description="Invalid scenario")
+        },
+        tags=['Contracts']
+    )
+    @action(detail=False, methods=['post'])
+    def simulate(self, request):
+        """Simulate a salary scenario over the active contracts."""
+        serializer = SalarySimulationSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        logger.info(f"Running salary simulation - User: {request.user}, Scenario: {serializer.validated_data}")
+        try:
+            report = SalarySimulation(**serializer.validated_data).run()
+        except ValueError as e:
+            return Response(
+                {"error": "Escenario de simulación inválido", "details": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(report)
+
     @action(detail=False, methods=['get'])
+    @use_replica
     def debug_info(self, request):
         """Get debug information about payroll system."""
         logger.info(f"Getting debug info - User: {request.user}")
@@ -143,9 +266,10 @@ class ContractViewSet(viewsets.ModelViewSet):
 
 class PayrollPeriodViewSet(viewsets.ModelViewSet):
     """ViewSet for PayrollPeriod model."""
-    queryset = PayrollPeriod.objects.all()
+    queryset = PayrollPeriod.objects.select_related('summary')
     serializer_class = PayrollPeriodSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'payroll'
     
     def create(self, request, *args, **kwargs):
         logger.info(f"Creating new payroll period - User: {request.user}, Data: {request.data}")
@@ -174,7 +298,7 @@ class PayrollPeriodViewSet(viewsets.ModelViewSet):
         """Return open payroll periods."""
         logger.info(f"Getting open payroll periods - User: {request.user}")
         try:
-            periods = PayrollPeriodRepository.get_open_periods()
+            periods = PayrollPeriodRepository.get_open_periods().select_related('summary')
             logger.info(f"Found {periods.count()} open periods")
             
             serializer = self.get_serializer(periods, many=True)
@@ -186,50 +310,332 @@ class PayrollPeriodViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
         
+    @swagger_auto_schema(
+        operation_description=(
+            "Close the period: recalculate its entries, freeze them into an immutable snapshot "
+            "with a content checksum and mark the period closed, in one transaction"
+        ),
+        responses={
+            200: openapi.Response(description="Closed period"),
+            400: openapi.Response(description="Period is already closed"),
+            401: openapi.Response(description="Unauthorized"),
+            404: openapi.Response(description="Period not found")
+        },
+        tags=['Payroll Periods']
+    )
     @action(detail=True, methods=['post'])
     def close(self, request, pk=None):
         """Close a payroll period."""
         logger.info(f"Attempting to close payroll period {pk} - User: {request.user}")
+        period = self.get_object()
         try:
-            period = self.get_object()
-            
-            if period.is_closed:
-                logger.warning(f"Period {pk} is already closed")
-                return Response({"error": "Period is already closed"}, status=400)
-            
-            period.is_closed = True
-            period.closed_by = request.user
-            period.closed_at = timezone.now()
-            period.save()
-            
-            logger.info(f"Period {pk} closed successfully")
-            
-            # Record the activity
-            record_activity(
-                title="Cierre de período de nómina",
-                description=f"Se ha cerrado el período de nómina '{period.name}' con fecha {period.end_date}",
-                activity_type="payroll",
-                user=request.user
-            )
-            
-            serializer = self.get_serializer(period)
-            return Response(serializer.data)
+            snapshot = PeriodSnapshotService.close_period(period, request.user)
+        except ValueError as e:
+            logger.warning(f"Period {pk} not closed: {str(e)}")
+            return Response({"error": str(e)}, status=400)
         except Exception as e:
             logger.error(f"Error closing period {pk}: {str(e)}")
             return Response(
                 {"error": "Error al cerrar el período", "details": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+        
+        logger.info(f"Period {pk} closed successfully - snapshot checksum {snapshot.checksum}")
+        
+        # Record the activity
+        record_activity(
+            title="Cierre de período de nómina",
+            description=f"Se ha cerrado el período de nómina '{period.name}' con fecha {period.end_date}",
+            activity_type="payroll",
+            user=request.user
+        )
+        
+        period.refresh_from_db()
+        serializer = self.get_serializer(period)
+        return Response(serializer.data)
+
+    @swagger_auto_schema(
+        operation_description="Get the frozen snapshot of a closed period",
+        manual_parameters=[
+            openapi.Parameter('verify', openapi.IN_QUERY, description="Verify the checksum and compare with the live entries", type=openapi.TYPE_BOOLEAN),
+            openapi.Parameter('entries', openapi.IN_QUERY, description="Include the per-entry totals", type=openapi.TYPE_BOOLEAN),
+        ],
+        responses={
+            200: openapi.Response(
+                description="Period snapshot",
+                examples={
+                    "application/json": {
+                        "period": 11,
+                        "format_version": 1,
+                        "entries_count": 120,
+                        "approved_count": 120,
+                        "total_earnings": "165000000.00",
+                        "total_deductions": "13200000.00",
+                        "total_net_pay": "151800000.00",
+                        "item_totals": [{"item": 1, "code": "BASIC_SALARY", "name": "Salario básico", "item_type": "EARNING", "entries": 120, "amount": "150000000.00"}],
+                        "department_totals": [{"department": "Tecnología", "entries": 40, "approved": 40, "earnings": "72000000.00", "deductions": "5760000.00", "net_pay": "66240000.00"}],
+                        "payload_size": 18450,
+                        "checksum": "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08",
+                        "created_at": "2025-01-31T18:00:00Z"
+                    }
+                }
+            ),
+            401: openapi.Response(description="Unauthorized"),
+            404: openapi.Response(description="Period not found or not closed")
+        },
+        tags=['Payroll Periods']
+    )
+    @action(detail=True, methods=['get'])
+    def snapshot(self, request, pk=None):
+        """Return the snapshot of a closed payroll period."""
+        logger.info(f"Getting snapshot of payroll period {pk} - User: {request.user}")
+        period = self.get_object()
+        snapshot = PayrollPeriodSnapshot.objects.filter(period=period).first()
+        if snapshot is None:
+            return Response({"error": "El período no tiene una instantánea de cierre"}, status=status.HTTP_404_NOT_FOUND)
+        
+        data = {
+            field: getattr(snapshot, field) for field in (
+                'period_id', 'format_version', 'entries_count', 'approved_count', 'total_earnings',
+                'total_deductions', 'total_net_pay', 'item_totals', 'department_totals', 'payload_size',
+                'checksum', 'created_at',
+            )
+        }
+        data['period'] = data.pop('period_id')
+        for field in ('total_earnings', 'total_deductions', 'total_net_pay'):
+            data[field] = str(data[field])
+        if request.query_params.get('verify', '').lower() in ('1', 'true'):
+            data['verification'] = PeriodSnapshotService.verify(snapshot)
+        if request.query_params.get('entries', '').lower() in ('1', 'true'):
+            _, entries = PeriodSnapshotService.read(snapshot)
+            data['entries'] = [
+                {
+                    'id': entry.id, 'contract': entry.contract_id, 'employee_id': entry.employee_id,
+                    'employee_name': f"{entry.first_name} {entry.last_name}", 'department': entry.department,
+                    'base_salary': str(from_cents(entry.base_salary)),
+                    'total_earnings': str(from_cents(entry.total_earnings)),
+                    'total_deductions': str(from_cents(entry.total_deductions)),
+                    'net_pay': str(from_cents(entry.net_pay)),
+                    'is_approved': entry.is_approved,
+                }
+                for entry in entries
+            ]
+        return Response(data)
+
+    @swagger_auto_schema(
+        operation_description="Run payroll for every active contract of the period in a single batch",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'chunk_size': openapi.Schema(
+                    type=openapi.TYPE_INTEGER,
+                    description='Rows inserted per bulk INSERT (default 1000)'
+                ),
+            }
+        ),
+        responses={
+            201: openapi.Response(
+                description="Payroll run report",
+                examples={
+                    "application/json": {
+                        "period": 11,
+                        "contracts": 8000,
+                        "skipped_existing": 0,
+                        "payroll_items": 10,
+                        "entries_created": 8000,
+                        "details_created": 32000,
+                        "chunk_size": 1000,
+                        "timings_ms": {"load": 41.2, "compute": 95.7, "persist": 1830.4, "total": 1967.3}
+                    }
+                }
+            ),
+            400: openapi.Response(description="Period is closed or invalid chunk size"),
+            401: openapi.Response(description="Unauthorized")
+        },
+        tags=['Payroll Periods']
+    )
+    @action(detail=True, methods=['post'])
+    def run(self, request, pk=None):
+        """Create the payroll entries of every active contract for the period."""
+        logger.info(f"Running payroll for period {pk} - User: {request.user}")
+        period = self.get_object()
+
+        try:
+            chunk_size = int(request.data.get('chunk_size') or PayrollRunEngine.DEFAULT_CHUNK_SIZE)
+        except (TypeError, ValueError):
+            return Response({"error": "chunk_size must be an integer"}, status=400)
+        if chunk_size <= 0:
+            return Response({"error": "chunk_size must be greater than zero"}, status=400)
 
-class PayrollItemViewSet(viewsets.ModelViewSet):
+        try:
+            report = PayrollRunEngine(period, user=request.user, chunk_size=chunk_size).run()
+        except ValueError as e:
+            logger.warning(f"Payroll run rejected for period {pk}: {str(e)}")
+            return Response({"error": str(e)}, status=400)
+        except Exception as e:
+            logger.error(f"Error running payroll for period {pk}: {str(e)}")
+            return Response(
+                {"error": "Error al ejecutar la nómina del período", "details": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        record_activity(
+            title="Ejecución de nómina",
+            description=f"Se generaron {report['entries_created']} entradas de nómina para el período '{period.name}'",
+            activity_type="payroll",
+            user=request.user
+        )
+
+        return Response(report, status=status.HTTP_201_CREATED)
+
+    @swagger_auto_schema(
+        operation_description="Get the precomputed totals of the period with the breakdown by department",
+        responses={
+            200: openapi.Response(
+                description="Period summary",
+                examples={
+                    "application/json": {
+                        "period": 11,
+                        "period_name": "Enero 2025",
+                        "entries_count": 120,
+                        "approved_count": 100,
+                        "pending_count": 20,
+                        "total_earnings": "165000000.00",
+                        "total_deductions": "13200000.00",
+                        "total_net_pay": "151800000.00",
+                        "updated_at": "2025-01-31T18:00:00Z",
+                        "departments": [
+                            {
+                                "department": "Tecnología",
+                                "entries_count": 40,
+                                "approved_count": 40,
+                                "pending_count": 0,
+                                "total_earnings": "72000000.00",
+                                "total_deductions": "5760000.00",
+                                "total_net_pay": "66240000.00",
+                                "updated_at": "2025-01-31T18:00:00Z"
+                            }
+                        ]
+                    }
+                }
+            ),
+            401: openapi.Response(description="Unauthorized"),
+            404: openapi.Response(description="Period not found")
+        },
+        tags=['Payroll Periods']
+    )
+    @action(detail=True, methods=['get'])
+    def summary(self, request, pk=None):
+        """Return the precomputed summary of a payroll period."""
+        logger.info(f"Getting summary of payroll period {pk} - User: {request.user}")
+        period = self.get_object()
+        try:
+            summary = PayrollSummaryService.for_period(period)
+            return Response(PayrollPeriodSummarySerializer(summary).data)
+        except Exception as e:
+            logger.error(f"Error getting summary of period {pk}: {str(e)}")
+            return Response(
+                {"error": "Error al obtener el resumen del período", "details": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Compare the period with the previous one: totals, per-employee and per-item deltas, "
+            "with outliers flagged. Computed in the database and cached until either period changes"
+        ),
+        manual_parameters=[
+            openapi.Parameter('previous', openapi.IN_QUERY, description="ID of the period to compare with (default: the period that ends last before this one starts)", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('z', openapi.IN_QUERY, description="Standard deviations of the net pay delta that flag an employee (default 3)", type=openapi.TYPE_NUMBER),
+            openapi.Parameter('threshold', openapi.IN_QUERY, description="Percentage change that flags an employee or item (default 20)", type=openapi.TYPE_NUMBER),
+            openapi.Parameter('outliers', openapi.IN_QUERY, description="Return only the employees flagged as outliers", type=openapi.TYPE_BOOLEAN),
+        ],
+        responses={
+            200: openapi.Response(
+                description="Variance report",
+                examples={
+                    "application/json": {
+                        "period": {"id": 12, "name": "Febrero 2025"},
+                        "previous_period": {"id": 11, "name": "Enero 2025"},
+                        "thresholds": {"z": "3.00", "percent": "20.00"},
+                        "totals": {
+                            "employees": 121, "previous_employees": 120, "entries": 121, "previous_entries": 120,
+                            "earnings": "166500000.00", "previous_earnings": "165000000.00", "earnings_delta": "1500000.00",
+                            "deductions": "13320000.00", "previous_deductions": "13200000.00", "deductions_delta": "120000.00",
+                            "net_pay": "153180000.00", "previous_net_pay": "151800000.00", "net_pay_delta": "1380000.00"
+                        },
+                        "employees_changed": 2,
+                        "employees_new": 1,
+                        "employees_removed": 0,
+                        "outliers": 1,
+                        "employees": [
+                            {
+                                "employee": 57, "employee_id": "EMP057", "employee_name": "Ana Gómez",
+                                "department": "Tecnología", "status": "CHANGED", "rank": 1,
+                                "earnings": "4500000.00", "previous_earnings": "3000000.00", "earnings_delta": "1500000.00",
+                                "deductions": "360000.00", "previous_deductions": "240000.00", "deductions_delta": "120000.00",
+                                "net_pay": "4140000.00", "previous_net_pay": "2760000.00", "net_pay_delta": "1380000.00",
+                                "net_pay_percent": "50.00", "z_score_outlier": True, "percent_outlier": True, "outlier": True
+                            }
+                        ],
+                        "items": [
+                            {
+                                "item": 1, "code": "BASIC_SALARY", "name": "Salario básico", "item_type": "EARNING",
+                                "entries": 121, "previous_entries": 120, "amount": "151500000.00",
+                                "previous_amount": "150000000.00", "amount_delta": "1500000.00", "percent": "1.00",
+                                "outlier": False
+                            }
+                        ]
+                    }
+                }
+            ),
+            400: openapi.Response(description="Invalid options or no previous period"),
+            401: openapi.Response(description="Unauthorized"),
+            404: openapi.Response(description="Period not found")
+        },
+        tags=['Payroll Periods']
+    )
+    @action(detail=True, methods=['get'])
+    def variance(self, request, pk=None):
+        """Return the variance of a payroll period against the previous one."""
+        logger.info(f"Getting variance of payroll period {pk} - User: {request.user}")
+        period = self.get_object()
+        serializer = PayrollVarianceQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=400)
+        options = serializer.validated_data
+
+        try:
+            report = PayrollVarianceReport(
+                period, previous=options.get('previous'), z=options['z'], threshold=options['threshold']
+            ).get()
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        except Exception as e:
+            logger.error(f"Error getting variance of period {pk}: {str(e)}")
+            return Response(
+                {"error": "Error al calcular la variación del período", "details": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        if options['outliers']:
+            report = {**report, 'employees': [employee for employee in report['employees'] if employee['outlier']]}
+        return Response(report)
+
+class PayrollItemViewSet(CatalogListMixin, viewsets.ModelViewSet):
     """ViewSet for PayrollItem model."""
     serializer_class = PayrollItemSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'payroll'
     
     def get_queryset(self):
         logger.info(f"Getting active payroll items - User: {self.request.user}")
         return PayrollItemRepository.get_active_items()
     
+    def get_catalog_rows(self):
+        logger.info(f"Getting active payroll items - User: {self.request.user}")
+        return PayrollItemRepository.get_cached_active_items()
+    
     def create(self, request, *args, **kwargs):
         logger.info(f"Creating new payroll item - User: {request.user}, Data: {request.data}")
         try:
@@ -305,8 +711,8 @@ class PayrollItemViewSet(viewsets.ModelViewSet):
             return Response({"error": "Item type is required"}, status=400)
         
         try:
-            items = PayrollItemRepository.get_by_type(item_type)
-            logger.info(f"Found {items.count()} items of type {item_type}")
+            items = PayrollItemRepository.get_cached_by_type(item_type)
+            logger.info(f"Found {len(items)} items of type {item_type}")
             
             serializer = self.get_serializer(items, many=True)
             return Response(serializer.data)
@@ -317,14 +723,19 @@ class PayrollItemViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-class PayrollEntryViewSet(viewsets.ModelViewSet):
+class PayrollEntryViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for PayrollEntry model."""
     serializer_class = PayrollEntrySerializer
-    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CursorListPagination
+    cursor_ordering = ('-created_at', '-id')
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'payroll'
     
     def get_queryset(self):
         logger.info(f"Getting payroll entries - User: {self.request.user}")
-        return PayrollEntry.objects.all()
+        if self.action == 'destroy':
+            return PayrollEntry.objects.all()
+        return PayrollEntryRepository.with_related()
     
     def get_serializer_class(self):
         """Return appropriate serializer class based on action."""
@@ -333,10 +744,12 @@ class PayrollEntryViewSet(viewsets.ModelViewSet):
         return PayrollEntrySerializer
     
     @swagger_auto_schema(
-        operation_description="Create a new payroll entry with earnings and deductions",
+        operation_description="Create a new payroll entry with earnings and deductions. "
+                              "If 'details' is omitted, they are computed from the active payroll items "
+                              "(salary, percentage items such as health and pension, fixed items).",
         request_body=openapi.Schema(
             type=openapi.TYPE_OBJECT,
-            required=['employee', 'contract', 'period', 'base_salary', 'details'],
+            required=['employee', 'contract', 'period'],
             properties={
                 'employee': openapi.Schema(type=openapi.TYPE_INTEGER, description='Employee ID'),
                 'contract': openapi.Schema(type=openapi.TYPE_INTEGER, description='Contract ID'),
@@ -356,7 +769,7 @@ class PayrollEntryViewSet(viewsets.ModelViewSet):
                             'amount': openapi.Schema(type=openapi.TYPE_STRING, description='Amount as decimal string')
                         }
                     ),
-                    description='List of payroll entry details'
+                    description='List of payroll entry details; omit it to compute them from the active payroll items'
                 )
             },
             example={
@@ -495,10 +908,13 @@ class PayrollEntryViewSet(viewsets.ModelViewSet):
         
         try:
             entries = PayrollEntryRepository.get_by_period(period_id)
-            logger.info(f"Found {entries.count()} entries for period {period_id}")
             
-            serializer = self.get_serializer(entries, many=True)
-            return Response(serializer.data)
+            def respond():
+                serializer = self.get_serializer(entries, many=True)
+                logger.info(f"Found {len(serializer.data)} entries for period {period_id}")
+                return Response(serializer.data)
+            
+            return self.conditional_response(entries, respond)
         except Exception as e:
             logger.error(f"Error getting entries for period {period_id}: {str(e)}")
             return Response(
@@ -506,6 +922,81 @@ class PayrollEntryViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @swagger_auto_schema(
+        operation_description="Stream the payroll entries of a period as CSV, XLSX or bank transfer file",
+        manual_parameters=[
+            openapi.Parameter(
+                'period', openapi.IN_QUERY,
+                description="Payroll period ID",
+                type=openapi.TYPE_INTEGER,
+                required=True
+            ),
+            openapi.Parameter(
+                'file_format', openapi.IN_QUERY,
+                description="Export format (default csv). 'bank' only includes approved entries",
+                type=openapi.TYPE_STRING,
+                enum=list(PayrollExporter.FORMATS)
+            )
+        ],
+        responses={
+            200: openapi.Response(description="Export file streamed as attachment"),
+            400: openapi.Response(
+                description="Period ID is required, format is not supported or approved entries have a negative net pay "
+                            "or a document number too long for the bank file"
+            ),
+            401: openapi.Response(description="Unauthorized"),
+            404: openapi.Response(description="Period not found")
+        },
+        tags=['Payroll Entries']
+    )
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream the payroll entries of a period as a file."""
+        period_id = request.query_params.get('period')
+        file_format = request.query_params.get('file_format', 'csv').lower()
+        logger.info(f"Exporting payroll entries for period {period_id} as {file_format} - User: {request.user}")
+
+        if not period_id:
+            logger.warning("Period ID not provided for payroll export")
+            return Response({"error": "Period ID is required"}, status=400)
+
+        period = PayrollPeriod.objects.filter(pk=period_id).first() if period_id.isdigit() else None
+        if not period:
+            return Response({"error": "Período no encontrado"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            exporter = PayrollExporter(period, file_format=file_format)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        if file_format == 'bank':
+            negative = exporter.negative_net_pay()
+            if negative:
+                logger.warning(f"Bank file of period {period_id} rejected: {len(negative)} entries with negative net pay")
+                return Response({
+                    "error": "Hay nóminas aprobadas con neto a pagar negativo; corríjalas antes de generar el archivo bancario",
+                    "entries": negative
+                }, status=400)
+            invalid = exporter.invalid_documents()
+            if invalid:
+                logger.warning(f"Bank file of period {period_id} rejected: {len(invalid)} entries with invalid document numbers")
+                return Response({
+                    "error": f"Hay nóminas aprobadas con número de documento de más de {exporter.BANK_DOCUMENT_WIDTH} "
+                             "caracteres; corríjalos antes de generar el archivo bancario",
+                    "entries": invalid
+                }, status=400)
+
+        response = StreamingHttpResponse(exporter.stream(), content_type=exporter.content_type)
+        response['Content-Disposition'] = f'attachment; filename="{exporter.filename}"'
+
+        record_activity(
+            title="Exportación de nómina",
+            description=f"Se exportó la nómina del período '{period.name}' en formato {file_format}",
+            activity_type="payroll",
+            user=request.user
+        )
+        return response
+
     @action(detail=False, methods=['get'])
     def by_employee(self, request):
         """Return payroll entries by employee."""
@@ -518,10 +1009,13 @@ class PayrollEntryViewSet(viewsets.ModelViewSet):
         
         try:
             entries = PayrollEntryRepository.get_by_employee(employee_id)
-            logger.info(f"Found {entries.count()} entries for employee {employee_id}")
             
-            serializer = self.get_serializer(entries, many=True)
-            return Response(serializer.data)
+            def respond():
+                serializer = self.get_serializer(entries, many=True)
+                logger.info(f"Found {len(serializer.data)} entries for employee {employee_id}")
+                return Response(serializer.data)
+            
+            return self.conditional_response(entries, respond)
         except Exception as e:
             logger.error(f"Error getting entries for employee {employee_id}: {str(e)}")
             return Response(
@@ -585,22 +1079,89 @@ class PayrollEntryViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @swagger_auto_schema(
+        operation_description="Approve in one statement the pending entries of a period, optionally of one "
+                              "department, and/or a list of entry ids. Every period involved must be open",
+        request_body=PayrollEntryBulkApproveSerializer,
+        responses={
+            200: openapi.Response(
+                description="Number of entries approved, per period and department",
+                examples={
+                    "application/json": {
+                        "approved": 4980,
+                        "periods": [
+                            {"period": 11, "approved": 4980, "departments": {"Ventas": 1200, "Operaciones": 3780}}
+                        ]
+                    }
+                }
+            ),
+            400: openapi.Response(description="Invalid selection or closed period"),
+            404: openapi.Response(description="Payroll period not found"),
+            401: openapi.Response(description="Unauthorized")
+        },
+        tags=['Payroll Entries']
+    )
+    @action(detail=False, methods=['post'])
+    def bulk_approve(self, request):
+        """Approve many payroll entries at once."""
+        serializer = PayrollEntryBulkApproveSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        period = serializer.validated_data.get('period')
+        department = serializer.validated_data.get('department')
+        logger.info(f"Bulk approving payroll entries - period: {period}, department: {department} - User: {request.user}")
+        try:
+            report = PayrollApprovalService.approve_entries(
+                request.user,
+                period_id=period.pk if period else None,
+                department=department,
+                entry_ids=serializer.validated_data.get('entry_ids'),
+            )
+        except ValueError as e:
+            logger.warning(f"Bulk approval rejected: {str(e)}")
+            return Response(
+                {"error": "No se pudieron aprobar las entradas", "details": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if report['approved']:
+            scope = f" del período {period.name}" if period else ""
+            if department:
+                scope += f", departamento {department}"
+            record_activity(
+                title="Aprobación masiva de nómina",
+                description=f"Se aprobaron {report['approved']} entradas de nómina{scope}",
+                activity_type="payroll",
+                user=request.user
+            )
+        return Response(report)
+
     @action(detail=False, methods=['get'])
+    @use_replica
     def debug_info(self, request):
         """Get debug information about payroll entries."""
         logger.info(f"Getting payroll entries debug info - User: {request.user}")
         
         try:
+            # Read the per-period summaries instead of scanning every entry
+            totals = PayrollPeriodSummary.objects.aggregate(
+                entries=Sum('entries_count'),
+                approved=Sum('approved_count'),
+                pending=Sum('pending_count'),
+                net_pay=Sum('total_net_pay'),
+            )
+            total_entries = totals['entries'] or 0
             info = {
-                'total_entries': PayrollEntry.objects.count(),
-                'approved_entries': PayrollEntry.objects.filter(is_approved=True).count(),
-                'pending_entries': PayrollEntry.objects.filter(is_approved=False).count(),
+                'total_entries': total_entries,
+                'approved_entries': totals['approved'] or 0,
+                'pending_entries': totals['pending'] or 0,
                 'entries_by_period': dict(
-                    PayrollEntry.objects.values('period__name').annotate(count=Count('id'))
-                    .values_list('period__name', 'count')
+                    PayrollPeriodSummary.objects.filter(entries_count__gt=0)
+                    .values_list('period__name', 'entries_count')
                 ),
-                'total_net_pay': PayrollEntry.objects.aggregate(total=Sum('net_pay'))['total'],
-                'average_net_pay': PayrollEntry.objects.aggregate(avg=Avg('net_pay'))['avg'],
+                'total_net_pay': totals['net_pay'],
+                'average_net_pay': totals['net_pay'] / total_entries if total_entries else None,
             }
             
             return Response(info)
@@ -621,15 +1182,18 @@ class PayrollEntryViewSet(viewsets.ModelViewSet):
 class PayrollEntryDetailViewSet(viewsets.ModelViewSet):
     """ViewSet for PayrollEntryDetail model."""
     serializer_class = PayrollEntryDetailSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CursorListPagination
+    cursor_ordering = ('-id',)
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'payroll'
     
     def get_queryset(self):
         logger.info(f"Getting payroll entry details - User: {self.request.user}")
         # Filter by payroll entry if provided
         entry_id = self.request.query_params.get('entry')
         if entry_id:
-            return PayrollEntryDetail.objects.filter(payroll_entry_id=entry_id)
-        return PayrollEntryDetail.objects.all()
+            return PayrollEntryDetailRepository.get_by_entry(entry_id)
+        return PayrollEntryDetailRepository.with_related()
     
     def create(self, request, *args, **kwargs):
         logger.info(f"Creating payroll entry detail - User: {request.user}, Data: {request.data}")
@@ -664,7 +1228,7 @@ class PayrollEntryDetailViewSet(viewsets.ModelViewSet):
             return Response({"error": "Entry ID is required"}, status=400)
         
         try:
-            details = PayrollEntryDetail.objects.filter(payroll_entry_id=entry_id)
+            details = PayrollEntryDetailRepository.get_by_entry(entry_id)
             logger.info(f"Found {details.count()} details for entry {entry_id}")
             
             serializer = self.get_serializer(details, many=True)
@@ -688,8 +1252,7 @@ class PayrollEntryDetailViewSet(viewsets.ModelViewSet):
             return Response({"error": "Entry ID and type are required"}, status=400)
         
         try:
-            details = PayrollEntryDetail.objects.filter(
-                payroll_entry_id=entry_id,
+            details = PayrollEntryDetailRepository.get_by_entry(entry_id).filter(
                 payroll_item__item_type=item_type
             )
             logger.info(f"Found {details.count()} details for entry {entry_id} and type {item_type}")
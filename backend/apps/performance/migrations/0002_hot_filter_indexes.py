@@ -0,0 +1,17 @@
+# Generated by Django 4.2.10 on 2026-10-18 11:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('performance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='evaluation',
+            index=models.Index(fields=['evaluation_period', 'status'], name='evaluation_period_status_idx'),
+        ),
+    ]
@@ -60,6 +60,9 @@ class Evaluation(models.Model):
     
     class Meta:
         unique_together = ('employee', 'evaluation_period')
+        indexes = [
+            models.Index(fields=['evaluation_period', 'status'], name='evaluation_period_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.employee} - {self.evaluation_period}"
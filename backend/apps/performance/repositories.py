@@ -3,6 +3,10 @@ from .models import (
     EvaluationType, EvaluationCriteria, EvaluationPeriod, Evaluation,
     EvaluationDetail, ImprovementPlan, ImprovementGoal
 )
+from apps.core.cache import get_catalog
+
+EVALUATION_TYPES_CATALOG = 'performance.types'
+CRITERIA_CATALOG = 'performance.criteria'
 
 class EvaluationTypeRepository:
     """Repository for EvaluationType model."""
@@ -11,6 +15,11 @@ class EvaluationTypeRepository:
     def get_active_types():
         """Return all active evaluation types."""
         return EvaluationType.objects.filter(is_active=True)
+    
+    @staticmethod
+    def get_cached_active_types():
+        """Return the active evaluation types, with their criteria, from the catalog cache."""
+        return [evaluation_type for evaluation_type in get_catalog(EVALUATION_TYPES_CATALOG) if evaluation_type.is_active]
 
 class EvaluationCriteriaRepository:
     """Repository for EvaluationCriteria model."""
@@ -22,6 +31,19 @@ class EvaluationCriteriaRepository:
             evaluation_type_id=type_id,
             is_active=True
         )
+    
+    @staticmethod
+    def get_cached_active_criteria():
+        """Return the active criteria from the catalog cache."""
+        return [criteria for criteria in get_catalog(CRITERIA_CATALOG) if criteria.is_active]
+    
+    @staticmethod
+    def get_cached_by_evaluation_type(type_id):
+        """Return the active criteria of an evaluation type from the catalog cache."""
+        return [
+            criteria for criteria in EvaluationCriteriaRepository.get_cached_active_criteria()
+            if str(criteria.evaluation_type_id) == str(type_id)
+        ]
 
 class EvaluationPeriodRepository:
     """Repository for EvaluationPeriod model."""
@@ -1,37 +1,39 @@
 from rest_framework import serializers
+from apps.core.serializers import CatalogField, SparseFieldsetMixin
 from .models import (
     EvaluationType, EvaluationCriteria, EvaluationPeriod, Evaluation,
     EvaluationDetail, ImprovementPlan, ImprovementGoal
 )
+from .repositories import EVALUATION_TYPES_CATALOG, CRITERIA_CATALOG
 
-class EvaluationCriteriaSerializer(serializers.ModelSerializer):
+class EvaluationCriteriaSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = EvaluationCriteria
         fields = '__all__'
 
-class EvaluationTypeSerializer(serializers.ModelSerializer):
+class EvaluationTypeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     criteria = EvaluationCriteriaSerializer(many=True, read_only=True)
     
     class Meta:
         model = EvaluationType
         fields = '__all__'
 
-class EvaluationPeriodSerializer(serializers.ModelSerializer):
-    evaluation_type_name = serializers.ReadOnlyField(source='evaluation_type.name')
+class EvaluationPeriodSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    evaluation_type_name = CatalogField(EVALUATION_TYPES_CATALOG, 'name', source='evaluation_type_id')
     
     class Meta:
         model = EvaluationPeriod
         fields = '__all__'
 
-class EvaluationDetailSerializer(serializers.ModelSerializer):
-    criteria_name = serializers.ReadOnlyField(source='criteria.name')
-    criteria_weight = serializers.ReadOnlyField(source='criteria.weight')
+class EvaluationDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    criteria_name = CatalogField(CRITERIA_CATALOG, 'name', source='criteria_id')
+    criteria_weight = CatalogField(CRITERIA_CATALOG, 'weight', source='criteria_id')
     
     class Meta:
         model = EvaluationDetail
         fields = '__all__'
 
-class EvaluationSerializer(serializers.ModelSerializer):
+class EvaluationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     details = EvaluationDetailSerializer(many=True, read_only=True)
     employee_name = serializers.ReadOnlyField(source='employee.__str__')
     evaluator_name = serializers.ReadOnlyField(source='evaluator.__str__')
@@ -41,12 +43,12 @@ class EvaluationSerializer(serializers.ModelSerializer):
         model = Evaluation
         fields = '__all__'
 
-class ImprovementGoalSerializer(serializers.ModelSerializer):
+class ImprovementGoalSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = ImprovementGoal
         fields = '__all__'
 
-class ImprovementPlanSerializer(serializers.ModelSerializer):
+class ImprovementPlanSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     goals = ImprovementGoalSerializer(many=True, read_only=True)
     employee_name = serializers.ReadOnlyField(source='employee.__str__')
     supervisor_name = serializers.ReadOnlyField(source='supervisor.__str__')
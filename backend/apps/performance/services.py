@@ -0,0 +1,31 @@
+"""Service layer for Performance app."""
+from decimal import Decimal, ROUND_HALF_UP
+from django.db.models import F, Sum
+from .models import Evaluation, EvaluationDetail
+
+
+class EvaluationScoreService:
+    """Recalculation of the weighted overall score of evaluations."""
+
+    @staticmethod
+    def recalculate_evaluations(evaluation_ids):
+        """Recalculate the overall score of many evaluations with one aggregate query."""
+        rows = EvaluationDetail.objects.filter(
+            evaluation_id__in=list(evaluation_ids)
+        ).values('evaluation_id').annotate(
+            weighted_sum=Sum(F('score') * F('criteria__weight')),
+            total_weight=Sum('criteria__weight'),
+        )
+
+        evaluations = [
+            Evaluation(
+                id=row['evaluation_id'],
+                overall_score=(
+                    Decimal(row['weighted_sum']) / Decimal(row['total_weight'])
+                ).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+            )
+            for row in rows
+            if row['total_weight']
+        ]
+        Evaluation.objects.bulk_update(evaluations, ['overall_score'], batch_size=500)
+        return len(evaluations)
@@ -1,25 +1,29 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from .models import EvaluationDetail, Evaluation
-from django.db.models import Avg
+from apps.core.batch import is_batching, mark_dirty, register_recompute
+from apps.core.cache import register_catalog
+from .models import EvaluationDetail, EvaluationType, EvaluationCriteria
+from .repositories import EVALUATION_TYPES_CATALOG, CRITERIA_CATALOG
+from .services import EvaluationScoreService
+
+EVALUATION_SCORE = 'performance.evaluation_score'
+
+register_recompute(EVALUATION_SCORE, EvaluationScoreService.recalculate_evaluations)
+
+# Types are cached with the criteria nested by EvaluationTypeSerializer
+register_catalog(
+    EVALUATION_TYPES_CATALOG,
+    lambda: list(EvaluationType.objects.prefetch_related('criteria').order_by('id')),
+    EvaluationType, EvaluationCriteria
+)
+register_catalog(CRITERIA_CATALOG, lambda: list(EvaluationCriteria.objects.order_by('id')), EvaluationCriteria)
 
 @receiver(post_save, sender=EvaluationDetail)
 def update_evaluation_score(sender, instance, **kwargs):
     """Update overall evaluation score when a detail is added or updated."""
-    evaluation = instance.evaluation
-    
-    # Calculate average score from details
-    details = EvaluationDetail.objects.filter(evaluation=evaluation)
-    if details.exists():
-        # Weighted average calculation
-        total_weight = 0
-        weighted_sum = 0
-        
-        for detail in details:
-            weight = detail.criteria.weight
-            total_weight += weight
-            weighted_sum += detail.score * weight
-        
-        if total_weight > 0:
-            evaluation.overall_score = weighted_sum / total_weight
-            evaluation.save(update_fields=['overall_score'])
+    if is_batching():
+        mark_dirty(EVALUATION_SCORE, instance.evaluation_id)
+        return
+
+    # Weighted average of the evaluation details
+    EvaluationScoreService.recalculate_evaluations([instance.evaluation_id])
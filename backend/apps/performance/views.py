@@ -1,6 +1,7 @@
-from rest_framework import viewsets, permissions
+from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db import IntegrityError
 from django.utils import timezone
 from .models import (
     EvaluationType, EvaluationCriteria, EvaluationPeriod, Evaluation,
@@ -14,23 +15,35 @@ from .repositories import (
     EvaluationTypeRepository, EvaluationCriteriaRepository, EvaluationPeriodRepository,
     EvaluationRepository, ImprovementPlanRepository
 )
+from apps.core.batch import batch_writes
+from apps.core.pagination import CursorListPagination
+from apps.core.permissions import HasModuleAccess
+from apps.core.views import CatalogListMixin
 
-class EvaluationTypeViewSet(viewsets.ModelViewSet):
+class EvaluationTypeViewSet(CatalogListMixin, viewsets.ModelViewSet):
     """ViewSet for EvaluationType model."""
     serializer_class = EvaluationTypeSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'performance'
     
     def get_queryset(self):
         return EvaluationTypeRepository.get_active_types()
+    
+    def get_catalog_rows(self):
+        return EvaluationTypeRepository.get_cached_active_types()
 
-class EvaluationCriteriaViewSet(viewsets.ModelViewSet):
+class EvaluationCriteriaViewSet(CatalogListMixin, viewsets.ModelViewSet):
     """ViewSet for EvaluationCriteria model."""
     serializer_class = EvaluationCriteriaSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'performance'
     
     def get_queryset(self):
         return EvaluationCriteria.objects.filter(is_active=True)
     
+    def get_catalog_rows(self):
+        return EvaluationCriteriaRepository.get_cached_active_criteria()
+    
     @action(detail=False, methods=['get'])
     def by_type(self, request):
         """Return criteria for a specific evaluation type."""
@@ -39,7 +52,7 @@ class EvaluationCriteriaViewSet(viewsets.ModelViewSet):
         if not type_id:
             return Response({"error": "Evaluation type ID is required"}, status=400)
         
-        criteria = EvaluationCriteriaRepository.get_by_evaluation_type(type_id)
+        criteria = EvaluationCriteriaRepository.get_cached_by_evaluation_type(type_id)
         
         serializer = self.get_serializer(criteria, many=True)
         return Response(serializer.data)
@@ -47,7 +60,8 @@ class EvaluationCriteriaViewSet(viewsets.ModelViewSet):
 class EvaluationPeriodViewSet(viewsets.ModelViewSet):
     """ViewSet for EvaluationPeriod model."""
     serializer_class = EvaluationPeriodSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'performance'
     
     def get_queryset(self):
         return EvaluationPeriodRepository.get_active_periods()
@@ -68,7 +82,10 @@ class EvaluationPeriodViewSet(viewsets.ModelViewSet):
 class EvaluationViewSet(viewsets.ModelViewSet):
     """ViewSet for Evaluation model."""
     serializer_class = EvaluationSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CursorListPagination
+    cursor_ordering = ('-created_at', '-id')
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'performance'
     
     def get_queryset(self):
         return Evaluation.objects.all()
@@ -127,12 +144,35 @@ class EvaluationDetailViewSet(viewsets.ModelViewSet):
     """ViewSet for EvaluationDetail model."""
     queryset = EvaluationDetail.objects.all()
     serializer_class = EvaluationDetailSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CursorListPagination
+    cursor_ordering = ('-id',)
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'performance'
+    
+    def create(self, request, *args, **kwargs):
+        """Create a detail, or a list of details recalculating each evaluation score once."""
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+        
+        serializer = self.get_serializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            with batch_writes():
+                serializer.save()
+        except IntegrityError as e:
+            # e.g. the same criteria twice in the list; nothing was written
+            return Response(
+                {"error": "No se pudieron crear los detalles de la evaluación", "details": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 class ImprovementPlanViewSet(viewsets.ModelViewSet):
     """ViewSet for ImprovementPlan model."""
     serializer_class = ImprovementPlanSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'performance'
     
     def get_queryset(self):
         return ImprovementPlanRepository.get_active_plans()
@@ -162,4 +202,5 @@ class ImprovementGoalViewSet(viewsets.ModelViewSet):
     """ViewSet for ImprovementGoal model."""
     queryset = ImprovementGoal.objects.all()
     serializer_class = ImprovementGoalSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'performance'
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.10 on 2026-10-18 11:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('selection', '0002_alter_candidate_current_stage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='candidate',
+            index=models.Index(fields=['status', '-created_at'], name='candidate_status_created_idx'),
+        ),
+    ]
@@ -42,6 +42,11 @@ class Candidate(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', '-created_at'], name='candidate_status_created_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
@@ -1,5 +1,8 @@
 """Repository pattern for Selection app."""
 from .models import Candidate, SelectionProcess, SelectionStage
+from apps.core.cache import get_catalog
+
+STAGES_CATALOG = 'selection.stages'
 
 class CandidateRepository:
     """Repository for Candidate model."""
@@ -31,3 +34,11 @@ class SelectionProcessRepository:
         return Candidate.objects.filter(
             processcandidate__process_id=process_id
         )
+
+class SelectionStageRepository:
+    """Repository for SelectionStage model."""
+    
+    @staticmethod
+    def get_cached_stages():
+        """Return the selection stages from the catalog cache, in stage order."""
+        return get_catalog(STAGES_CATALOG)
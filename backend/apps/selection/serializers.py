@@ -1,33 +1,41 @@
 from rest_framework import serializers
+from apps.core.serializers import SparseFieldsetMixin
 from .models import SelectionStage, Candidate, SelectionProcess, ProcessCandidate, CandidateDocument
 
-class SelectionStageSerializer(serializers.ModelSerializer):
+class SelectionStageSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = SelectionStage
         fields = '__all__'
 
-class CandidateDocumentSerializer(serializers.ModelSerializer):
+class CandidateDocumentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = CandidateDocument
         fields = '__all__'
 
-class CandidateSerializer(serializers.ModelSerializer):
+class CandidateSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     documents = CandidateDocumentSerializer(many=True, read_only=True)
     
     class Meta:
         model = Candidate
         fields = '__all__'
 
-class ProcessCandidateSerializer(serializers.ModelSerializer):
+class ProcessCandidateSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     candidate = CandidateSerializer(read_only=True)
     
     class Meta:
         model = ProcessCandidate
         fields = '__all__'
 
-class SelectionProcessSerializer(serializers.ModelSerializer):
+class SelectionProcessSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     process_candidates = ProcessCandidateSerializer(source='processcandidate_set', many=True, read_only=True)
     
     class Meta:
         model = SelectionProcess
         fields = '__all__'
+
+class CandidateHireSerializer(serializers.Serializer):
+    """Input of the bulk hire actions."""
+    candidates = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=5000)
+    hire_date = serializers.DateField(required=False)
+    position = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    department = serializers.CharField(max_length=100, required=False, allow_blank=True)
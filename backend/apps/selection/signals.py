@@ -1,6 +1,10 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from .models import ProcessCandidate
+from apps.core.cache import register_catalog
+from .models import ProcessCandidate, SelectionStage
+from .repositories import STAGES_CATALOG
+
+register_catalog(STAGES_CATALOG, lambda: list(SelectionStage.objects.order_by('order', 'id')), SelectionStage)
 
 @receiver(post_save, sender=ProcessCandidate)
 def update_candidate_stage(sender, instance, created, **kwargs):
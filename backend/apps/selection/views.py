@@ -5,15 +5,55 @@ from rest_framework.response import Response
 from .models import SelectionStage, Candidate, SelectionProcess, ProcessCandidate, CandidateDocument
 from .serializers import (
     SelectionStageSerializer, CandidateSerializer, SelectionProcessSerializer,
-    ProcessCandidateSerializer, CandidateDocumentSerializer
+    ProcessCandidateSerializer, CandidateDocumentSerializer, CandidateHireSerializer
 )
-from .repositories import CandidateRepository, SelectionProcessRepository
+from .repositories import CandidateRepository, SelectionProcessRepository, SelectionStageRepository, STAGES_CATALOG
+from apps.core.cache import invalidate_catalog
 from apps.core.utils import record_activity
+from apps.core.pagination import CursorListPagination
+from apps.core.permissions import HasModuleAccess
+from apps.core.views import CatalogListMixin, ConditionalGetMixin
 
-class SelectionStageViewSet(viewsets.ModelViewSet):
+
+def hire_candidates(request, candidate_ids=None, default_position='', process=None):
+    """Validate a bulk hire request, hire the candidates and record one activity."""
+    serializer = CandidateHireSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = serializer.validated_data
+    requested = set(data['candidates'])
+    # Limit to the candidates of the process; others are reported as not found
+    allowed = requested if candidate_ids is None else requested & candidate_ids
+
+    # Employees live in the affiliation app, which depends on this one
+    from apps.affiliation.services import OnboardingService
+    report = OnboardingService.hire_candidates(
+        allowed,
+        hire_date=data.get('hire_date'),
+        position=data.get('position') or default_position,
+        department=data.get('department', '')
+    )
+    report['not_found'] = sorted(set(report['not_found']) | (requested - allowed))
+
+    if report['hired']:
+        target = f" del proceso {process.name}" if process else ""
+        record_activity(
+            title="Contratación masiva de candidatos",
+            description=f"Se contrataron {len(report['hired'])} candidatos{target} "
+                        f"({report['employees_created']} empleados creados)",
+            activity_type="candidate",
+            user=request.user
+        )
+    return Response(report)
+
+class SelectionStageViewSet(CatalogListMixin, viewsets.ModelViewSet):
     queryset = SelectionStage.objects.all()
     serializer_class = SelectionStageSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'selection'
+    
+    def get_catalog_rows(self):
+        return SelectionStageRepository.get_cached_stages()
     
     @action(detail=False, methods=['patch'], url_path='reorder')
     def reorder(self, request):
@@ -23,12 +63,18 @@ class SelectionStageViewSet(viewsets.ModelViewSet):
         """
         for item in request.data:
             SelectionStage.objects.filter(id=item['id']).update(order=item['order'])
+        # update() sends no signals
+        invalidate_catalog(STAGES_CATALOG)
         return Response({'detail': 'Orden actualizado'}, status=status.HTTP_200_OK)
 
-class CandidateViewSet(viewsets.ModelViewSet):
-    permission_classes = [permissions.IsAuthenticated]
+class CandidateViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'selection'
+    conditional_related_fields = ('documents__uploaded_at',)
     queryset = Candidate.objects.all()
     serializer_class = CandidateSerializer
+    pagination_class = CursorListPagination
+    cursor_ordering = ('-created_at', '-id')
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['first_name', 'last_name', 'email', 'document_number'] 
     ordering_fields = ['created_at', 'first_name']
@@ -76,11 +122,24 @@ class CandidateViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(candidate)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'])
+    def hire(self, request):
+        """
+        Hire many candidates at once.
+
+        Payload: {"candidates": [1, 2, ...], "hire_date": "2025-01-31", "position": "...", "department": "..."}
+        """
+        return hire_candidates(request)
+
 class SelectionProcessViewSet(viewsets.ModelViewSet):
     serializer_class = SelectionProcessSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'selection'
     
     def get_queryset(self):
+        if self.action == 'hire':
+            # Candidates are usually hired once the campaign is closed
+            return SelectionProcess.objects.all()
         return SelectionProcessRepository.get_active_processes()
     
     @action(detail=True, methods=['get'])
@@ -90,10 +149,27 @@ class SelectionProcessViewSet(viewsets.ModelViewSet):
         serializer = CandidateSerializer(candidates, many=True)
         return Response(serializer.data)
 
-class ProcessCandidateViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['post'])
+    def hire(self, request, pk=None):
+        """
+        Hire candidates of this process; the position defaults to the process name.
+
+        Payload: {"candidates": [1, 2, ...], "hire_date": "2025-01-31", "position": "...", "department": "..."}
+        """
+        process = self.get_object()
+        candidate_ids = set(
+            ProcessCandidate.objects.filter(process=process).values_list('candidate_id', flat=True)
+        )
+        return hire_candidates(request, candidate_ids, default_position=process.name[:100], process=process)
+
+class ProcessCandidateViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = ProcessCandidate.objects.all()
+    conditional_related_fields = ('candidate__updated_at', 'candidate__documents__uploaded_at')
     serializer_class = ProcessCandidateSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CursorListPagination
+    cursor_ordering = ('-created_at', '-id')
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'selection'
     
     def perform_update(self, serializer):
         """Register activity when a candidate's status in a process changes."""
@@ -112,4 +188,7 @@ class ProcessCandidateViewSet(viewsets.ModelViewSet):
 class CandidateDocumentViewSet(viewsets.ModelViewSet):
     queryset = CandidateDocument.objects.all()
     serializer_class = CandidateDocumentSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CursorListPagination
+    cursor_ordering = ('-uploaded_at', '-id')
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'selection'
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.10 on 2026-10-18 11:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('training', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trainingsession',
+            index=models.Index(fields=['status', 'session_date', 'start_time'], name='session_status_date_idx'),
+        ),
+    ]
@@ -62,6 +62,10 @@ class TrainingSession(models.Model):
     
     class Meta:
         ordering = ['session_date', 'start_time']
+        indexes = [
+            # Equality on status first, then the date range and the listing order
+            models.Index(fields=['status', 'session_date', 'start_time'], name='session_status_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.program} - {self.session_date}"
@@ -2,6 +2,18 @@
 from .models import TrainingProgram, TrainingSession, TrainingAttendance
 from django.db.models import Count, Avg, Q
 from django.utils import timezone
+from apps.core.cache import get_catalog
+from apps.core.db import use_replica
+
+TRAINING_TYPES_CATALOG = 'training.types'
+
+class TrainingTypeRepository:
+    """Repository for TrainingType model."""
+    
+    @staticmethod
+    def get_cached_active_types():
+        """Return the active training types from the catalog cache."""
+        return [training_type for training_type in get_catalog(TRAINING_TYPES_CATALOG) if training_type.is_active]
 
 class TrainingProgramRepository:
     """Repository for TrainingProgram model."""
@@ -20,6 +32,7 @@ class TrainingProgramRepository:
         )
     
     @staticmethod
+    @use_replica
     def get_program_metrics(program_id):
         """Return detailed metrics for a training program."""
         program = TrainingProgram.objects.filter(id=program_id).annotate(
@@ -108,6 +121,7 @@ class TrainingAttendanceRepository:
         return TrainingAttendance.objects.filter(session_id=session_id)
     
     @staticmethod
+    @use_replica
     def get_attendance_stats(session_id):
         """Return attendance statistics for a session."""
         return TrainingAttendance.objects.filter(session_id=session_id).aggregate(
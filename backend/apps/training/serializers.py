@@ -1,21 +1,23 @@
 from rest_framework import serializers
+from apps.core.serializers import CatalogField, SparseFieldsetMixin
 from django.utils import timezone
 from .models import TrainingType, TrainingProgram, TrainingSession, TrainingAttendance, TrainingEvaluation
 from .logging import logger
+from .repositories import TRAINING_TYPES_CATALOG
 
-class TrainingTypeSerializer(serializers.ModelSerializer):
+class TrainingTypeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = TrainingType
         fields = '__all__'
 
-class TrainingProgramSerializer(serializers.ModelSerializer):
-    training_type_name = serializers.ReadOnlyField(source='training_type.name')
+class TrainingProgramSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    training_type_name = CatalogField(TRAINING_TYPES_CATALOG, 'name', source='training_type_id')
     
     class Meta:
         model = TrainingProgram
         fields = '__all__'
 
-class TrainingSessionSerializer(serializers.ModelSerializer):
+class TrainingSessionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     program_name = serializers.ReadOnlyField(source='program.name')
     instructor_name = serializers.ReadOnlyField(source='instructor.__str__')
     
@@ -51,7 +53,7 @@ class TrainingSessionSerializer(serializers.ModelSerializer):
         logger.info("Session data validation successful")
         return data
 
-class TrainingAttendanceSerializer(serializers.ModelSerializer):
+class TrainingAttendanceSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     employee_name = serializers.ReadOnlyField(source='employee.__str__')
     session_date = serializers.ReadOnlyField(source='session.session_date')
     program_name = serializers.ReadOnlyField(source='session.program.name')
@@ -60,7 +62,7 @@ class TrainingAttendanceSerializer(serializers.ModelSerializer):
         model = TrainingAttendance
         fields = '__all__'
 
-class TrainingEvaluationSerializer(serializers.ModelSerializer):
+class TrainingEvaluationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     employee_name = serializers.ReadOnlyField(source='attendance.employee.__str__')
     program_name = serializers.ReadOnlyField(source='attendance.session.program.name')
     
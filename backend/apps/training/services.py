@@ -0,0 +1,30 @@
+"""Service layer for Training app."""
+from decimal import Decimal
+from .models import TrainingAttendance, TrainingEvaluation
+
+RATING_FIELDS = (
+    'content_rating',
+    'instructor_rating',
+    'materials_rating',
+    'usefulness_rating',
+    'overall_rating',
+)
+
+
+class AttendanceScoreService:
+    """Recalculation of attendance scores from training evaluations."""
+
+    @staticmethod
+    def recalculate_attendances(attendance_ids):
+        """Set the evaluation score of many attendances from their evaluations."""
+        rows = TrainingEvaluation.objects.filter(
+            attendance_id__in=list(attendance_ids)
+        ).values_list('attendance_id', *RATING_FIELDS)
+
+        attendances = [
+            # Average of all ratings
+            TrainingAttendance(id=attendance_id, evaluation_score=Decimal(sum(ratings)) / 5)
+            for attendance_id, *ratings in rows
+        ]
+        TrainingAttendance.objects.bulk_update(attendances, ['evaluation_score'], batch_size=500)
+        return len(attendances)
@@ -1,20 +1,25 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from .models import TrainingEvaluation, TrainingAttendance
+from apps.core.batch import is_batching, mark_dirty, register_recompute
+from apps.core.cache import register_catalog
+from .models import TrainingEvaluation, TrainingType
+from .repositories import TRAINING_TYPES_CATALOG
+from .services import AttendanceScoreService
+
+ATTENDANCE_SCORE = 'training.attendance_score'
+
+register_recompute(ATTENDANCE_SCORE, AttendanceScoreService.recalculate_attendances)
+
+register_catalog(TRAINING_TYPES_CATALOG, lambda: list(TrainingType.objects.order_by('id')), TrainingType)
 
 @receiver(post_save, sender=TrainingEvaluation)
 def update_attendance_score(sender, instance, created, **kwargs):
     """Update the evaluation score in attendance record."""
-    if created:
-        attendance = instance.attendance
-        # Average of all ratings
-        avg_score = (
-            instance.content_rating +
-            instance.instructor_rating +
-            instance.materials_rating +
-            instance.usefulness_rating +
-            instance.overall_rating
-        ) / 5.0
-        
-        attendance.evaluation_score = avg_score
-        attendance.save(update_fields=['evaluation_score'])
+    if not created:
+        return
+
+    if is_batching():
+        mark_dirty(ATTENDANCE_SCORE, instance.attendance_id)
+        return
+
+    AttendanceScoreService.recalculate_attendances([instance.attendance_id])
@@ -10,16 +10,23 @@ from .serializers import (
     TrainingAttendanceSerializer, TrainingEvaluationSerializer
 )
 from .repositories import (
-    TrainingProgramRepository, TrainingSessionRepository, TrainingAttendanceRepository
+    TrainingTypeRepository, TrainingProgramRepository, TrainingSessionRepository, TrainingAttendanceRepository
 )
 from apps.core.utils import record_activity
+from apps.core.pagination import CursorListPagination
+from apps.core.permissions import HasModuleAccess
+from apps.core.views import CatalogListMixin, ConditionalGetMixin
 from .logging import logger
 
-class TrainingTypeViewSet(viewsets.ModelViewSet):
+class TrainingTypeViewSet(CatalogListMixin, viewsets.ModelViewSet):
     """ViewSet for TrainingType model."""
     queryset = TrainingType.objects.filter(is_active=True)
     serializer_class = TrainingTypeSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'training'
+    
+    def get_catalog_rows(self):
+        return TrainingTypeRepository.get_cached_active_types()
 
     def perform_create(self, serializer):
         logger.info(
@@ -32,10 +39,11 @@ class TrainingTypeViewSet(viewsets.ModelViewSet):
             logger.error(f"Error creating training type: {str(e)}")
             raise
 
-class TrainingProgramViewSet(viewsets.ModelViewSet):
+class TrainingProgramViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for TrainingProgram model."""
     serializer_class = TrainingProgramSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'training'
     
     def get_queryset(self):
         logger.info(f"Fetching training programs for user {self.request.user.email}")
@@ -112,7 +120,10 @@ class TrainingProgramViewSet(viewsets.ModelViewSet):
 class TrainingSessionViewSet(viewsets.ModelViewSet):
     """ViewSet for TrainingSession model."""
     serializer_class = TrainingSessionSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CursorListPagination
+    cursor_ordering = ('-created_at', '-id')
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'training'
     
     def get_queryset(self):
         logger.info(f"Fetching training sessions for user {self.request.user.email}")
@@ -196,7 +207,10 @@ class TrainingSessionViewSet(viewsets.ModelViewSet):
 class TrainingAttendanceViewSet(viewsets.ModelViewSet):
     """ViewSet for TrainingAttendance model."""
     serializer_class = TrainingAttendanceSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CursorListPagination
+    cursor_ordering = ('-registered_at', '-id')
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'training'
     
     def get_queryset(self):
         return TrainingAttendance.objects.all()
@@ -237,7 +251,10 @@ class TrainingAttendanceViewSet(viewsets.ModelViewSet):
 class TrainingEvaluationViewSet(viewsets.ModelViewSet):
     """ViewSet for TrainingEvaluation model."""
     serializer_class = TrainingEvaluationSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CursorListPagination
+    cursor_ordering = ('-submitted_at', '-id')
+    permission_classes = [permissions.IsAuthenticated, HasModuleAccess]
+    permission_module = 'training'
     
     def get_queryset(self):
         return TrainingEvaluation.objects.all()
@@ -9,3 +9,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Log the effective database configuration once per process
+from apps.core.db import report_database_config  # noqa: E402
+
+report_database_config()